@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class DynDtConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dyn_dt'
+
+    def ready(self):
+        # Register signals
+        from . import signals  # noqa
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from apps.dyn_dt.search import get_backend, text_fields
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the search index of the dynamic datatables (pg_trgm GIN indexes on "
+        "PostgreSQL, an FTS5 table kept in sync by triggers on SQLite) over the text "
+        "columns of each model in DYNAMIC_DATATB. Re-run after changing a model's text fields."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', dest='slugs', action='append', help='Only this DYNAMIC_DATATB slug; repeatable')
+        parser.add_argument('--drop', action='store_true', help='Remove the indexes instead')
+
+    def handle(self, *args, **options):
+        slugs = options['slugs'] or list(settings.DYNAMIC_DATATB)
+        unknown = set(slugs) - set(settings.DYNAMIC_DATATB)
+        if unknown:
+            raise CommandError(f"Unknown DYNAMIC_DATATB slug(s): {', '.join(sorted(unknown))}")
+        backend = get_backend()
+        for slug in slugs:
+            model = import_string(settings.DYNAMIC_DATATB[slug])
+            if options['drop']:
+                backend.drop_index(model)
+                self.stdout.write(f"{slug}: search index dropped")
+                continue
+            fields = text_fields(model, [f.name for f in model._meta.fields])
+            if not fields:
+                self.stdout.write(f"{slug}: no text columns, skipped")
+                continue
+            backend.build_index(model, fields)
+            self.stdout.write(self.style.SUCCESS(
+                f"{slug}: {type(backend).__name__} index on {', '.join(f.name for f in fields)}"
+            ))
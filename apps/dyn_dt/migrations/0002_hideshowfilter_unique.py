@@ -0,0 +1,27 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:10
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicates(apps, schema_editor):
+    # get_or_create without a constraint could race into duplicate rows;
+    # keep the most recent one per (parent, key)
+    HideShowFilter = apps.get_model('dyn_dt', 'HideShowFilter')
+    keep = HideShowFilter.objects.values('parent', 'key').annotate(last=Max('id')).values_list('last', flat=True)
+    HideShowFilter.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dyn_dt', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='hideshowfilter',
+            constraint=models.UniqueConstraint(fields=('parent', 'key'), name='dyn_dt_hideshowfilter_parent_key'),
+        ),
+    ]
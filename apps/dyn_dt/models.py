@@ -12,6 +12,11 @@ class HideShowFilter(models.Model):
 	key = models.CharField(max_length=255)
 	value = models.BooleanField(default=False)
 
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=['parent', 'key'], name='dyn_dt_hideshowfilter_parent_key'),
+		]
+
 	def __str__(self):
 		return self.key
 
@@ -0,0 +1,150 @@
+import hashlib
+from urllib.parse import urlencode
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+from apps.dyn_dt.utils import rows_version
+
+# Keyset (seek) pagination for large datatables: pages are read with
+# WHERE (order_field, pk) > (last row) instead of OFFSET, and the total is an
+# estimate. Cursors are signed tokens carrying the boundary row's values.
+CURSOR_SALT = 'dyn_dt.cursor'
+COUNT_TTL = 60
+# Below this many rows reltuples is too rough (or -1 before ANALYZE); count exactly
+ESTIMATE_MIN_ROWS = 10000
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(field, value, pk, direction):
+    return signing.dumps([field, value, pk, direction], salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, field):
+    try:
+        name, value, pk, direction = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        raise InvalidCursor(token)
+    if name != field.name or direction not in ('next', 'prev'):
+        # Ordering changed since the link was made
+        raise InvalidCursor(token)
+    if value is not None:
+        value = field.to_python(value)
+    return value, pk, direction
+
+
+def _seek(queryset, field, value, pk, direction):
+    """Rows after (or before) the boundary row in (field ASC NULLS LAST, pk ASC) order."""
+    name = field.name
+    if field.primary_key:
+        after = Q(pk__gt=pk) if direction == 'next' else Q(pk__lt=pk)
+        order = ['pk'] if direction == 'next' else ['-pk']
+        return queryset.filter(after).order_by(*order)
+    if direction == 'next':
+        if value is None:
+            after = Q(**{f'{name}__isnull': True, 'pk__gt': pk})
+        else:
+            after = (Q(**{f'{name}__gt': value}) | Q(**{name: value, 'pk__gt': pk})
+                     | Q(**{f'{name}__isnull': True}))
+        order = [F(name).asc(nulls_last=True), 'pk']
+    else:
+        if value is None:
+            after = Q(**{f'{name}__isnull': True, 'pk__lt': pk}) | Q(**{f'{name}__isnull': False})
+        else:
+            after = Q(**{f'{name}__lt': value}) | Q(**{name: value, 'pk__lt': pk})
+        order = [F(name).desc(nulls_first=True), '-pk']
+    return queryset.filter(after).order_by(*order)
+
+
+def keyset_order(queryset, field):
+    if field.primary_key:
+        return queryset.order_by('pk')
+    return queryset.order_by(F(field.name).asc(nulls_last=True), 'pk')
+
+
+def estimated_count(queryset):
+    """Row count for a datatable queryset, without an exact COUNT(*) where possible.
+
+    Unfiltered tables on PostgreSQL use the planner's reltuples; otherwise the
+    exact count is cached for COUNT_TTL, and only until the model is next
+    saved or deleted (rows_version is bumped on every change).
+    """
+    model = queryset.model
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                           [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= ESTIMATE_MIN_ROWS:
+            return row[0]
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params}'.encode('utf-8')).hexdigest()
+    key = f"dyn_dt:count:{model._meta.label_lower}:{rows_version(model)}:{digest}"
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_TTL)
+    return count
+
+
+class KeysetPage:
+    """One keyset page; iterates like a Paginator page in the template."""
+
+    def __init__(self, object_list, count, next_query=None, previous_query=None):
+        self.object_list = object_list
+        self.count = count
+        self.next_query = next_query
+        self.previous_query = previous_query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_query is not None
+
+    def has_previous(self):
+        return self.previous_query is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_page(request, queryset, field, per_page):
+    """The page of `queryset` selected by request.GET['cursor'].
+
+    Raises InvalidCursor for tampered or stale tokens.
+    """
+    token = request.GET.get('cursor')
+    if token:
+        value, pk, direction = decode_cursor(token, field)
+        rows = list(_seek(queryset, field, value, pk, direction)[:per_page + 1])
+    else:
+        direction = 'next'
+        rows = list(keyset_order(queryset, field)[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+
+    params = request.GET.copy()
+    params.pop('page', None)
+
+    def query(row, to):
+        # Strings survive the JSON token; decode_cursor converts back with to_python
+        value = None if field.value_from_object(row) is None else field.value_to_string(row)
+        params['cursor'] = encode_cursor(field.name, value, row.pk, to)
+        return '?' + urlencode(list(params.lists()), doseq=True)
+
+    has_next = more if direction == 'next' else bool(token)
+    has_previous = bool(token) if direction == 'next' else more
+    return KeysetPage(
+        rows, estimated_count(queryset),
+        next_query=query(rows[-1], 'next') if rows and has_next else None,
+        previous_query=query(rows[0], 'prev') if rows and has_previous else None,
+    )
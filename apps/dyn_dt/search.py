@@ -0,0 +1,173 @@
+import hashlib
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection, models
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+# Search backends for the datatable ?search= box. Only text columns are
+# searched; each backend can build an index for a registered model
+# (manage.py dyn_dt_search_index) and falls back to icontains without one.
+# DYNAMIC_DATATB_SEARCH picks a backend by import path; by default it
+# follows the database vendor.
+TEXT_FIELDS = (models.CharField, models.TextField)
+
+
+def text_fields(model, field_names):
+    """The concrete CharField/TextField columns among `field_names`."""
+    fields = []
+    for name in field_names:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if isinstance(field, TEXT_FIELDS) and field.concrete and not field.is_relation:
+            fields.append(field)
+    return fields
+
+
+class IcontainsSearch:
+    """OR of icontains over the text columns; no index."""
+
+    def filter(self, queryset, fields, value):
+        query = Q()
+        for field in fields:
+            query |= Q(**{f'{field.name}__icontains': value})
+        return queryset.filter(query)
+
+    def build_index(self, model, fields):
+        return []
+
+    def drop_index(self, model):
+        return []
+
+
+class TrigramSearch(IcontainsSearch):
+    """PostgreSQL: the same icontains query, served by pg_trgm GIN indexes.
+
+    Django compiles icontains to UPPER("col"::text) LIKE UPPER(%s), so each
+    index is built on exactly that expression; the planner combines them
+    with a BitmapOr.
+    """
+
+    def _index_name(self, model, field):
+        name = f"dyn_dt_trgm_{model._meta.db_table}_{field.column}"
+        if len(name) > 63:
+            digest = hashlib.md5(name.encode('utf-8')).hexdigest()[:8]
+            name = f"{name[:54]}_{digest}"
+        return name
+
+    def build_index(self, model, fields):
+        statements = ['CREATE EXTENSION IF NOT EXISTS pg_trgm']
+        for field in fields:
+            statements.append(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{self._index_name(model, field)}" '
+                f'ON "{model._meta.db_table}" USING gin (UPPER("{field.column}"::text) gin_trgm_ops)'
+            )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        return statements[1:]
+
+    def drop_index(self, model):
+        prefix = f"dyn_dt_trgm_{model._meta.db_table}_"[:54]
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s AND indexname LIKE %s",
+                           [model._meta.db_table, prefix.replace('_', r'\_') + '%'])
+            names = [row[0] for row in cursor.fetchall()]
+            for name in names:
+                cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+        return names
+
+
+class FTS5Search(IcontainsSearch):
+    """SQLite: an external-content FTS5 table with the trigram tokenizer.
+
+    Trigram matching is case-insensitive substring search, like icontains,
+    but needs at least 3 characters; shorter terms use icontains. Triggers
+    keep the index in sync with the model's table.
+    """
+    MIN_LENGTH = 3
+    _ready = set()
+
+    def _table(self, model):
+        return f"dyn_dt_fts_{model._meta.db_table}"
+
+    def _triggers(self, model):
+        return [f"{self._table(model)}_{suffix}" for suffix in ('ai', 'ad', 'au')]
+
+    def _has_index(self, model, fields):
+        key = (model._meta.db_table, tuple(f.column for f in fields))
+        if key in self._ready:
+            return True
+        names = [self._table(model)] + self._triggers(model)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT name, sql FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})", names)
+            found = dict(cursor.fetchall())
+        # A migration that rebuilds the table drops its triggers: don't trust a stale index
+        quoted = ', '.join('"%s"' % f.column for f in fields)
+        columns = f"fts5({quoted}, "
+        if len(found) == len(names) and columns in found[self._table(model)]:
+            self._ready.add(key)
+            return True
+        return False
+
+    def filter(self, queryset, fields, value):
+        model = queryset.model
+        if len(value) < self.MIN_LENGTH or not self._has_index(model, fields):
+            return super().filter(queryset, fields, value)
+        phrase = '"' + value.replace('"', '""') + '"'
+        columns = ' '.join(f'"{f.column}"' for f in fields)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM "{self._table(model)}" WHERE "{self._table(model)}" MATCH %s',
+            [f'{{{columns}}} : {phrase}'],
+        ))
+
+    def build_index(self, model, fields):
+        self.drop_index(model)
+        table, fts = model._meta.db_table, self._table(model)
+        pk = model._meta.pk.column
+        cols = ', '.join(f'"{f.column}"' for f in fields)
+        new = ', '.join(f'new."{f.column}"' for f in fields)
+        old = ', '.join(f'old."{f.column}"' for f in fields)
+        ai, ad, au = self._triggers(model)
+        statements = [
+            f'CREATE VIRTUAL TABLE "{fts}" USING fts5({cols}, content="{table}", '
+            f'content_rowid="{pk}", tokenize="trigram")',
+            f'CREATE TRIGGER "{ai}" AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new."{pk}", {new}); END',
+            f'CREATE TRIGGER "{ad}" AFTER DELETE ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old."{pk}", {old}); END',
+            f'CREATE TRIGGER "{au}" AFTER UPDATE ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES (\'delete\', old."{pk}", {old}); '
+            f'INSERT INTO "{fts}"(rowid, {cols}) VALUES (new."{pk}", {new}); END',
+            f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')',
+        ]
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        return statements
+
+    def drop_index(self, model):
+        statements = [f'DROP TRIGGER IF EXISTS "{name}"' for name in self._triggers(model)]
+        statements.append(f'DROP TABLE IF EXISTS "{self._table(model)}"')
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        self._ready.difference_update({key for key in self._ready if key[0] == model._meta.db_table})
+        return statements
+
+
+VENDOR_BACKENDS = {
+    'postgresql': TrigramSearch,
+    'sqlite': FTS5Search,
+}
+
+
+def get_backend():
+    path = getattr(settings, 'DYNAMIC_DATATB_SEARCH', None)
+    if path:
+        return import_string(path)()
+    return VENDOR_BACKENDS.get(connection.vendor, IcontainsSearch)()
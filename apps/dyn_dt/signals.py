@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.utils.module_loading import import_string
+from .utils import bump_rows_version, mark_summaries_changed
+
+
+def invalidate_field_summaries(sender, **kwargs):
+    mark_summaries_changed(sender)
+    # Cached row counts must not outlive a change, so their version is not debounced
+    bump_rows_version(sender)
+
+
+# Registered models are only known from settings, so connect them here
+# rather than with @receiver
+for path in settings.DYNAMIC_DATATB.values():
+    model = import_string(path)
+    post_save.connect(invalidate_field_summaries, sender=model, dispatch_uid=f'dyn_dt_summary_save:{path}')
+    post_delete.connect(invalidate_field_summaries, sender=model, dispatch_uid=f'dyn_dt_summary_delete:{path}')
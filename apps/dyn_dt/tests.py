@@ -1,3 +1,219 @@
-from django.test import TestCase
+import json
+from datetime import date, time
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
 
-# Create your tests here.
+from apps.dyn_dt import utils
+from apps.dyn_dt.models import HideShowFilter
+from apps.dyn_dt.pagination import InvalidCursor, _seek, encode_cursor, estimated_count, keyset_order, keyset_page
+from apps.dyn_dt.search import FTS5Search, text_fields
+from apps.pages.models import Consultation, Patient, Product, Professional
+
+
+class FieldSummaryTests(TestCase):
+
+    def setUp(self):
+        for name, price in [('b', 3), ('a', None), ('c', 1), ('a', 2)]:
+            Product.objects.create(name=name, price=price)
+        cache.clear()
+
+    def test_samples_come_from_one_bounded_query(self):
+        with self.assertNumQueries(2):
+            summaries = utils.field_summaries(Product, ['name', 'info', 'price'])
+        self.assertEqual(summaries['name']['samples'], ['a', 'b', 'c'])
+        self.assertEqual(summaries['price']['samples'], [1, 2, 3])
+        self.assertEqual(summaries['price']['count'], 3)
+        self.assertEqual(summaries['name']['distinct'], 3)
+        with mock.patch.object(utils, 'SUMMARY_SAMPLE_ROWS', 2):
+            cache.clear()
+            self.assertEqual(utils.field_summaries(Product, ['name'])['name']['samples'], ['a', 'b'])
+
+    def test_saves_bump_the_version_once_per_debounce_window(self):
+        version = utils.summary_version(Product)
+        Product.objects.create(name='d')
+        bumped = utils.summary_version(Product)
+        self.assertEqual(bumped, version + 1)
+        self.assertIn('d', utils.field_summaries(Product, ['name'])['name']['samples'])
+
+        # A burst of saves inside the window keeps serving the cached summaries
+        for name in 'efg':
+            Product.objects.create(name=name)
+        self.assertEqual(utils.summary_version(Product), bumped)
+        cache.delete(utils._debounce_key(Product))
+        self.assertEqual(utils.summary_version(Product), bumped + 1)
+        self.assertEqual(utils.summary_version(Product), bumped + 1)
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.price = Product._meta.get_field('price')
+        # Duplicates and NULLs: ties break on pk, NULLs sort last
+        for price in [3, None, 1, 3, None, 2, 1]:
+            Product.objects.create(name=f'p{price}', price=price)
+        self.ordered = [p.pk for p in keyset_order(Product.objects.all(), self.price)]
+
+    def _page(self, query=''):
+        request = RequestFactory().get('/datatables/product/' + query)
+        return keyset_page(request, Product.objects.all(), self.price, 2)
+
+    def test_order_is_value_then_pk_with_nulls_last(self):
+        prices = list(Product.objects.filter(pk__in=self.ordered).values_list('pk', 'price'))
+        expected = sorted(prices, key=lambda r: (r[1] is None, r[1] or 0, r[0]))
+        self.assertEqual(self.ordered, [pk for pk, _ in expected])
+
+    def test_cached_count_follows_saves_inside_the_summary_debounce_window(self):
+        # Uses the debounce window, so the summary version now stays put
+        utils.summary_version(Product)
+        self.assertEqual(estimated_count(Product.objects.all()), 7)
+        with self.assertNumQueries(0):
+            self.assertEqual(estimated_count(Product.objects.all()), 7)
+        version = utils.summary_version(Product)
+        Product.objects.create(name='new')
+        self.assertEqual(utils.summary_version(Product), version)
+        self.assertEqual(estimated_count(Product.objects.all()), 8)
+
+    def test_seek_from_a_null_boundary(self):
+        nulls = [pk for pk in self.ordered if Product.objects.get(pk=pk).price is None]
+        after = _seek(Product.objects.all(), self.price, None, nulls[0], 'next')
+        self.assertEqual([p.pk for p in after], nulls[1:])
+        before = _seek(Product.objects.all(), self.price, None, nulls[0], 'prev')
+        self.assertEqual([p.pk for p in before], self.ordered[:-2][::-1])
+
+    def test_next_then_prev_walks_the_same_pages(self):
+        pages, page = [], self._page()
+        self.assertFalse(page.has_previous())
+        while True:
+            pages.append([p.pk for p in page])
+            if not page.has_next():
+                break
+            page = self._page(page.next_query)
+        self.assertEqual(sum(pages, []), self.ordered)
+        self.assertEqual([len(p) for p in pages], [2, 2, 2, 1])
+
+        back = []
+        while page.has_previous():
+            page = self._page(page.previous_query)
+            back.append([p.pk for p in page])
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_tampered_or_stale_cursor_is_rejected(self):
+        with self.assertRaises(InvalidCursor):
+            self._page('?cursor=not-a-token')
+        other = encode_cursor('name', 'p1', self.ordered[0], 'next')
+        with self.assertRaises(InvalidCursor):
+            self._page(f'?cursor={other}')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 is the SQLite backend')
+class FTS5SearchTests(TestCase):
+
+    def setUp(self):
+        self.backend = FTS5Search()
+        self.fields = text_fields(Product, ['name', 'info', 'price'])
+        Product.objects.create(name='Mariana', info='café "especial"')
+        Product.objects.create(name='Juan', info='té')
+        self.addCleanup(self.backend.drop_index, Product)
+
+    def _search(self, value, fields=None):
+        qs = self.backend.filter(Product.objects.all(), fields or self.fields, value)
+        return sorted(qs.values_list('name', flat=True)), 'MATCH' in str(qs.query)
+
+    def test_without_an_index_falls_back_to_icontains(self):
+        self.assertEqual(self._search('ARIA'), (['Mariana'], False))
+
+    def test_index_matches_substrings_and_follows_writes(self):
+        self.backend.build_index(Product, self.fields)
+        self.assertEqual(self._search('ARIA'), (['Mariana'], True))
+        self.assertEqual(self._search('"especial"'), (['Mariana'], True))
+        Product.objects.create(name='Rosario')
+        Product.objects.filter(name='Juan').update(name='Juanario')
+        self.assertEqual(self._search('ario'), (['Juanario', 'Rosario'], True))
+        Product.objects.filter(name='Rosario').delete()
+        self.assertEqual(self._search('ario'), (['Juanario'], True))
+
+    def test_short_terms_use_icontains(self):
+        self.backend.build_index(Product, self.fields)
+        self.assertEqual(self._search('té'), (['Juan'], False))
+
+    def test_index_over_other_columns_is_not_used(self):
+        self.backend.build_index(Product, self.fields[:1])
+        self.assertEqual(self._search('café'), (['Mariana'], False))
+
+
+class CsvExportTests(TestCase):
+
+    def test_foreign_keys_export_as_the_related_object_with_one_lookup_per_key(self):
+        professional = Professional.objects.create(first_name='Ana', last_name='Paz', role='psychologist')
+        patients = [Patient.objects.create(first_name=f'P{i}', last_name='Rojas') for i in range(3)]
+        for patient in patients:
+            Consultation.objects.create(patient=patient, professional=professional, consultory='1',
+                                        date=date(2026, 10, 12), time=time(9))
+        qs = Consultation.objects.order_by('pk')
+        with self.assertNumQueries(3):  # rows, patients, professionals
+            lines = list(utils.csv_rows(qs, ['patient', 'professional', 'consultory']))
+        self.assertEqual(lines[0], 'patient,professional,consultory\r\n')
+        self.assertEqual(lines[1:], [f'{p},{professional},1\r\n' for p in patients])
+
+
+class ColumnConfigTests(TestCase):
+
+    def setUp(self):
+        self.enterContext(mock.patch.dict(utils._column_config, clear=True))
+        self.fields = ['id', 'name', 'price']
+
+    def _hidden(self):
+        return {f.key: f.value for f in utils.column_config('product', self.fields)}
+
+    def test_rows_load_with_one_query_and_are_then_cached(self):
+        HideShowFilter.objects.bulk_create([HideShowFilter(parent='product', key=k) for k in self.fields])
+        with self.assertNumQueries(1):
+            self.assertEqual([f.key for f in utils.column_config('product', self.fields)], self.fields)
+        with self.assertNumQueries(0):
+            utils.column_config('product', self.fields)
+
+    def test_missing_rows_are_created_in_bulk_even_when_another_request_wins(self):
+        bulk_create = HideShowFilter.objects.bulk_create
+
+        def racing(rows, **kwargs):
+            # A concurrent request creates one of the rows first
+            HideShowFilter.objects.create(parent='product', key='name', value=True)
+            return bulk_create(rows, **kwargs)
+
+        with mock.patch.object(HideShowFilter.objects, 'bulk_create', side_effect=racing) as created:
+            self.assertEqual(self._hidden(), {'id': False, 'name': True, 'price': False})
+        self.assertEqual(created.call_args.kwargs, {'ignore_conflicts': True})
+        self.assertEqual(HideShowFilter.objects.filter(parent='product').count(), 3)
+
+    def test_toggling_a_column_invalidates_the_cached_config(self):
+        self.assertFalse(self._hidden()['price'])
+        payload = json.dumps({'key': 'price', 'value': True})
+        self.client.post(reverse('create_hide_show_filter', args=['Product']), {payload: ''})
+        self.assertTrue(self._hidden()['price'])
+
+
+class HideShowDedupeMigrationTests(TransactionTestCase):
+
+    def _migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_keep_the_most_recent_row(self):
+        apps = self._migrate(('dyn_dt', '0001_initial'))
+        old = apps.get_model('dyn_dt', 'HideShowFilter')
+        old.objects.create(parent='product', key='name', value=False)
+        latest = old.objects.create(parent='product', key='name', value=True)
+        other = old.objects.create(parent='product', key='price', value=False)
+
+        apps = self._migrate(('dyn_dt', '0002_hideshowfilter_unique'))
+        rows = apps.get_model('dyn_dt', 'HideShowFilter').objects.order_by('id')
+        self.assertEqual(list(rows.values_list('id', 'value')), [(latest.id, True), (other.id, False)])
@@ -1,13 +1,228 @@
-from django.db.models import Q
+import csv
+import time
+from itertools import islice
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Count, Min, Max
+from apps.dyn_dt.models import HideShowFilter
+from apps.dyn_dt.search import get_backend, text_fields
+
+# Hide/show configuration per datatable path, cached in process:
+# {path: (loaded_at, {key: HideShowFilter})}. create_hide_show_filter drops
+# the entry it changes; the TTL bounds staleness for the other processes.
+COLUMN_CONFIG_TTL = 30
+_column_config = {}
+
+# Per-field summaries for the datatable headers, cached under a per-model
+# version. signals.py only flags a model as changed on save/delete; the next
+# read bumps the version at most once per SUMMARY_DEBOUNCE seconds, so a burst
+# of saves costs one recompute. The TTL bounds staleness across processes that
+# do not share a cache backend.
+SUMMARY_TTL = 3600
+SUMMARY_DEBOUNCE = 60
+SUMMARY_SAMPLES = 10
+# Samples come from the first rows by primary key, read in one bounded query
+SUMMARY_SAMPLE_ROWS = 1000
+ORDERED_FIELDS = (
+    models.IntegerField, models.FloatField, models.DecimalField,
+    models.DateField, models.DateTimeField, models.TimeField,
+    models.CharField, models.TextField,
+)
 
 def user_filter(request, queryset, fields, fk_fields=[]):
     value = request.GET.get('search')
     
     if value:
-        dynamic_q = Q()
-        for field in fields:
-            if field not in fk_fields:
-                dynamic_q |= Q(**{f'{field}__icontains': value})
-        return queryset.filter(dynamic_q)
+        names = [field for field in fields if field not in fk_fields]
+        searched = text_fields(queryset.model, names)
+        if not searched:
+            return queryset.none()
+        return get_backend().filter(queryset, searched, value)
+
+    return queryset
+
+
+def column_config(path, field_names):
+    """HideShowFilter rows for `field_names` of a datatable path, in field order.
+
+    Loaded with one query; rows missing for new fields are created in bulk.
+    """
+    entry = _column_config.get(path)
+    if entry is None or time.monotonic() - entry[0] > COLUMN_CONFIG_TTL or not set(field_names) <= entry[1].keys():
+        filters = {f.key: f for f in HideShowFilter.objects.filter(parent=path)}
+        missing = [HideShowFilter(parent=path, key=name) for name in field_names if name not in filters]
+        if missing:
+            # Another request may create the same rows concurrently
+            HideShowFilter.objects.bulk_create(missing, ignore_conflicts=True)
+            filters = {f.key: f for f in HideShowFilter.objects.filter(parent=path)}
+        entry = (time.monotonic(), filters)
+        _column_config[path] = entry
+    return [entry[1][name] for name in field_names]
+
+
+def invalidate_column_config(path):
+    _column_config.pop(path, None)
+
+
+def _version_key(model):
+    return f"dyn_dt:summary:{model._meta.label_lower}:version"
+
+
+def _changed_key(model):
+    return f"dyn_dt:summary:{model._meta.label_lower}:changed"
+
+
+def _debounce_key(model):
+    return f"dyn_dt:summary:{model._meta.label_lower}:bumped"
+
+
+def summary_version(model):
+    key, changed = _version_key(model), _changed_key(model)
+    state = cache.get_many([key, changed])
+    version = state.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    # Only one reader per debounce window bumps; later changes wait for the next window
+    if state.get(changed) and cache.add(_debounce_key(model), 1, SUMMARY_DEBOUNCE):
+        cache.delete(changed)
+        version = bump_summary_version(model)
+    return version
+
+
+def bump_summary_version(model):
+    try:
+        return cache.incr(_version_key(model))
+    except ValueError:
+        cache.set(_version_key(model), 1, None)
+        return 1
+
+
+def mark_summaries_changed(model):
+    """Flag `model` as changed; summary_version bumps the version on a later read."""
+    cache.set(_changed_key(model), True, None)
+
+
+def _rows_key(model):
+    return f"dyn_dt:rows:{model._meta.label_lower}:version"
+
+
+def rows_version(model):
+    """Per-model version bumped on every save/delete, with no debounce (row counts)."""
+    version = cache.get(_rows_key(model))
+    if version is None:
+        cache.add(_rows_key(model), 1, None)
+        version = cache.get(_rows_key(model), 1)
+    return version
+
+
+def bump_rows_version(model):
+    try:
+        cache.incr(_rows_key(model))
+    except ValueError:
+        cache.set(_rows_key(model), 1, None)
+
+
+def _sample_values(model, fields):
+    """Up to SUMMARY_SAMPLES sorted distinct non-null values per field.
+
+    Taken from the first SUMMARY_SAMPLE_ROWS rows in one query, instead of a
+    DISTINCT ... ORDER BY scan of the whole table per column.
+    """
+    names = [f.name for f in fields]
+    if not names:
+        return {}
+    values = {name: set() for name in names}
+    for row in model.objects.order_by('pk').values_list(*names)[:SUMMARY_SAMPLE_ROWS]:
+        for name, value in zip(names, row):
+            if value is not None:
+                values[name].add(value)
+    return {name: sorted(found)[:SUMMARY_SAMPLES] for name, found in values.items()}
+
+
+def _compute_summaries(model, fields):
+    aggregates = {}
+    for field in fields:
+        aggregates[f'{field.name}__count'] = Count(field.name)
+        aggregates[f'{field.name}__distinct'] = Count(field.name, distinct=True)
+        if isinstance(field, ORDERED_FIELDS) and not field.is_relation:
+            aggregates[f'{field.name}__min'] = Min(field.name)
+            aggregates[f'{field.name}__max'] = Max(field.name)
+    # One pass over the table for every column's counts and bounds
+    totals = model.objects.aggregate(total=Count('pk'), **aggregates)
+    samples = _sample_values(model, [f for f in fields if not isinstance(f, (models.BinaryField, models.JSONField))])
+
+    summaries = {}
+    for field in fields:
+        name = field.name
+        summaries[name] = {
+            'total': totals['total'],
+            'count': totals[f'{name}__count'],
+            'distinct': totals[f'{name}__distinct'],
+            'min': totals.get(f'{name}__min'),
+            'max': totals.get(f'{name}__max'),
+            'samples': samples.get(name, []),
+        }
+    return summaries
+
+
+def field_summaries(model, field_names):
+    """{field: {'total', 'count', 'distinct', 'min', 'max', 'samples'}} for the given fields.
+
+    Computed only for fields missing from the cache; min/max stay None for
+    types without a meaningful order (booleans, relations, ...).
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    prefix = f"dyn_dt:summary:{model._meta.label_lower}:{summary_version(model)}:"
+    cached = cache.get_many([prefix + f.name for f in fields])
+    summaries = {key[len(prefix):]: value for key, value in cached.items()}
+
+    missing = [f for f in fields if f.name not in summaries]
+    if missing:
+        computed = _compute_summaries(model, missing)
+        cache.set_many({prefix + name: value for name, value in computed.items()}, SUMMARY_TTL)
+        summaries.update(computed)
+    return summaries
+
+
+# Rows read (and foreign keys resolved) per round trip by csv_rows
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_rows(queryset, field_names, chunk_size=EXPORT_CHUNK_SIZE):
+    """CSV lines (header first) for `field_names` of `queryset`, for a StreamingHttpResponse.
+
+    Rows are read with values_list(...).iterator(), a server-side cursor where
+    the database has one, so memory stays flat. Foreign keys are written as
+    str() of the related object, like the model instances did, resolved with
+    one in_bulk() per key and chunk instead of a query per row.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(field_names)
 
-    return queryset
\ No newline at end of file
+    model = queryset.model
+    fields = [model._meta.get_field(name) for name in field_names]
+    # values_list() yields the to_field value of a foreign key, so look the rows up by that field
+    fk_columns = [(i, f.related_model, f.target_field.name) for i, f in enumerate(fields) if f.many_to_one]
+    rows = queryset.values_list(*field_names).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        if fk_columns:
+            chunk = [list(row) for row in chunk]
+            for i, related, to_field in fk_columns:
+                ids = {row[i] for row in chunk if row[i] is not None}
+                objects = related._default_manager.in_bulk(ids, field_name=to_field)
+                for row in chunk:
+                    # A dangling id (no related row) exports as empty, like a missing attribute did
+                    row[i] = objects.get(row[i], '') if row[i] is not None else None
+        for row in chunk:
+            yield writer.writerow(row)
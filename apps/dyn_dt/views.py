@@ -1,9 +1,9 @@
-import requests, base64, json, csv
+import requests, base64, json
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils.safestring import mark_safe
 from django.conf import settings
 from django.urls import reverse
@@ -14,7 +14,9 @@ from django.db import models
 from pprint import pp 
 
 from apps.dyn_dt.models import ModelFilter, PageItems, HideShowFilter
-from apps.dyn_dt.utils import user_filter
+from apps.dyn_dt.utils import user_filter, field_summaries, column_config, invalidate_column_config, csv_rows
+from apps.dyn_dt.pagination import keyset_page, InvalidCursor
+from apps.pages.utils.streaming import streaming_content
 
 from cli import *
 
@@ -70,6 +72,7 @@ def create_hide_show_filter(request, model_name):
             key=data.get('key'),
             defaults={'value': data.get('value')}
         )
+        invalidate_column_config(model_name)
 
         response_data = {'message': 'Model updated successfully'}
         return JsonResponse(response_data)
@@ -115,16 +118,11 @@ def model_dt(request, aPath):
         if field.choices:
             choices_dict[field.name] = field.choices
 
-    field_names = []
-    for field_name in db_fields:
-        fields, created = HideShowFilter.objects.get_or_create(key=field_name, parent=aPath.lower())
-        if fields.key in db_fields:
-            field_names.append(fields)
+    field_names = column_config(aPath.lower(), db_fields)
     
-    model_series = {}
-    for f in db_fields:
-        f_values = list ( aModelClass.objects.values_list( f, flat=True) )
-        model_series[ f ] = ', '.join( str(i) for i in f_values)
+    # Header summaries, only for the columns shown (value=False) and cached
+    visible_fields = [f.key for f in field_names if not f.value]
+    summaries = field_summaries(aModelClass, visible_fields)
 
     # model filter
     filter_string = {}
@@ -146,15 +144,22 @@ def model_dt(request, aPath):
     if page_items:
         p_items = page_items.items_per_page
 
-    page = request.GET.get('page', 1)
-    paginator = Paginator(item_list, p_items)
-
-    try:
-        items = paginator.page(page)
-    except PageNotAnInteger:
-        return redirect(reverse('model_dt', args=[aPath]))
-    except EmptyPage:
-        return redirect(reverse('model_dt', args=[aPath]))
+    keyset = aPath in getattr(settings, 'DYNAMIC_DATATB_KEYSET', [])
+    if keyset:
+        try:
+            items = keyset_page(request, item_list, aModelClass._meta.get_field(order_by), p_items)
+        except InvalidCursor:
+            return redirect(reverse('model_dt', args=[aPath]))
+    else:
+        page = request.GET.get('page', 1)
+        paginator = Paginator(item_list, p_items)
+
+        try:
+            items = paginator.page(page)
+        except PageNotAnInteger:
+            return redirect(reverse('model_dt', args=[aPath]))
+        except EmptyPage:
+            return redirect(reverse('model_dt', args=[aPath]))
     
     read_only_fields = ('id', )
 
@@ -170,6 +175,7 @@ def model_dt(request, aPath):
         'db_field_names': db_fields,
         'db_filters': db_filters,
         'items': items,
+        'keyset': keyset,
         'page_items': p_items,
         'filter_instance': filter_instance,
         'read_only_fields': read_only_fields,
@@ -181,6 +187,7 @@ def model_dt(request, aPath):
         'fk_fields_keys': list( fk_fields.keys() ),
         'fk_fields': fk_fields ,
         'choices_dict': choices_dict,
+        'summaries': summaries,
         'segment': 'dynamic_dt'
     }
     return render(request, 'dyn_dt/model.html', context)
@@ -284,38 +291,22 @@ class ExportCSVView(View):
             return HttpResponse( ' > ERR: Getting ModelClass for path: ' + aPath )
         
         db_field_names = [field.name for field in aModelClass._meta.get_fields()]
-        fields = []
-        show_fields = HideShowFilter.objects.filter(value=False, parent=aPath.lower())
-        
-        for field in show_fields:
-            if field.key in db_field_names:
-                fields.append(field.key)
-            else:
-                print(f"Field {field.key} does not exist in {aModelClass} model.")
-
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{aPath.lower()}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(fields)  # Write the header
+        db_fields = [field.name for field in aModelClass._meta.fields]
+        fields = [f.key for f in column_config(aPath.lower(), db_fields) if not f.value]
 
         filter_string = {}
         filter_instance = ModelFilter.objects.filter(parent=aPath.lower())
         for filter_data in filter_instance:
-            filter_string[f'{filter_data.key}__icontains'] = filter_data.value
+            if filter_data.key in db_fields:
+                filter_string[f'{filter_data.key}__icontains'] = filter_data.value
 
         order_by = request.GET.get('order_by', 'id')
+        if order_by not in db_fields:
+            order_by = 'id'
         queryset = aModelClass.objects.filter(**filter_string).order_by(order_by)
 
         items = user_filter(request, queryset, db_field_names)
 
-        for item in items:
-            row_data = []
-            for field in fields:
-                try:
-                    row_data.append(getattr(item, field))
-                except AttributeError:
-                    row_data.append('') 
-            writer.writerow(row_data)
-
+        response = StreamingHttpResponse(streaming_content(request, csv_rows(items, fields)), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{aPath.lower()}.csv"'
         return response
\ No newline at end of file
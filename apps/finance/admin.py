@@ -4,12 +4,10 @@ from .models import PaymentRequest, Payment
 
 @admin.register(PaymentRequest)
 class PaymentRequestAdmin(admin.ModelAdmin):
-    list_display = ('id', 'consultation', 'expected_amount', 'currency', 'status_display', 'created_at')
+    list_display = ('id', 'consultation', 'expected_amount', 'amount_paid', 'currency', 'status', 'created_at')
     search_fields = ('consultation__patient__first_name', 'consultation__patient__last_name')
-    list_filter = ('currency',)
-
-    def status_display(self, obj):
-        return obj.status
+    list_filter = ('currency', 'status')
+    readonly_fields = ('amount_paid', 'status')
 
 
 @admin.register(Payment)
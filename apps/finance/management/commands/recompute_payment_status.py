@@ -0,0 +1,32 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from apps.finance.models import PaymentRequest, Payment, compute_payment_status
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored amount_paid/status of every PaymentRequest from its payments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # One grouped query for all payment totals instead of one SUM per request
+        paid_by_request = {
+            row['request_id']: row['total'] or Decimal('0.00')
+            for row in Payment.objects.values('request_id').annotate(total=Sum('amount'))
+        }
+        changed = []
+        scanned = 0
+        qs = PaymentRequest.objects.only('id', 'expected_amount', 'amount_paid', 'status')
+        for pr in qs.iterator(chunk_size=batch_size):
+            scanned += 1
+            paid = paid_by_request.get(pr.id, Decimal('0.00'))
+            status = compute_payment_status(pr.expected_amount, paid)
+            if pr.amount_paid != paid or pr.status != status:
+                pr.amount_paid = paid
+                pr.status = status
+                changed.append(pr)
+        PaymentRequest.objects.bulk_update(changed, ['amount_paid', 'status'], batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} payment requests, updated {len(changed)}."))
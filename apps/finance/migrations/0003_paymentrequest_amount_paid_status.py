@@ -0,0 +1,53 @@
+# Generated by Django 4.2.9 on 2026-10-17 20:40
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_payment_totals(apps, schema_editor):
+    PaymentRequest = apps.get_model('finance', 'PaymentRequest')
+    Payment = apps.get_model('finance', 'Payment')
+    paid_by_request = {
+        row['request_id']: row['total'] or Decimal('0.00')
+        for row in Payment.objects.values('request_id').annotate(total=Sum('amount'))
+    }
+    batch = []
+    for pr in PaymentRequest.objects.only('id', 'expected_amount').iterator():
+        paid = paid_by_request.get(pr.id, Decimal('0.00'))
+        expected = pr.expected_amount
+        if expected is None or expected == Decimal('0.00') or paid <= Decimal('0.00'):
+            status = 'pending'
+        elif paid >= expected:
+            status = 'paid'
+        else:
+            status = 'partial'
+        pr.amount_paid = paid
+        pr.status = status
+        batch.append(pr)
+    PaymentRequest.objects.bulk_update(batch, ['amount_paid', 'status'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_backfill_expected_amount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentrequest',
+            name='amount_paid',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='paymentrequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('partial', 'Parcial'), ('paid', 'Pagada')], default='pending', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='paymentrequest',
+            index=models.Index(fields=['status'], name='finance_pay_status_52aa7d_idx'),
+        ),
+        migrations.RunPython(backfill_payment_totals, migrations.RunPython.noop),
+    ]
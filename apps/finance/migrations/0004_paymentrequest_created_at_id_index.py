@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-17 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_paymentrequest_amount_paid_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentrequest',
+            index=models.Index(fields=['created_at', 'id'], name='finance_pay_created_c549bd_idx'),
+        ),
+    ]
@@ -4,13 +4,34 @@ from django.db import models
 from django.utils import timezone
 
 
+def compute_payment_status(expected_amount, amount_paid) -> str:
+    if expected_amount is None or Decimal(expected_amount) == Decimal('0.00'):
+        return 'pending'
+    expected_amount, amount_paid = Decimal(expected_amount), Decimal(amount_paid)
+    if amount_paid <= Decimal('0.00'):
+        return 'pending'
+    if amount_paid >= expected_amount:
+        return 'paid'
+    return 'partial'
+
+
 class PaymentRequest(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('partial', 'Parcial'),
+        ('paid', 'Pagada'),
+    ]
+
     consultation = models.OneToOneField(
         'pages.Consultation', on_delete=models.CASCADE, related_name='payment_request'
     )
     expected_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     currency = models.CharField(max_length=3, default='BOB')
     notes = models.TextField(blank=True, default='')
+    # Denormalized from payments (kept current by Payment save/delete signals,
+    # rebuilt in bulk by `manage.py recompute_payment_status`)
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -18,15 +39,29 @@ class PaymentRequest(models.Model):
         indexes = [
             models.Index(fields=['currency']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['status']),
+            # Keyset pagination of the requests list (ORDER BY created_at, id)
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
         return f"PR#{self.id} for consultation {self.consultation_id}"
 
-    @property
-    def amount_paid(self) -> Decimal:
+    def save(self, *args, **kwargs):
+        # expected_amount may have changed: keep the stored status consistent
+        self.status = compute_payment_status(self.expected_amount, self.amount_paid)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['status']
+        super().save(*args, **kwargs)
+
+    def refresh_payment_totals(self, save=True):
+        """Recompute amount_paid/status from the payments table (one aggregate query)."""
         agg = self.payments.aggregate(total=models.Sum('amount'))
-        return agg['total'] or Decimal('0.00')
+        self.amount_paid = agg['total'] or Decimal('0.00')
+        self.status = compute_payment_status(self.expected_amount, self.amount_paid)
+        if save:
+            self.save(update_fields=['amount_paid', 'status', 'updated_at'])
 
     @property
     def balance(self) -> Decimal:
@@ -34,17 +69,6 @@ class PaymentRequest(models.Model):
             return Decimal('0.00')
         return (self.expected_amount or Decimal('0.00')) - self.amount_paid
 
-    @property
-    def status(self) -> str:
-        if self.expected_amount is None or self.expected_amount == Decimal('0.00'):
-            return 'pending'
-        paid = self.amount_paid
-        if paid <= Decimal('0.00'):
-            return 'pending'
-        if paid >= (self.expected_amount or Decimal('0.00')):
-            return 'paid'
-        return 'partial'
-
 
 class Payment(models.Model):
     METHOD_CHOICES = [
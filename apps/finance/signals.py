@@ -1,8 +1,8 @@
 from decimal import Decimal, ROUND_HALF_UP
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from apps.pages.models import Consultation
-from .models import PaymentRequest
+from .models import PaymentRequest, Payment
 
 
 @receiver(post_save, sender=Consultation)
@@ -23,3 +23,20 @@ def create_payment_request_on_consultation(sender, instance: Consultation, creat
         if not pr.currency:
             pr.currency = 'BOB'
         pr.save(update_fields=['expected_amount', 'currency'])
+
+
+@receiver(pre_save, sender=Payment)
+def remember_payment_request(sender, instance: Payment, **kwargs):
+    # A payment moved to another request must also refresh the one it left
+    instance._previous_request_id = None
+    if instance.pk is not None:
+        instance._previous_request_id = Payment.objects.filter(pk=instance.pk).values_list('request_id', flat=True).first()
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_payment_request_totals(sender, instance: Payment, **kwargs):
+    # Keep the denormalized amount_paid/status on the request(s) current
+    request_ids = {instance.request_id, getattr(instance, '_previous_request_id', None)} - {None}
+    for pr in PaymentRequest.objects.filter(id__in=request_ids):
+        pr.refresh_payment_totals()
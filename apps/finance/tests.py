@@ -0,0 +1,96 @@
+from datetime import date, time
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.finance import views
+from apps.finance.models import Payment, PaymentRequest, compute_payment_status
+from apps.pages.models import Consultation, Patient, Professional
+
+
+class PaymentStatusTests(SimpleTestCase):
+
+    def test_status_follows_the_amount_paid(self):
+        self.assertEqual(compute_payment_status(Decimal('100.00'), Decimal('0.00')), 'pending')
+        self.assertEqual(compute_payment_status(Decimal('100.00'), Decimal('40.00')), 'partial')
+        self.assertEqual(compute_payment_status(Decimal('100.00'), Decimal('100.00')), 'paid')
+        self.assertEqual(compute_payment_status(Decimal('100.00'), Decimal('120.00')), 'paid')
+
+    def test_requests_without_an_expected_amount_stay_pending(self):
+        self.assertEqual(compute_payment_status(None, Decimal('50.00')), 'pending')
+        self.assertEqual(compute_payment_status(Decimal('0.00'), Decimal('50.00')), 'pending')
+
+
+def _consultation(hour=9):
+    professional = Professional.objects.create(first_name='Ana', last_name='Paz', role='psychologist')
+    patient = Patient.objects.create(first_name='Luis', last_name='Rojas')
+    # The Consultation post_save signal creates the payment request (250 BOB per 30 min)
+    return Consultation.objects.create(patient=patient, professional=professional, consultory='1',
+                                       date=date(2026, 10, 12), time=time(hour), duration=30)
+
+
+class PaymentTotalsSignalTests(TestCase):
+
+    def setUp(self):
+        self.first = _consultation(9).payment_request
+        self.second = _consultation(10).payment_request
+
+    def _totals(self, pr):
+        pr.refresh_from_db()
+        return pr.amount_paid, pr.status
+
+    def test_saving_and_deleting_payments_refreshes_the_request(self):
+        payment = Payment.objects.create(request=self.first, amount=Decimal('100.00'), method='cash')
+        self.assertEqual(self._totals(self.first), (Decimal('100.00'), 'partial'))
+        Payment.objects.create(request=self.first, amount=Decimal('150.00'), method='qr')
+        self.assertEqual(self._totals(self.first), (Decimal('250.00'), 'paid'))
+        payment.delete()
+        self.assertEqual(self._totals(self.first), (Decimal('150.00'), 'partial'))
+
+    def test_moving_a_payment_refreshes_both_requests(self):
+        payment = Payment.objects.create(request=self.first, amount=Decimal('250.00'), method='card')
+        payment.request = self.second
+        payment.save()
+        self.assertEqual(self._totals(self.first), (Decimal('0.00'), 'pending'))
+        self.assertEqual(self._totals(self.second), (Decimal('250.00'), 'paid'))
+
+
+class PaymentRequestsCursorTests(TestCase):
+
+    def setUp(self):
+        self.ids = [_consultation(hour).payment_request.id for hour in range(8, 13)]
+        # One shared created_at: only the id tiebreak orders the pages
+        PaymentRequest.objects.update(created_at=timezone.now())
+        user = User.objects.create_user('admin', password='x', is_staff=True)
+        self.client.force_login(user)
+
+    def _page(self, **params):
+        response = self.client.get(reverse('finance_requests'), params)
+        return [pr.id for pr in response.context['requests']], response.context
+
+    def test_cursors_walk_every_request_once_in_both_directions(self):
+        newest_first = sorted(self.ids, reverse=True)
+        with mock.patch.object(views, 'REQUESTS_PAGE_SIZE', 2):
+            pages, context = [], None
+            page, context = self._page()
+            pages.append(page)
+            while context['next_cursor']:
+                page, context = self._page(after=context['next_cursor'])
+                pages.append(page)
+            self.assertEqual([pr for p in pages for pr in p], newest_first)
+            self.assertEqual(pages[-1], newest_first[4:])
+
+            # Back from the last page to the first
+            page, context = self._page(before=context['prev_cursor'])
+            self.assertEqual(page, pages[-2])
+            page, context = self._page(before=context['prev_cursor'])
+            self.assertEqual(page, pages[0])
+            self.assertEqual(context['prev_cursor'], '')
+
+    def test_malformed_cursor_shows_the_first_page(self):
+        with mock.patch.object(views, 'REQUESTS_PAGE_SIZE', 2):
+            page, _ = self._page(after='not-a-cursor')
+        self.assertEqual(page, sorted(self.ids, reverse=True)[:2])
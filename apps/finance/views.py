@@ -1,7 +1,8 @@
 from datetime import datetime
+from urllib.parse import urlencode
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Sum
+from django.db.models import Sum, Count, Q
 from django.shortcuts import get_object_or_404, render, redirect
 from django.utils import timezone
 
@@ -28,12 +29,9 @@ def staff_required(view_func):
 @staff_required
 def dashboard(request):
     # KPIs
-    reqs = PaymentRequest.objects.select_related('consultation')
-    counts = {
-        'pending': sum(1 for r in reqs if r.status == 'pending'),
-        'partial': sum(1 for r in reqs if r.status == 'partial'),
-        'paid': sum(1 for r in reqs if r.status == 'paid'),
-    }
+    counts = {'pending': 0, 'partial': 0, 'paid': 0}
+    for row in PaymentRequest.objects.values('status').annotate(n=Count('id')):
+        counts[row['status']] = row['n']
     # Last 30 days payments
     since = timezone.now() - timezone.timedelta(days=30)
     last_payments = Payment.objects.filter(paid_at__gte=since)
@@ -45,17 +43,96 @@ def dashboard(request):
     })
 
 
+REQUESTS_PAGE_SIZE = 50
+
+
+def _encode_cursor(pr) -> str:
+    return f"{pr.created_at.isoformat()}|{pr.id}"
+
+
+def _decode_cursor(raw):
+    """Parse a 'created_at|id' cursor token; returns None if malformed."""
+    try:
+        ts, pk = raw.rsplit('|', 1)
+        created_at = datetime.fromisoformat(ts)
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+        return created_at, int(pk)
+    except (ValueError, AttributeError):
+        return None
+
+
 @login_required
 @staff_required
 def payment_requests_list(request):
     status_filter = request.GET.get('status')
-    reqs = list(PaymentRequest.objects.select_related('consultation__patient', 'consultation__professional'))
+    professional_filter = request.GET.get('professional') or ''
+    patient_filter = (request.GET.get('patient') or '').strip()
+    start = request.GET.get('start') or ''
+    end = request.GET.get('end') or ''
+
+    reqs = PaymentRequest.objects.select_related('consultation__patient', 'consultation__professional')
     if status_filter in {'pending', 'partial', 'paid'}:
-        reqs = [r for r in reqs if r.status == status_filter]
+        reqs = reqs.filter(status=status_filter)
+    if professional_filter.isdigit():
+        reqs = reqs.filter(consultation__professional_id=int(professional_filter))
+    if patient_filter:
+        for term in patient_filter.split():
+            reqs = reqs.filter(
+                Q(consultation__patient__first_name__icontains=term) |
+                Q(consultation__patient__last_name__icontains=term)
+            )
+    try:
+        if start:
+            reqs = reqs.filter(consultation__date__gte=datetime.strptime(start, '%Y-%m-%d').date())
+        if end:
+            reqs = reqs.filter(consultation__date__lte=datetime.strptime(end, '%Y-%m-%d').date())
+    except ValueError:
+        messages.warning(request, 'Rango de fechas inválido.')
+
+    # Keyset pagination on (created_at, id), newest first: each page is an
+    # index range scan instead of an OFFSET over every older request
+    after = _decode_cursor(request.GET.get('after'))
+    before = _decode_cursor(request.GET.get('before'))
+    if before:
+        created_at, pk = before
+        page = list(
+            reqs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            .order_by('created_at', 'id')[:REQUESTS_PAGE_SIZE + 1]
+        )
+        has_newer = len(page) > REQUESTS_PAGE_SIZE
+        page = page[:REQUESTS_PAGE_SIZE][::-1]
+        has_older = True
+    else:
+        if after:
+            created_at, pk = after
+            reqs = reqs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        page = list(reqs.order_by('-created_at', '-id')[:REQUESTS_PAGE_SIZE + 1])
+        has_older = len(page) > REQUESTS_PAGE_SIZE
+        page = page[:REQUESTS_PAGE_SIZE]
+        has_newer = after is not None
+
+    filter_params = {k: v for k, v in {
+        'status': status_filter or '',
+        'professional': professional_filter,
+        'patient': patient_filter,
+        'start': start,
+        'end': end,
+    }.items() if v}
+
     return render(request, 'pages/finance/payment_requests_list.html', {
         'segment': 'finance_requests',
-        'requests': reqs,
+        'requests': page,
         'status_filter': status_filter,
+        'professional_filter': professional_filter,
+        'patient_filter': patient_filter,
+        'start': start,
+        'end': end,
+        'professionals': Professional.objects.exclude(role='secretary').order_by('first_name', 'last_name'),
+        'filter_query': urlencode(filter_params),
+        'has_filters': bool(filter_params),
+        'next_cursor': _encode_cursor(page[-1]) if page and has_older else '',
+        'prev_cursor': _encode_cursor(page[0]) if page and has_newer else '',
     })
 
 
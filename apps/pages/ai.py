@@ -0,0 +1,486 @@
+"""OpenAI helpers for the patient AI assistant (context, files, vector stores, summaries).
+
+Shared by the report views and the background job handlers in `apps.pages.jobs`.
+"""
+import hashlib
+import io
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from openai import AsyncOpenAI, OpenAI
+from .models import Patient, Professional, Consultation, ConsultationAttachment
+from .models import PatientAIMessage, PatientAIThread, PatientVectorStoreFile
+
+logger = logging.getLogger(__name__)
+
+
+SYSTEM_PROMPT = (
+    "Eres un asistente clínico para profesionales de salud mental. "
+    "Tienes acceso al expediente clínico completo del paciente "
+    "mediante búsqueda semántica en los archivos. "
+    "Usa esa información para responder con precisión clínica. "
+    "Responde siempre en español."
+)
+
+# Attachment uploads run in parallel; each file is retried with exponential backoff
+UPLOAD_WORKERS = 4
+UPLOAD_RETRIES = 3
+UPLOAD_BACKOFF = 1.0
+
+# OpenAI processes one turn per conversation at a time. Turns for the same
+# thread are serialized with a lock stored on the thread row (shared by every
+# process); the TTL frees locks left by a crash.
+CONVERSATION_LOCK_TTL = 300
+
+SUMMARY_REQUEST = (
+    "Genera el resumen clínico completo del paciente con: "
+    "1) Historia clínica detallada basada en todas las consultas registradas. "
+    "2) Breve resumen de la última sesión y dónde quedó. "
+    "3) Recomendaciones prácticas y cautelas para la próxima sesión."
+)
+
+
+def _consultation_lines(c, notes, atts):
+    lines = [f"- Consulta: {c.date} {c.time}, estado={c.get_status_display()}, duración={c.duration} min\n"]
+    if notes:
+        lines.append("  Notas:\n")
+        for n in notes:
+            title = (n.title or '').strip()
+            tshow = f"{title}: " if title else ''
+            lines.append(f"   • {tshow}{(n.content or '').strip()[:500]}\n")
+    if atts:
+        lines.append("  Adjuntos:\n")
+        for a in atts:
+            lines.append(f"   • {a.get_file_type_display()} - {a.display_name or a.file.name}\n")
+    return lines
+
+
+# Consultations are streamed from the DB in chunks; each chunk carries its
+# notes and attachments via prefetch_related (3 queries per chunk).
+CONTEXT_CHUNK_SIZE = 200
+
+
+def _consultations_with_record(professional: Professional, patient: Patient):
+    return (
+        Consultation.objects
+        .filter(professional=professional, patient=patient)
+        .order_by('date', 'time', 'id')
+        .prefetch_related('session_notes', 'attachments')
+    )
+
+
+def _patient_header(patient: Patient, consult_count: int) -> str:
+    return f"Paciente: {patient.first_name} {patient.last_name}\nTotal de consultas: {consult_count}\n"
+
+
+def iter_patient_context(professional: Professional, patient: Patient):
+    """Yield the patient's clinical context piece by piece.
+
+    Memory stays bounded by CONTEXT_CHUNK_SIZE consultations, so very long
+    histories never need to exist as one string unless the caller joins them.
+    The header (with the consultation total, from one COUNT) comes first.
+    """
+    consultations = _consultations_with_record(professional, patient)
+    yield _patient_header(patient, consultations.count())
+    for c in consultations.iterator(chunk_size=CONTEXT_CHUNK_SIZE):
+        yield ''.join(_consultation_lines(c, c.session_notes.all(), c.attachments.all()))
+
+
+def build_patient_context(professional: Professional, patient: Patient) -> str:
+    return ''.join(iter_patient_context(professional, patient))
+
+
+def openai_client():
+    api_key = os.environ.get('OPENAI_API_KEY')
+    if not api_key:
+        return None
+    try:
+        return OpenAI(api_key=api_key)
+    except Exception:
+        return None
+
+
+def async_openai_client():
+    api_key = os.environ.get('OPENAI_API_KEY')
+    if not api_key:
+        return None
+    try:
+        return AsyncOpenAI(api_key=api_key)
+    except Exception:
+        return None
+
+
+def _upload_attachment_file(client: OpenAI, attachment: ConsultationAttachment, retries: int) -> str:
+    for attempt in range(retries):
+        try:
+            with open(attachment.file.path, 'rb') as f:
+                fobj = client.files.create(file=f, purpose='user_data')
+            return getattr(fobj, 'id', None) or (fobj.get('id') if isinstance(fobj, dict) else None)
+        except (FileNotFoundError, ValueError):
+            raise  # Missing on disk: retrying will not help
+        except Exception:
+            if attempt == retries - 1:
+                raise
+            time.sleep(UPLOAD_BACKOFF * (2 ** attempt))
+
+
+def upload_attachments(client: OpenAI, attachments, workers: int = UPLOAD_WORKERS,
+                       retries: int = UPLOAD_RETRIES, progress=None):
+    """Upload attachments to the Files API concurrently, replacing any existing id.
+
+    `progress(done, total)` is called after each file finishes. Successful ids
+    are set on the instances and saved with one bulk_update at the end.
+    Returns (uploaded attachments, list of "<id>: <error>" strings).
+    """
+    attachments = list(attachments)
+    uploaded, errors = [], []
+    if not attachments:
+        return uploaded, errors
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(attachments)))) as pool:
+        futures = {pool.submit(_upload_attachment_file, client, att, retries): att for att in attachments}
+        for done, future in enumerate(as_completed(futures), start=1):
+            att = futures[future]
+            try:
+                file_id = future.result()
+            except Exception as e:
+                errors.append(f"{att.id}: {e}")
+            else:
+                if file_id:
+                    att.openai_file_id = file_id
+                    uploaded.append(att)
+            if progress:
+                progress(done, len(attachments))
+    ConsultationAttachment.objects.bulk_update(uploaded, ['openai_file_id'])
+    return uploaded, errors
+
+
+def _sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _sha256_file(field_file):
+    digest = hashlib.sha256()
+    try:
+        with field_file.open('rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+def _attachment_hash(attachment):
+    """SHA-256 of an attachment's file, read from disk only the first time."""
+    if not attachment.content_hash:
+        digest = _sha256_file(attachment.file)
+        if not digest:
+            return None
+        attachment.content_hash = digest
+        ConsultationAttachment.objects.filter(id=attachment.id).update(content_hash=digest)
+    return attachment.content_hash
+
+
+def _patient_documents(prof: Professional, patient: Patient):
+    """Describe every document that should be indexed for this patient.
+
+    Returns {source_key: (content_hash, text or ConsultationAttachment)}: a
+    header document, one text document per consultation (with its notes) and
+    one entry per attachment file.
+    """
+    cons = list(_consultations_with_record(prof, patient))
+    header = _patient_header(patient, len(cons))
+    docs = {'patient': (_sha256_text(header), header)}
+    name_line = f"Paciente: {patient.first_name} {patient.last_name}\n"
+    for c in cons:
+        atts = list(c.attachments.all())
+        text = name_line + ''.join(_consultation_lines(c, c.session_notes.all(), atts))
+        docs[f'consultation:{c.id}'] = (_sha256_text(text), text)
+        for a in atts:
+            digest = _attachment_hash(a)
+            if digest:
+                docs[f'attachment:{a.id}'] = (digest, a)
+    return docs
+
+
+def _create_vector_store(client: OpenAI, thread, patient: Patient) -> str:
+    vs = client.vector_stores.create(
+        name=f"paciente_{patient.id}_{patient.last_name}",
+        expires_after={"anchor": "last_active_at", "days": 90},
+    )
+    thread.indexed_files.all().delete()
+    thread.openai_vector_store_id = vs.id
+    thread.save(update_fields=['openai_vector_store_id'])
+    return vs.id
+
+
+def _drop_vector_store(client: OpenAI, thread):
+    for fid in thread.indexed_files.filter(owns_file=True).values_list('openai_file_id', flat=True):
+        try:
+            client.files.delete(fid)
+        except Exception:
+            pass
+    try:
+        client.vector_stores.delete(thread.openai_vector_store_id)
+    except Exception:
+        pass  # Already deleted or not found — safe to ignore
+
+
+def _store_is_usable(client: OpenAI, thread) -> bool:
+    # Stores from before the sync table (no rows) hold one monolithic notes file
+    # we cannot diff against, and expired stores cannot take new files.
+    if not thread.openai_vector_store_id or not thread.indexed_files.exists():
+        return False
+    try:
+        vs = client.vector_stores.retrieve(thread.openai_vector_store_id)
+    except Exception:
+        return False
+    return getattr(vs, 'status', None) != 'expired'
+
+
+def _is_stale(row, wanted):
+    if wanted is None:
+        return True
+    digest, source = wanted
+    if digest != row.content_hash:
+        return True
+    # Attachment re-uploaded to the Files API under a new id (report_sessions_reupload)
+    return isinstance(source, ConsultationAttachment) and bool(source.openai_file_id) and source.openai_file_id != row.openai_file_id
+
+
+def ensure_patient_vector_store(client: OpenAI, thread, prof: Professional, patient: Patient, rebuild: bool = False) -> str:
+    """
+    Bring the per-patient Vector Store in line with the clinical record:
+      - A header text file plus one text file per consultation (with its notes)
+      - All uploaded attachment files (PDFs, images, docs)
+
+    The Vector Store powers the file_search tool so the model retrieves only
+    relevant chunks per query instead of receiving the entire context every turn.
+
+    Indexed documents are tracked in PatientVectorStoreFile with a content
+    hash, so only new/changed documents are uploaded and only stale ones are
+    removed. `rebuild=True` (or a missing/expired store) starts from scratch.
+
+    Returns the vector_store_id (also saved to thread.openai_vector_store_id).
+    """
+    if rebuild or not _store_is_usable(client, thread):
+        if thread.openai_vector_store_id:
+            _drop_vector_store(client, thread)
+        vs_id = _create_vector_store(client, thread, patient)
+    else:
+        vs_id = thread.openai_vector_store_id
+
+    wanted = _patient_documents(prof, patient)
+    indexed = {row.source_key: row for row in thread.indexed_files.all()}
+
+    # Remove documents whose source is gone or whose content changed
+    stale = [row for key, row in indexed.items() if _is_stale(row, wanted.get(key))]
+    for row in stale:
+        try:
+            client.vector_stores.files.delete(file_id=row.openai_file_id, vector_store_id=vs_id)
+        except Exception:
+            pass
+        if row.owns_file:
+            try:
+                client.files.delete(row.openai_file_id)
+            except Exception:
+                pass
+    if stale:
+        PatientVectorStoreFile.objects.filter(id__in=[row.id for row in stale]).delete()
+    stale_keys = {row.source_key for row in stale}
+
+    # Upload only what is not indexed yet
+    pending = {key: value for key, value in wanted.items() if key not in indexed or key in stale_keys}
+    to_upload = []
+    for key, (digest, source) in pending.items():
+        if isinstance(source, ConsultationAttachment):
+            # Missing id, or the attachment's file changed since it was uploaded
+            if not source.openai_file_id or (key in stale_keys and indexed[key].content_hash != digest):
+                to_upload.append(source)
+    uploaded, _ = upload_attachments(client, to_upload)
+    failed_ids = {a.id for a in to_upload} - {a.id for a in uploaded}
+
+    new_rows = []
+    for key, (digest, source) in pending.items():
+        if isinstance(source, ConsultationAttachment):
+            if source.id in failed_ids:
+                continue  # Retried on the next sync
+            fid = source.openai_file_id
+            owns = False
+        else:
+            fobj = client.files.create(
+                file=(f"{key.replace(':', '_')}_{patient.id}.txt", io.BytesIO(source.encode('utf-8')), 'text/plain'),
+                purpose='assistants',
+            )
+            fid = fobj.id
+            owns = True
+        if fid:
+            new_rows.append(PatientVectorStoreFile(
+                thread=thread, source_key=key, content_hash=digest, openai_file_id=fid, owns_file=owns,
+            ))
+
+    if new_rows:
+        # Batch-index the delta (blocks until indexing completes)
+        client.vector_stores.file_batches.create_and_poll(
+            vector_store_id=vs_id,
+            file_ids=[row.openai_file_id for row in new_rows],
+        )
+        PatientVectorStoreFile.objects.bulk_create(new_rows)
+    return vs_id
+
+
+class ConversationBusy(Exception):
+    """Another turn is already running on this thread's conversation."""
+
+
+def _free_conversation(thread_id):
+    """Threads whose lock is free (never taken, released, or expired)."""
+    expired = timezone.now() - timedelta(seconds=CONVERSATION_LOCK_TTL)
+    return PatientAIThread.objects.filter(id=thread_id).filter(
+        Q(turn_owner='') | Q(turn_started_at__isnull=True) | Q(turn_started_at__lt=expired)
+    )
+
+
+def acquire_conversation(thread_id, wait: float = 0):
+    """Try to take the thread's conversation lock, waiting up to `wait` seconds.
+
+    Returns the owner token to pass to release_conversation, or None if the
+    conversation stayed busy.
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    while True:
+        # Conditional UPDATE: atomic in the database, so only one process wins
+        if _free_conversation(thread_id).update(turn_owner=token, turn_started_at=timezone.now()):
+            return token
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.5)
+
+
+def release_conversation(thread_id, token):
+    """Free the lock only if `token` still owns it (not after it expired and was retaken)."""
+    PatientAIThread.objects.filter(id=thread_id, turn_owner=token).update(turn_owner='', turn_started_at=None)
+
+
+async def aacquire_conversation(thread_id):
+    token = uuid.uuid4().hex
+    if await _free_conversation(thread_id).aupdate(turn_owner=token, turn_started_at=timezone.now()):
+        return token
+    return None
+
+
+async def arelease_conversation(thread_id, token):
+    await PatientAIThread.objects.filter(id=thread_id, turn_owner=token).aupdate(turn_owner='', turn_started_at=None)
+
+
+@contextmanager
+def conversation_lock(thread_id, wait: float = 0):
+    token = acquire_conversation(thread_id, wait)
+    if not token:
+        raise ConversationBusy(thread_id)
+    try:
+        yield
+    finally:
+        release_conversation(thread_id, token)
+
+
+def chat_request(thread, question: str) -> dict:
+    """Keyword arguments for responses.create for one chat turn on `thread`."""
+    vs_id = thread.openai_vector_store_id or None
+    return {
+        'model': thread.model or 'gpt-5-mini',
+        'input': [{"role": "user", "content": question}],
+        'conversation': thread.openai_conversation_id,
+        'tools': [{"type": "file_search", "vector_store_ids": [vs_id]}] if vs_id else [],
+        'reasoning': {"effort": "low"},
+    }
+
+
+def log_usage(usage, thread_id):
+    # Log token usage via Django logger (visible in dev console + log files)
+    if not usage:
+        return
+    in_tok = getattr(usage, 'input_tokens', '?')
+    out_tok = getattr(usage, 'output_tokens', '?')
+    cached = getattr(getattr(usage, 'input_tokens_details', None), 'cached_tokens', 0)
+    logger.info('[AI chat] in=%s (cached=%s) out=%s | thread=%s', in_tok, cached, out_tok, thread_id)
+
+
+def _stream_event_text(event, thread_id):
+    """Text delta carried by a Responses stream event (None if it carries none)."""
+    etype = getattr(event, 'type', '')
+    if etype == 'response.output_text.delta':
+        return event.delta
+    if etype == 'response.completed':
+        log_usage(getattr(event.response, 'usage', None), thread_id)
+    elif etype in ('response.failed', 'error'):
+        err = getattr(getattr(event, 'response', None), 'error', None) or getattr(event, 'message', '')
+        raise RuntimeError(getattr(err, 'message', None) or str(err) or 'respuesta fallida')
+    return None
+
+
+def stream_chat_answer(client: OpenAI, thread, question: str):
+    """Yield answer text deltas for one chat turn, then store the full answer.
+
+    The assistant PatientAIMessage is saved when the stream ends, including
+    when the consumer stops early (client disconnect) with a partial answer.
+    """
+    parts = []
+    try:
+        for event in client.responses.create(stream=True, **chat_request(thread, question)):
+            text = _stream_event_text(event, thread.id)
+            if text:
+                parts.append(text)
+                yield text
+    finally:
+        if parts:
+            PatientAIMessage.objects.create(thread=thread, role='assistant', content=''.join(parts))
+
+
+async def astream_chat_answer(client: AsyncOpenAI, thread, question: str):
+    """Async counterpart of stream_chat_answer."""
+    parts = []
+    try:
+        async for event in await client.responses.create(stream=True, **chat_request(thread, question)):
+            text = _stream_event_text(event, thread.id)
+            if text:
+                parts.append(text)
+                yield text
+    finally:
+        if parts:
+            await PatientAIMessage.objects.acreate(thread=thread, role='assistant', content=''.join(parts))
+
+
+def generate_thread_summary(client: OpenAI, thread, rebuild: bool = False) -> str:
+    """Sync the patient's index, open a fresh conversation and store a new summary.
+
+    Returns the summary text ('' if the model returned nothing).
+    """
+    # Sync the per-patient vector store (RAG index: notes + attachments)
+    vs_id = ensure_patient_vector_store(client, thread, thread.professional, thread.patient, rebuild=rebuild)
+    # Background job: wait for an in-flight chat turn instead of failing
+    with conversation_lock(thread.id, wait=CONVERSATION_LOCK_TTL):
+        # Fresh conversation with a minimal system prompt (no huge context blob)
+        conv = client.conversations.create(
+            items=[{"role": "user", "content": [{"type": "input_text", "text": SYSTEM_PROMPT}]}]
+        )
+        thread.openai_conversation_id = conv.id
+        thread.save(update_fields=['openai_conversation_id'])
+        # Generate initial structured summary via file_search tool
+        resp = client.responses.create(
+            model=thread.model or 'gpt-5-mini',
+            input=[{"role": "user", "content": SUMMARY_REQUEST}],
+            conversation=conv.id,
+            tools=[{"type": "file_search", "vector_store_ids": [vs_id]}],
+            reasoning={"effort": "low"},
+        )
+    content = getattr(resp, 'output_text', None) or ''
+    if content:
+        PatientAIMessage.objects.create(thread=thread, role='assistant', content=content, is_summary=True)
+    return content
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PagesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.pages"
+
+    def ready(self):
+        # Register signals
+        from . import signals  # noqa
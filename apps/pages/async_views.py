@@ -0,0 +1,166 @@
+"""Async versions of the I/O-bound views, served when settings.ASYNC_VIEWS is on.
+
+Under ASGI (gunicorn-asgi-cfg.py) a request waiting on OpenAI only parks a
+coroutine, so concurrent chats no longer queue behind one sync worker. Each
+view keeps the same URL, parameters and JSON contract as its sync twin in
+views.py.
+"""
+import os
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import JsonResponse
+from .models import Patient, Professional, Consultation, ConsultationAttachment, PatientAIThread, PatientAIMessage
+from .ai import async_openai_client, aacquire_conversation, arelease_conversation, chat_request
+from .ai import astream_chat_answer
+from .utils.availability import agenerate_slots, agenerate_slots_range
+from .views import _slots_params, _slots_response, SLOTS_PROFESSIONAL_NOT_FOUND
+from .views import _chat_params, _chat_thread_error, _upgrade_chat_model
+from .views import _chat_busy_response, _chat_error_response, _chat_answer, _sse, _sse_chat_error, _sse_response
+from . import jobs
+
+
+def async_login_required(view_func):
+    # django.contrib.auth's login_required only wraps sync views in Django 4.2
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        # Resolve the lazy request.user (session + user queries) off the event loop
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+async def _aget_professional(user):
+    if not hasattr(user, '_cached_professional'):
+        user._cached_professional = await Professional.objects.filter(user=user).afirst()
+    return user._cached_professional
+
+
+async def _ais_secretary(user):
+    prof = await _aget_professional(user)
+    return prof is not None and prof.role == 'secretary'
+
+
+@async_login_required
+async def available_slots_api(request):
+    is_admin = request.user.is_staff or await _ais_secretary(request.user)
+    params, error = _slots_params(request, is_admin)
+    if error:
+        return error
+    if params['lookup'] is None:
+        return _slots_response(params, None)
+    professional = await Professional.objects.filter(**params['lookup']).afirst()
+    if not professional:
+        return JsonResponse(SLOTS_PROFESSIONAL_NOT_FOUND, status=404)
+
+    # Always step in 30 minute increments regardless of duration
+    if params['range_mode']:
+        result = await agenerate_slots_range(professional, params['start'], params['end'],
+                                             duration_minutes=params['duration'], step_minutes=30)
+    else:
+        result = await agenerate_slots(professional, params['start'], duration_minutes=params['duration'], step_minutes=30)
+    return _slots_response(params, result)
+
+
+@async_login_required
+async def report_sessions_reupload(request):
+    if await _ais_secretary(request.user):
+        return JsonResponse({'ok': False, 'error': 'No autorizado'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'ok': False, 'error': 'Método no permitido'}, status=405)
+    prof = await _aget_professional(request.user)
+    if not (request.user.is_staff or prof):
+        return JsonResponse({'ok': False, 'error': 'No autorizado'}, status=403)
+    patient_id = request.POST.get('patient')
+    if not patient_id:
+        return JsonResponse({'ok': False, 'error': 'Falta parámetro patient'}, status=400)
+    patient = await Patient.objects.select_related('professional').filter(id=patient_id).afirst()
+    if not patient:
+        return JsonResponse({'ok': False, 'error': 'Paciente no encontrado'}, status=404)
+    # Access control: staff or assigned professional
+    if not request.user.is_staff:
+        if not patient.professional_id or patient.professional_id != prof.id:
+            return JsonResponse({'ok': False, 'error': 'No autorizado'}, status=403)
+
+    if not os.environ.get('OPENAI_API_KEY'):
+        return JsonResponse({'ok': False, 'error': 'Falta OPENAI_API_KEY'}, status=400)
+
+    cons_qs = Consultation.objects.filter(patient=patient)
+    if not request.user.is_staff and prof:
+        cons_qs = cons_qs.filter(professional=prof)
+    att_ids = [
+        att_id async for att_id in
+        ConsultationAttachment.objects.filter(consultation__in=cons_qs).values_list('id', flat=True)
+    ]
+
+    view_prof = prof or patient.professional
+    thread = await PatientAIThread.objects.filter(professional=view_prof, patient=patient).afirst() if view_prof else None
+    job = await jobs.aenqueue('reupload', {'attachment_ids': att_ids}, thread=thread, user=request.user)
+    return JsonResponse({'ok': True, 'total': len(att_ids), 'job_id': job.id})
+
+
+async def _achat_turn(request):
+    """Async counterpart of views._chat_turn."""
+    thread_id, question, error = _chat_params(request, await _ais_secretary(request.user))
+    if error:
+        return error, None, None
+    prof = await _aget_professional(request.user)
+    thread = await PatientAIThread.objects.select_related('professional', 'patient').filter(id=thread_id).afirst()
+    client = async_openai_client() if thread else None
+    error = _chat_thread_error(request, prof, thread, client)
+    if error:
+        return error, None, None
+    if _upgrade_chat_model(thread):
+        await thread.asave(update_fields=['model'])
+    return thread, question, client
+
+
+@async_login_required
+async def report_sessions_chat(request):
+    thread, question, client = await _achat_turn(request)
+    if isinstance(thread, JsonResponse):
+        return thread
+
+    token = await aacquire_conversation(thread.id)
+    if not token:
+        return _chat_busy_response()
+    try:
+        await PatientAIMessage.objects.acreate(thread=thread, role='user', content=question)
+        try:
+            resp = await client.responses.create(**chat_request(thread, question))
+        except Exception as e:
+            return _chat_error_response(e)
+        answer = _chat_answer(resp, thread)
+        await PatientAIMessage.objects.acreate(thread=thread, role='assistant', content=answer)
+        return JsonResponse({'ok': True, 'answer': answer})
+    finally:
+        await arelease_conversation(thread.id, token)
+
+
+@async_login_required
+async def report_sessions_chat_stream(request):
+    # Under ASGI a sync iterator would be buffered whole before sending, so the
+    # SSE stream needs an async generator to reach the browser incrementally
+    thread, question, client = await _achat_turn(request)
+    if isinstance(thread, JsonResponse):
+        return thread
+
+    async def events():
+        # Locked inside the generator, like the sync view
+        token = await aacquire_conversation(thread.id)
+        if not token:
+            yield _sse_chat_error()
+            return
+        try:
+            await PatientAIMessage.objects.acreate(thread=thread, role='user', content=question)
+            async for delta in astream_chat_answer(client, thread, question):
+                yield _sse('delta', {'text': delta})
+            yield _sse('done', {'ok': True})
+        except Exception as e:
+            yield _sse_chat_error(e)
+        finally:
+            await arelease_conversation(thread.id, token)
+
+    return _sse_response(events())
@@ -0,0 +1,100 @@
+"""REST endpoints for EEG data (session or token authentication, see REST_FRAMEWORK)."""
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from django.db import transaction
+from rest_framework.views import APIView
+from .models import EEGSession, Professional
+from .utils.eeg_ingest import IngestError, parse_timestamp, rows_from_json, rows_from_frame, write_batch
+from .utils.eeg_summary import close_session
+
+
+class FrameParser(BaseParser):
+    """Raw bytes for `application/octet-stream` bodies (binary reading frames)."""
+    media_type = 'application/octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read()
+
+
+class IsStaffOrProfessional(BasePermission):
+    def has_permission(self, request, view):
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        return user.is_staff or Professional.objects.filter(user=user).exists()
+
+
+class EEGReadingIngestView(APIView):
+    """POST batched readings for one session.
+
+    JSON body: {"batches": [{"seq": 1, "rows": [[ts, attention, meditation, delta,
+    theta, alpha, beta, gamma, emotion, confidence], ...]}, ...]}
+    Binary body (application/octet-stream): one frame, sequence number in the
+    X-Batch-Seq header (layout in utils.eeg_ingest.rows_from_frame).
+
+    Responds with one acknowledgement per batch; a failed batch does not stop
+    the others.
+    """
+    parser_classes = [JSONParser, FrameParser]
+    permission_classes = [IsStaffOrProfessional]
+
+    def post(self, request, session_id):
+        session = EEGSession.objects.filter(id=session_id).only('id', 'ended_at').first()
+        if session is None:
+            return Response({'ok': False, 'error': 'Sesión no encontrada'}, status=404)
+        if session.ended_at is not None:
+            return Response({'ok': False, 'error': 'La sesión ya fue cerrada'}, status=409)
+
+        if isinstance(request.data, bytes):
+            batches = [(request.headers.get('X-Batch-Seq'), rows_from_frame, request.data)]
+        else:
+            raw = request.data.get('batches') if isinstance(request.data, dict) else None
+            if not isinstance(raw, list) or not raw:
+                return Response({'ok': False, 'error': 'Falta la lista batches'}, status=400)
+            batches = [
+                (b.get('seq') if isinstance(b, dict) else None, rows_from_json, b.get('rows') if isinstance(b, dict) else None)
+                for b in raw
+            ]
+
+        acks = []
+        for seq, decode, payload in batches:
+            try:
+                seq = int(seq)
+                if seq <= 0:
+                    raise ValueError
+            except (TypeError, ValueError):
+                acks.append({'seq': seq, 'ok': False, 'error': 'seq debe ser un entero positivo'})
+                continue
+            try:
+                acks.append(write_batch(session.id, seq, decode(payload)))
+            except IngestError as e:
+                acks.append({'seq': seq, 'ok': False, 'error': str(e)})
+        ok = all(a['ok'] for a in acks)
+        return Response({'ok': ok, 'acks': acks}, status=200 if ok else 207)
+
+
+class EEGSessionCloseView(APIView):
+    """POST to end a session: sets ended_at (optional `ended_at` in the body, epoch
+    seconds or ISO 8601; defaults to now), the dominant emotion and its summary."""
+    permission_classes = [IsStaffOrProfessional]
+
+    def post(self, request, session_id):
+        ended_at = request.data.get('ended_at') if isinstance(request.data, dict) else None
+        try:
+            ended_at = parse_timestamp(ended_at) if ended_at is not None else None
+        except IngestError as e:
+            return Response({'ok': False, 'error': str(e)}, status=400)
+        with transaction.atomic():
+            # Row lock: batches still being written finish first or see the session closed
+            session = EEGSession.objects.select_for_update().filter(id=session_id).first()
+            if session is None:
+                return Response({'ok': False, 'error': 'Sesión no encontrada'}, status=404)
+            if session.ended_at is not None:
+                return Response({'ok': False, 'error': 'La sesión ya fue cerrada'}, status=409)
+            summary = close_session(session, ended_at)
+        return Response({
+            'ok': True,
+            'dominant_emotion': session.dominant_emotion,
+            'reading_count': summary.reading_count,
+        })
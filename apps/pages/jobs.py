@@ -0,0 +1,152 @@
+"""DB-backed background jobs for slow AI work (vector-store builds, summaries).
+
+Views call `enqueue()` and return immediately; `python manage.py run_worker`
+claims queued rows and runs the registered handler for each `Job.kind`.
+The frontend polls `report_sessions_job_status` until the job finishes.
+"""
+import logging
+import traceback
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .models import Job, PatientAIThread, ConsultationAttachment
+from .ai import openai_client, ensure_patient_vector_store, generate_thread_summary, upload_attachments
+from .utils.report_pdf import ensure_summary_pdf
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register `func(job)` as the handler for jobs of `kind`.
+
+    The handler's return value (JSON-serializable) is stored in `Job.result`.
+    """
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, payload=None, thread=None, user=None):
+    """Queue a job, reusing a pending one of the same kind for the same thread."""
+    if thread is not None:
+        pending = Job.objects.filter(kind=kind, thread=thread, status__in=('queued', 'running')).first()
+        if pending:
+            return pending
+    return Job.objects.create(kind=kind, payload=payload or {}, thread=thread, created_by=user)
+
+
+async def aenqueue(kind, payload=None, thread=None, user=None):
+    """Async counterpart of enqueue (for the ASGI views)."""
+    if thread is not None:
+        pending = await Job.objects.filter(kind=kind, thread=thread, status__in=('queued', 'running')).afirst()
+        if pending:
+            return pending
+    return await Job.objects.acreate(kind=kind, payload=payload or {}, thread=thread, created_by=user)
+
+
+def claim(job_id, worker=''):
+    """Atomically move a queued job to running.
+
+    False if another worker got it first, or if another job of the same thread
+    is running (the pages_job_one_running_per_thread constraint); the job then
+    stays queued for a later poll.
+    """
+    try:
+        with transaction.atomic():
+            return bool(Job.objects.filter(id=job_id, status='queued').update(
+                status='running', worker=worker, started_at=timezone.now(),
+            ))
+    except IntegrityError:
+        return False
+
+
+def next_job_ids(limit):
+    """Oldest queued jobs, skipping threads that already have a job running."""
+    busy = Job.objects.filter(thread=OuterRef('thread'), status='running')
+    return list(
+        Job.objects.filter(status='queued').exclude(Exists(busy))
+        .order_by('created_at', 'id').values_list('id', flat=True)[:limit]
+    )
+
+
+def run_job(job_id):
+    """Run an already-claimed job and record its outcome."""
+    job = Job.objects.select_related('thread__professional', 'thread__patient').get(id=job_id)
+    job.attempts += 1
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f'Tipo de tarea desconocido: {job.kind}')
+        job.result = handler(job)
+        job.status = 'done'
+        job.error = ''
+    except Exception as e:
+        logger.error('[jobs] job=%s kind=%s failed: %s\n%s', job.id, job.kind, e, traceback.format_exc())
+        job.status = 'failed'
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['attempts', 'result', 'status', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale(minutes):
+    """Return 'running' jobs older than `minutes` (e.g. a killed worker) to the queue."""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return Job.objects.filter(status='running', started_at__lt=cutoff).update(status='queued', worker='')
+
+
+def _require_client():
+    client = openai_client()
+    if not client:
+        raise RuntimeError('Falta OPENAI_API_KEY')
+    return client
+
+
+def _job_thread(job) -> PatientAIThread:
+    if not job.thread_id:
+        raise ValueError('La tarea no tiene un hilo asociado')
+    return job.thread
+
+
+@job_handler('vector_store')
+def build_vector_store(job):
+    thread = _job_thread(job)
+    vs_id = ensure_patient_vector_store(_require_client(), thread, thread.professional, thread.patient)
+    return {'vector_store_id': vs_id}
+
+
+def report_progress(job, **progress):
+    """Expose intermediate progress in `Job.result` while the job is running."""
+    Job.objects.filter(id=job.id).update(result=progress)
+
+
+@job_handler('reupload')
+def reupload_attachments(job):
+    client = _require_client()
+    atts = ConsultationAttachment.objects.filter(id__in=job.payload.get('attachment_ids', []))
+    uploaded, errors = upload_attachments(
+        client, atts, progress=lambda done, total: report_progress(job, done=done, total=total),
+    )
+    result = {'uploaded': len(uploaded), 'total': len(uploaded) + len(errors), 'errors': errors}
+    if job.thread_id:
+        # Re-index so the newly uploaded files are searchable
+        thread = job.thread
+        result['vector_store_id'] = ensure_patient_vector_store(client, thread, thread.professional, thread.patient)
+    return result
+
+
+@job_handler('summary')
+def build_summary(job):
+    thread = _job_thread(job)
+    content = generate_thread_summary(_require_client(), thread, rebuild=bool(job.payload.get('rebuild')))
+    if content:
+        # Render the PDF now so the first download is served from the cache
+        try:
+            ensure_summary_pdf(thread)
+        except Exception as e:
+            logger.warning('[jobs] summary PDF precompute failed for thread=%s: %s', thread.id, e)
+    return {'generated': bool(content)}
@@ -0,0 +1,119 @@
+import time
+from datetime import timedelta
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Avg
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from apps.pages.models import Patient, EEGSession, EEGReading
+from apps.pages.utils.eeg_ingest import EMOTION_CODES, write_batch
+from apps.pages.utils.eeg_summary import summarize_missing
+from apps.pages import views
+
+# Isolated cache, so anything cached for the rolled-back sessions never leaks
+BENCH_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-eeg'}}
+
+
+def _legacy_stats(sessions):
+    """Per-session Avg over the readings, as eeg_stats computed them before EEGSessionSummary."""
+    for s in sessions[:20]:
+        EEGReading.objects.filter(session=s).aggregate(
+            delta=Avg('delta'), theta=Avg('theta'),
+            alpha=Avg('alpha'), beta=Avg('beta'), gamma=Avg('gamma'),
+            attention=Avg('attention'), meditation=Avg('meditation'),
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the EEG report on synthetic readings (default 10 million; data is rolled back). "
+        "Seeding uses COPY on PostgreSQL; on SQLite use a smaller --readings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readings', type=int, default=10_000_000, help='Total synthetic readings')
+        parser.add_argument('--sessions', type=int, default=20, help='Sessions the readings are spread over')
+        parser.add_argument('--hz', type=float, default=10.0, help='Readings per second within a session')
+        parser.add_argument('--batch', type=int, default=10_000, help='Readings per insert batch')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement')
+
+    def handle(self, *args, **options):
+        with override_settings(CACHES=BENCH_CACHES), transaction.atomic():
+            user, sessions = self._seed(options)
+            self._measure('legacy per-session Avg (20 sessions)', _legacy_stats, sessions, repeat=options['repeat'])
+
+            request = RequestFactory().get('/report/eeg/')
+            request.user = user
+            # Cold: sessions closed by the desktop app, not yet summarized by the
+            # worker; the page aggregates them on every view and stores nothing
+            self._measure('eeg_stats cold (no stored summaries)', views.eeg_stats, request, repeat=options['repeat'])
+            self._measure('summarize_missing (worker backfill)',
+                          lambda: summarize_missing(limit=len(sessions)), repeat=1)
+            self._measure('eeg_stats warm (stored summaries)', views.eeg_stats, request, repeat=options['repeat'])
+
+            session = sessions[len(sessions) // 2]
+            start = session.started_at + (session.ended_at - session.started_at) / 2
+            end = start + timedelta(minutes=1)
+            self._measure('readings_between (1 min window)',
+                          lambda: len(session.readings_between(start, end)), repeat=options['repeat'])
+            self._explain(session.readings_between(start, end))
+            transaction.set_rollback(True)
+
+    def _seed(self, options):
+        user = User.objects.create(username=f'bench-eeg-{time.time_ns()}', is_staff=True)
+        patient = Patient.objects.create(first_name='Bench', last_name='EEG')
+        per_session = max(1, options['readings'] // options['sessions'])
+        duration = timedelta(seconds=per_session / options['hz'])
+        first = timezone.now() - (duration + timedelta(days=1)) * options['sessions']
+        rng = np.random.default_rng(0)
+        labels = np.array([EMOTION_CODES[c] for c in sorted(EMOTION_CODES)], dtype=object)
+        sessions = []
+        t0 = time.perf_counter()
+        for i in range(options['sessions']):
+            started = first + (duration + timedelta(days=1)) * i
+            session = EEGSession.objects.create(patient=patient, started_at=started, operator_name='bench')
+            for seq, lo in enumerate(range(0, per_session, options['batch']), start=1):
+                n = min(options['batch'], per_session - lo)
+                offsets = (lo + np.arange(n)) / options['hz']
+                bands = rng.lognormal(10, 1, size=(n, 5)).round(1)
+                rows = zip(
+                    [started + timedelta(seconds=o) for o in offsets.tolist()],
+                    rng.integers(0, 101, n).tolist(), rng.integers(0, 101, n).tolist(),
+                    *bands.T.tolist(),
+                    labels[rng.integers(0, len(labels), n)].tolist(), rng.random(n).round(3).tolist(),
+                )
+                write_batch(session.id, seq, list(rows))
+            session.ended_at = started + duration
+            session.save(update_fields=['ended_at'])
+            sessions.append(session)
+            self.stdout.write(f"  seeded session {i + 1}/{options['sessions']} ({per_session} readings)")
+        self.stdout.write(
+            f"Seeded {per_session * len(sessions)} readings in {len(sessions)} sessions "
+            f"({time.perf_counter() - t0:.1f} s)."
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE "{EEGReading._meta.db_table}"')
+        sessions.sort(key=lambda s: s.started_at, reverse=True)
+        return user, sessions
+
+    def _measure(self, label, fn, *args, repeat=3):
+        timings = []
+        for _ in range(max(1, repeat)):
+            with CaptureQueriesContext(connection) as queries:
+                t0 = time.perf_counter()
+                fn(*args)
+                timings.append(time.perf_counter() - t0)
+        self.stdout.write(
+            f"{label:<42} best {min(timings) * 1000:9.1f} ms  "
+            f"median {sorted(timings)[len(timings) // 2] * 1000:9.1f} ms  ({len(queries)} queries)"
+        )
+
+    def _explain(self, queryset):
+        plan = queryset.explain()
+        self.stdout.write('readings_between plan:')
+        for line in plan.splitlines()[:6]:
+            self.stdout.write(f"  {line}")
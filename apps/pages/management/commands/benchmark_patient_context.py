@@ -0,0 +1,88 @@
+import time
+from datetime import date, time as dtime, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from apps.pages.models import Patient, Professional, Consultation, ConsultationNote, ConsultationAttachment
+from apps.pages.ai import build_patient_context, iter_patient_context
+
+
+def _legacy_context(professional, patient):
+    """Previous implementation (per-consultation scans of the note/attachment lists), for comparison."""
+    cons_qs = Consultation.objects.filter(professional=professional, patient=patient).order_by('date', 'time')
+    note_qs = ConsultationNote.objects.filter(consultation__in=cons_qs).select_related('consultation')
+    att_qs = ConsultationAttachment.objects.filter(consultation__in=cons_qs).select_related('consultation')
+    parts = [f"Paciente: {patient.first_name} {patient.last_name}\n", f"Total de consultas: {cons_qs.count()}\n"]
+    for c in cons_qs:
+        parts.append(f"- Consulta: {c.date} {c.time}, estado={c.get_status_display()}, duración={c.duration} min\n")
+        notes = [n for n in note_qs if n.consultation_id == c.id]
+        if notes:
+            parts.append("  Notas:\n")
+            for n in notes:
+                title = (n.title or '').strip()
+                tshow = f"{title}: " if title else ''
+                parts.append(f"   • {tshow}{(n.content or '').strip()[:500]}\n")
+        atts = [a for a in att_qs if a.consultation_id == c.id]
+        if atts:
+            parts.append("  Adjuntos:\n")
+            for a in atts:
+                parts.append(f"   • {a.get_file_type_display()} - {a.display_name or a.file.name}\n")
+    return ''.join(parts)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the AI patient-context builder on synthetic patients (data is rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=3)
+        parser.add_argument('--consultations', type=int, default=1000, help='Consultations per patient')
+        parser.add_argument('--notes', type=int, default=2, help='Notes per consultation')
+        parser.add_argument('--attachments', type=int, default=1, help='Attachments per consultation')
+        parser.add_argument('--skip-legacy', action='store_true', help='Only time the current builder')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            prof, patients = self._seed(options)
+            for patient in patients:
+                self._measure('current', build_patient_context, prof, patient)
+                self._measure('streamed', lambda pr, pa: sum(len(p) for p in iter_patient_context(pr, pa)), prof, patient)
+                if not options['skip_legacy']:
+                    self._measure('legacy', _legacy_context, prof, patient)
+            transaction.set_rollback(True)
+
+    def _seed(self, options):
+        prof = Professional.objects.create(first_name='Bench', last_name='Prof', role='psychologist')
+        patients = []
+        start = date(2000, 1, 1)
+        for i in range(options['patients']):
+            patient = Patient.objects.create(first_name='Bench', last_name=f'Paciente {i}', professional=prof)
+            cons = Consultation.objects.bulk_create([
+                Consultation(patient=patient, professional=prof, consultory='1',
+                             date=start + timedelta(days=d), time=dtime(9), status='completed')
+                for d in range(options['consultations'])
+            ], batch_size=500)
+            if connection.features.can_return_rows_from_bulk_insert is False:
+                cons = list(Consultation.objects.filter(patient=patient))
+            ConsultationNote.objects.bulk_create([
+                ConsultationNote(consultation=c, title=f'Nota {n}', content='Observaciones de la sesión. ' * 20)
+                for c in cons for n in range(options['notes'])
+            ], batch_size=500)
+            ConsultationAttachment.objects.bulk_create([
+                ConsultationAttachment(consultation=c, file_type='examenes', file=f'bench/{c.id}_{a}.pdf',
+                                       display_name=f'examen_{a}.pdf')
+                for c in cons for a in range(options['attachments'])
+            ], batch_size=500)
+            patients.append(patient)
+        self.stdout.write(
+            f"Seeded {len(patients)} patient(s) x {options['consultations']} consultations "
+            f"({options['notes']} notes, {options['attachments']} attachments each)."
+        )
+        return prof, patients
+
+    def _measure(self, label, builder, prof, patient):
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            out = builder(prof, patient)
+            elapsed = time.perf_counter() - t0
+        size = out if isinstance(out, int) else len(out)
+        self.stdout.write(f"{patient.last_name:>14} {label:>8}: {elapsed * 1000:9.1f} ms  {len(ctx.captured_queries):4d} queries  {size} chars")
@@ -0,0 +1,52 @@
+import asyncio
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent chat turns at a running server and report whether they overlap "
+        "or serialize. Use one AI thread per request (turns on one thread are serialized "
+        "by design). Authenticate with a logged-in browser's sessionid/csrftoken cookies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--path', default='/report/sessions/chat/',
+                            help='Chat endpoint (the /stream/ variant is read to the end)')
+        parser.add_argument('--sessionid', required=True)
+        parser.add_argument('--csrftoken', required=True)
+        parser.add_argument('--thread', dest='threads', type=int, action='append', required=True,
+                            help='PatientAIThread id; repeat for each concurrent request')
+        parser.add_argument('--message', default='Resume en una frase la última sesión.')
+        parser.add_argument('--timeout', type=float, default=180.0)
+
+    def handle(self, *args, **options):
+        try:
+            import httpx
+        except ImportError:
+            raise CommandError('httpx is required (installed with the openai package)')
+        results, wall = asyncio.run(self._run(httpx, options))
+        for thread_id, status, elapsed in results:
+            self.stdout.write(f"thread {thread_id:>6}: HTTP {status}  {elapsed:7.2f} s")
+        latencies = [elapsed for _, _, elapsed in results]
+        total, longest = sum(latencies), max(latencies)
+        self.stdout.write(f"wall {wall:.2f} s | slowest {longest:.2f} s | sum {total:.2f} s")
+        # Overlapping requests finish in about the slowest one; serialized ones in about the sum
+        verdict = 'concurrent' if wall < (longest + total) / 2 else 'serialized'
+        self.stdout.write(self.style.SUCCESS(f"Requests ran {verdict}."))
+
+    async def _run(self, httpx, options):
+        cookies = {'sessionid': options['sessionid'], 'csrftoken': options['csrftoken']}
+        headers = {'X-CSRFToken': options['csrftoken'], 'Referer': options['base_url']}
+        async with httpx.AsyncClient(base_url=options['base_url'], cookies=cookies, headers=headers,
+                                     timeout=options['timeout']) as client:
+            async def one(thread_id):
+                t0 = time.perf_counter()
+                resp = await client.post(options['path'], data={'thread_id': thread_id, 'message': options['message']})
+                await resp.aread()
+                return thread_id, resp.status_code, time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            results = await asyncio.gather(*(one(t) for t in options['threads']))
+            return results, time.perf_counter() - t0
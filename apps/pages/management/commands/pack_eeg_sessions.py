@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from apps.pages.models import EEGSession
+from apps.pages.utils.eeg_store import CHUNK_SECONDS, pack_session
+from apps.pages.utils.eeg_summary import summarize_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert ended EEG sessions from one EEGReading row per reading to packed "
+        "EEGReadingChunk blobs. Summaries are stored first, so reports are unaffected."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', dest='sessions', type=int, action='append',
+                            help='Only this session id; repeatable')
+        parser.add_argument('--chunk-seconds', type=int, default=CHUNK_SECONDS,
+                            help='Recording time covered by each chunk')
+        parser.add_argument('--limit', type=int, help='Convert at most this many sessions')
+
+    def handle(self, *args, **options):
+        # The summary is joined so finding the sessions without one costs no extra query
+        qs = EEGSession.objects.filter(ended_at__isnull=False, storage='rows').select_related('summary').order_by('id')
+        if options['sessions']:
+            qs = qs.filter(id__in=options['sessions'])
+        if options['limit']:
+            qs = qs[:options['limit']]
+        sessions = list(qs)
+        missing = [s.id for s in sessions if not hasattr(s, 'summary')]
+        if missing:
+            summarize_sessions(missing)
+
+        total_readings = total_bytes = 0
+        for session in sessions:
+            try:
+                readings, chunks, size = pack_session(session, chunk_seconds=max(1, options['chunk_seconds']))
+            except ValueError as e:
+                self.stderr.write(f"session {session.id}: {e}")
+                continue
+            total_readings += readings
+            total_bytes += size
+            self.stdout.write(f"session {session.id}: {readings} readings -> {chunks} chunk(s), {size} bytes")
+        per_reading = total_bytes / total_readings if total_readings else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Packed {total_readings} readings into {total_bytes} bytes ({per_reading:.1f} bytes/reading)."
+        ))
@@ -0,0 +1,145 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.utils import DatabaseError
+from django.utils import timezone
+from apps.pages.models import EEGReading
+
+TABLE = EEGReading._meta.db_table
+COLUMNS = [f.column for f in EEGReading._meta.concrete_fields]
+
+
+def _month_start(d):
+    return date(d.year, d.month, 1)
+
+
+def _next_month(d):
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def _partition_name(month):
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+class Command(BaseCommand):
+    help = (
+        "PostgreSQL only: manage monthly RANGE partitions of the EEG readings table on "
+        "timestamp. --convert turns the existing table into a partitioned one (copying "
+        "its rows, in one transaction); without it, creates the upcoming months' "
+        "partitions. Schedule it monthly (e.g. cron) after converting."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help='Convert the plain table into a partitioned table (locks it while copying)')
+        parser.add_argument('--months-ahead', type=int, default=3, help='Future monthly partitions to keep ready')
+        parser.add_argument('--status', action='store_true', help='Only list partitions')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning requires PostgreSQL (current database: %s)' % connection.vendor)
+        with connection.cursor() as cursor:
+            partitioned = self._is_partitioned(cursor)
+            if options['status']:
+                return self._status(cursor, partitioned)
+            if options['convert']:
+                if partitioned:
+                    self.stdout.write(f"{TABLE} is already partitioned.")
+                else:
+                    self._convert(cursor, options['months_ahead'])
+            elif not partitioned:
+                raise CommandError(f"{TABLE} is not partitioned; run with --convert first")
+            self._ensure_partitions(cursor, TABLE, _month_start(timezone.now().date()), options['months_ahead'])
+            self._status(cursor, True)
+
+    def _is_partitioned(self, cursor):
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        row = cursor.fetchone()
+        return bool(row) and row[0] == 'p'
+
+    def _create_partition(self, cursor, parent, month):
+        name = _partition_name(month)
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{parent}" '
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{_next_month(month):%Y-%m-%d} 00:00:00+00')"
+        )
+
+    def _ensure_partitions(self, cursor, parent, first_month, months_ahead):
+        month = first_month
+        last = _month_start(timezone.now().date())
+        for _ in range(max(months_ahead, 0)):
+            last = _next_month(last)
+        while month <= last:
+            try:
+                with transaction.atomic():
+                    self._create_partition(cursor, parent, month)
+            except DatabaseError as e:
+                # e.g. rows for that month already sit in the default partition
+                self.stderr.write(f"{_partition_name(month)}: {e}")
+            month = _next_month(month)
+
+    def _convert(self, cursor, months_ahead):
+        new = f"{TABLE}_partitioned"
+        cols = ', '.join(f'"{c}"' for c in COLUMNS)
+        with transaction.atomic():
+            cursor.execute(f'LOCK TABLE "{TABLE}" IN SHARE MODE')
+            # Definitions to recreate on the new table under the same names, so
+            # Django migrations keep finding them
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype IN ('f', 'c')", [TABLE])
+            constraints = cursor.fetchall()
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+                "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u'))",
+                [TABLE, TABLE])
+            indexes = cursor.fetchall()
+            cursor.execute(
+                "SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'", [TABLE])
+            identity = bool(cursor.fetchone()[0])
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+            sequence = cursor.fetchone()[0]
+            cursor.execute(f'SELECT MIN("timestamp"), MAX(id) FROM "{TABLE}"')
+            first_ts, max_id = cursor.fetchone()
+
+            cursor.execute(
+                f'CREATE TABLE "{new}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING IDENTITY) '
+                f'PARTITION BY RANGE ("timestamp")'
+            )
+            # Partition bounds are UTC months; the connection returns UTC datetimes
+            first_month = _month_start((first_ts or timezone.now()).date())
+            self._ensure_partitions(cursor, new, first_month, months_ahead)
+            # Anything outside the monthly ranges (clock errors, far-future rows)
+            cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{new}" DEFAULT')
+            cursor.execute(f'INSERT INTO "{new}" ({cols}) SELECT {cols} FROM "{TABLE}"')
+            copied = cursor.rowcount
+
+            if identity:
+                # LIKE ... INCLUDING IDENTITY starts a fresh sequence
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [new, max_id or 1])
+            elif sequence:
+                # serial: the copied default still uses the old sequence; keep it alive
+                cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY "{new}".id')
+
+            cursor.execute(f'DROP TABLE "{TABLE}"')
+            cursor.execute(f'ALTER TABLE "{new}" RENAME TO "{TABLE}"')
+            # A partitioned table's primary key must include the partition key
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, "timestamp")')
+            for name, definition in constraints:
+                cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+            for _, definition in indexes:
+                cursor.execute(definition)
+            cursor.execute(f'ANALYZE "{TABLE}"')
+        self.stdout.write(self.style.SUCCESS(f"Converted {TABLE} to monthly partitions ({copied} rows copied)."))
+
+    def _status(self, cursor, partitioned):
+        if not partitioned:
+            self.stdout.write(f"{TABLE} is not partitioned.")
+            return
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), GREATEST(c.reltuples, 0)::bigint, "
+            "pg_total_relation_size(c.oid) FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass ORDER BY c.relname", [TABLE])
+        for name, bound, rows, size in cursor.fetchall():
+            self.stdout.write(f"{name:<32} ~{rows:>10} rows {size / 1048576:8.1f} MB  {bound}")
@@ -0,0 +1,79 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.pages import jobs
+from apps.pages.utils.eeg_summary import summarize_missing
+from apps.pages.utils.no_show import SWEEP_INTERVAL, sweep_no_shows
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued background jobs (vector-store builds, AI summaries), sweep no_show "
+        "consultations and store missing EEG session summaries"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Jobs run concurrently')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between queue polls when idle')
+        parser.add_argument('--stale-after', type=int, default=30,
+                            help='Requeue jobs left running for more than this many minutes')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--sweep-interval', type=float, default=SWEEP_INTERVAL,
+                            help='Seconds between sweeps: no_show consultations and missing EEG '
+                                 'session summaries (0 disables)')
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = False
+
+        def stop(signum, frame):
+            self._stopping = True
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        requeued = jobs.requeue_stale(options['stale_after'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+        self.stdout.write(f"Worker {worker_name} started with {threads} thread(s).")
+
+        running = set()
+        processed = 0
+        next_sweep = 0.0
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            while not self._stopping:
+                if options['sweep_interval'] > 0 and time.monotonic() >= next_sweep:
+                    close_old_connections()
+                    expired = sweep_no_shows()
+                    if expired:
+                        self.stdout.write(f"Marked {expired} consultation(s) as no_show.")
+                    summarized = summarize_missing()
+                    if summarized:
+                        self.stdout.write(f"Stored {summarized} EEG session summary(ies).")
+                    next_sweep = time.monotonic() + options['sweep_interval']
+                running = {f for f in running if not f.done()}
+                free = threads - len(running)
+                claimed = []
+                if free > 0:
+                    close_old_connections()
+                    claimed = [jid for jid in jobs.next_job_ids(free) if jobs.claim(jid, worker_name)]
+                for job_id in claimed:
+                    running.add(pool.submit(self._run, job_id))
+                processed += len(claimed)
+                if options['once'] and not claimed and not running:
+                    break
+                if not claimed:
+                    time.sleep(options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after {processed} job(s)."))
+
+    def _run(self, job_id):
+        close_old_connections()
+        try:
+            job = jobs.run_job(job_id)
+            self.stdout.write(f"Job #{job.id} {job.kind}: {job.status}")
+        finally:
+            close_old_connections()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from apps.pages.models import EEGSession
+from apps.pages.utils.eeg_summary import summarize_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Store EEGSessionSummary rows for ended EEG sessions that lack one "
+        "(sessions closed directly by the desktop app). Use --rebuild to recompute all."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute existing summaries too')
+        parser.add_argument('--session', dest='sessions', type=int, action='append',
+                            help='Only this session id; repeatable')
+        parser.add_argument('--batch-size', type=int, default=50, help='Sessions aggregated per query')
+
+    def handle(self, *args, **options):
+        qs = EEGSession.objects.filter(ended_at__isnull=False)
+        if options['sessions']:
+            qs = qs.filter(id__in=options['sessions'])
+        if not options['rebuild']:
+            qs = qs.filter(summary__isnull=True)
+        ids = list(qs.order_by('id').values_list('id', flat=True))
+
+        batch = max(1, options['batch_size'])
+        for i in range(0, len(ids), batch):
+            summarize_sessions(ids[i:i + batch])
+            self.stdout.write(f"{min(i + batch, len(ids))}/{len(ids)}")
+        self.stdout.write(self.style.SUCCESS(f"Summarized {len(ids)} session(s)."))
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.pages.utils.no_show import SWEEP_INTERVAL, sweep_no_shows
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark pending consultations whose time has passed as no_show. Run from cron, "
+        "or with --loop as a long-lived process (run_worker also sweeps periodically)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping every --interval seconds')
+        parser.add_argument('--interval', type=float, default=SWEEP_INTERVAL, help='Seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            expired = sweep_no_shows()
+            if expired or not options['loop']:
+                self.stdout.write(f"Marked {expired} consultation(s) as no_show.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
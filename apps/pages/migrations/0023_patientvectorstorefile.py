@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-17 20:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0022_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientVectorStoreFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_key', models.CharField(max_length=50)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('openai_file_id', models.CharField(max_length=200)),
+                ('owns_file', models.BooleanField(default=True)),
+                ('indexed_at', models.DateTimeField(auto_now_add=True)),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indexed_files', to='pages.patientaithread')),
+            ],
+            options={
+                'unique_together': {('thread', 'source_key')},
+            },
+        ),
+    ]
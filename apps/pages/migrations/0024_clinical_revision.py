@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-17 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0023_patientvectorstorefile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='clinical_revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='patientaithread',
+            name='context_revision',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-17 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0024_clinical_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eegsession',
+            name='ingest_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.9 on 2026-10-17 20:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0025_eegsession_ingest_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EEGSessionSummary',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='pages.eegsession')),
+                ('reading_count', models.IntegerField(default=0)),
+                ('delta_mean', models.FloatField(blank=True, null=True)),
+                ('delta_min', models.FloatField(blank=True, null=True)),
+                ('delta_max', models.FloatField(blank=True, null=True)),
+                ('delta_std', models.FloatField(blank=True, null=True)),
+                ('theta_mean', models.FloatField(blank=True, null=True)),
+                ('theta_min', models.FloatField(blank=True, null=True)),
+                ('theta_max', models.FloatField(blank=True, null=True)),
+                ('theta_std', models.FloatField(blank=True, null=True)),
+                ('alpha_mean', models.FloatField(blank=True, null=True)),
+                ('alpha_min', models.FloatField(blank=True, null=True)),
+                ('alpha_max', models.FloatField(blank=True, null=True)),
+                ('alpha_std', models.FloatField(blank=True, null=True)),
+                ('beta_mean', models.FloatField(blank=True, null=True)),
+                ('beta_min', models.FloatField(blank=True, null=True)),
+                ('beta_max', models.FloatField(blank=True, null=True)),
+                ('beta_std', models.FloatField(blank=True, null=True)),
+                ('gamma_mean', models.FloatField(blank=True, null=True)),
+                ('gamma_min', models.FloatField(blank=True, null=True)),
+                ('gamma_max', models.FloatField(blank=True, null=True)),
+                ('gamma_std', models.FloatField(blank=True, null=True)),
+                ('attention_mean', models.FloatField(blank=True, null=True)),
+                ('attention_min', models.FloatField(blank=True, null=True)),
+                ('attention_max', models.FloatField(blank=True, null=True)),
+                ('attention_std', models.FloatField(blank=True, null=True)),
+                ('meditation_mean', models.FloatField(blank=True, null=True)),
+                ('meditation_min', models.FloatField(blank=True, null=True)),
+                ('meditation_max', models.FloatField(blank=True, null=True)),
+                ('meditation_std', models.FloatField(blank=True, null=True)),
+                ('emotion_histogram', models.JSONField(blank=True, default=dict)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de sesión EEG',
+                'verbose_name_plural': 'Resúmenes de sesiones EEG',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0026_eegsessionsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eegsession',
+            name='storage',
+            field=models.CharField(choices=[('rows', 'Filas'), ('chunks', 'Bloques')], default='rows', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='EEGReadingChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.IntegerField()),
+                ('start_at', models.DateTimeField()),
+                ('end_at', models.DateTimeField()),
+                ('count', models.IntegerField()),
+                ('data', models.BinaryField()),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='pages.eegsession')),
+            ],
+            options={
+                'verbose_name': 'Bloque de lecturas EEG',
+                'verbose_name_plural': 'Bloques de lecturas EEG',
+                'ordering': ['session', 'seq'],
+                'unique_together': {('session', 'seq')},
+            },
+        ),
+    ]
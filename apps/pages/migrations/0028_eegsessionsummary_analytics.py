@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0027_eegreadingchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eegsessionsummary',
+            name='analytics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0028_eegsessionsummary_analytics'),
+    ]
+
+    operations = [
+        # Build the composite index before dropping the FK's own one
+        migrations.AddIndex(
+            model_name='eegreading',
+            index=models.Index(fields=['session', 'timestamp'], name='pages_eegre_session_9f68d3_idx'),
+        ),
+        migrations.AlterField(
+            model_name='eegreading',
+            name='session',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='pages.eegsession'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0029_eegreading_session_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(fields=['status', 'date', 'time'], name='pages_consu_status_3ff0d5_idx'),
+        ),
+    ]
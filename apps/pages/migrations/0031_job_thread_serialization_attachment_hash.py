@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:25
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def requeue_concurrent_jobs(apps, schema_editor):
+    # Keep the newest running job per thread; the others go back to the queue
+    Job = apps.get_model('pages', 'Job')
+    keep = (Job.objects.filter(status='running', thread__isnull=False)
+            .values('thread').annotate(last=Max('id')).values_list('last', flat=True))
+    Job.objects.filter(status='running', thread__isnull=False).exclude(id__in=list(keep)).update(
+        status='queued', worker='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0030_consultation_status_date_time_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(requeue_concurrent_jobs, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='consultationattachment',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'running')), fields=('thread',), name='pages_job_one_running_per_thread'),
+        ),
+    ]
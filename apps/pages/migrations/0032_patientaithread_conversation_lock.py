@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0031_job_thread_serialization_attachment_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientaithread',
+            name='turn_owner',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='patientaithread',
+            name='turn_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def record_accepted_seqs(apps, schema_editor):
+    # ingest_seq was a high-water mark: every seq up to it counted as written,
+    # so open sessions keep treating those seqs as duplicates
+    EEGSession = apps.get_model('pages', 'EEGSession')
+    EEGIngestBatch = apps.get_model('pages', 'EEGIngestBatch')
+    for session_id, last in EEGSession.objects.filter(ended_at__isnull=True, ingest_seq__gt=0).values_list('id', 'ingest_seq'):
+        EEGIngestBatch.objects.bulk_create(
+            [EEGIngestBatch(session_id=session_id, seq=seq) for seq in range(1, last + 1)],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0032_patientaithread_conversation_lock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EEGIngestBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField()),
+                ('rows', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingest_batches', to='pages.eegsession')),
+            ],
+            options={
+                'verbose_name': 'Lote EEG recibido',
+                'verbose_name_plural': 'Lotes EEG recibidos',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='eegingestbatch',
+            constraint=models.UniqueConstraint(fields=('session', 'seq'), name='pages_eeg_ingest_batch_unique_seq'),
+        ),
+        migrations.RunPython(record_accepted_seqs, migrations.RunPython.noop),
+    ]
@@ -36,6 +36,8 @@ class Patient(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     professional = models.ForeignKey('Professional', on_delete=models.SET_NULL, blank=True, null=True, related_name='patients')
     color = models.CharField(max_length=7, blank=True, default='', help_text="Hex color (#RRGGBB) for calendar display")
+    # Bumped (see signals.py) on every change to the patient's consultations, notes or attachments
+    clinical_revision = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -107,6 +109,12 @@ class Consultation(models.Model):
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
 
+    class Meta:
+        indexes = [
+            # no_show sweeper: pending rows up to now (utils.no_show)
+            models.Index(fields=['status', 'date', 'time']),
+        ]
+
     def __str__(self):
         return f"{self.patient} - {self.date} {self.time}"
 
@@ -162,6 +170,9 @@ class ConsultationAttachment(models.Model):
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='consultation_attachments')
     # OpenAI Files API id to allow the model to access the attachment
     openai_file_id = models.CharField(max_length=200, blank=True, null=True)
+    # SHA-256 of the file, filled by the vector-store sync (ai._attachment_hash);
+    # cleared whenever a new file is assigned
+    content_hash = models.CharField(max_length=64, blank=True, default='')
 
     class Meta:
         ordering = ['-uploaded_at']
@@ -169,10 +180,17 @@ class ConsultationAttachment(models.Model):
     def __str__(self):
         return f"Adjunto #{self.id} - {self.file_type}"
 
+    def _file_replaced(self):
+        # FieldFile.save() stores the new file before the row is saved
+        stored = ConsultationAttachment.objects.filter(pk=self.pk).values_list('file', flat=True).first()
+        return self.pk is not None and stored != self.file.name
+
     def save(self, *args, **kwargs):
         # If no display name, fallback to file base name
         if not self.display_name and self.file:
             self.display_name = str(self.file.name).split('/')[-1]
+        if self.content_hash and self.file and (not self.file._committed or self._file_replaced()):
+            self.content_hash = ''
         super().save(*args, **kwargs)
 
 
@@ -256,11 +274,17 @@ class PatientAIThread(models.Model):
     openai_conversation_id = models.CharField(max_length=200, blank=True, default='')
     # OpenAI Vector Store — per-patient RAG index (notes + attachments)
     openai_vector_store_id = models.CharField(max_length=200, blank=True, default='')
-    # Tracking which data the context covers to avoid unnecessary re-generation
+    # Patient.clinical_revision the context was built from (None: never built)
+    context_revision = models.PositiveIntegerField(null=True, blank=True)
+    # What the context covers (shown in the report page)
     context_consult_count = models.IntegerField(default=0)
     context_note_count = models.IntegerField(default=0)
     context_attachment_count = models.IntegerField(default=0)
     context_last_consultation = models.ForeignKey('Consultation', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Conversation lock (apps.pages.ai.acquire_conversation): token of the turn
+    # running on the OpenAI conversation, '' when free
+    turn_owner = models.CharField(max_length=32, blank=True, default='')
+    turn_started_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -291,6 +315,71 @@ class PatientAIMessage(models.Model):
         return f"{self.role} msg #{self.id} on thread {self.thread_id}"
 
 
+class PatientVectorStoreFile(models.Model):
+    """One document indexed in a thread's OpenAI Vector Store.
+
+    `source_key` identifies what the document was built from ('patient',
+    'consultation:<id>' or 'attachment:<id>') and `content_hash` its content at
+    upload time, so a sync only uploads/removes what changed.
+    """
+    thread = models.ForeignKey(PatientAIThread, on_delete=models.CASCADE, related_name='indexed_files')
+    source_key = models.CharField(max_length=50)
+    content_hash = models.CharField(max_length=64)
+    openai_file_id = models.CharField(max_length=200)
+    # False for attachment uploads, whose file id belongs to ConsultationAttachment
+    owns_file = models.BooleanField(default=True)
+    indexed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('thread', 'source_key')
+
+    def __str__(self):
+        return f"{self.source_key} on thread {self.thread_id}"
+
+
+# --- Background jobs (DB-backed queue, processed by `manage.py run_worker`) ---
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'En cola'),
+        ('running', 'En proceso'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.IntegerField(default=0)
+    thread = models.ForeignKey(PatientAIThread, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    worker = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            # Jobs of a thread share its vector store and files: run them one at a time
+            models.UniqueConstraint(fields=['thread'], condition=models.Q(status='running'),
+                                    name='pages_job_one_running_per_thread'),
+        ]
+        verbose_name = 'Tarea en segundo plano'
+        verbose_name_plural = 'Tareas en segundo plano'
+
+    @property
+    def is_pending(self):
+        return self.status in ('queued', 'running')
+
+    def __str__(self):
+        return f"Job #{self.id} {self.kind} ({self.status})"
+
+
 # --- EEG Session models (written by EEGDesktopApp, read by web analytics) ---
 class EEGSession(models.Model):
     EMOTION_CHOICES = [
@@ -307,6 +396,16 @@ class EEGSession(models.Model):
     dominant_emotion = models.CharField(max_length=20, choices=EMOTION_CHOICES, blank=True, default='')
     notes = models.TextField(blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Number of batches written through the ingest API (accepted seqs live in
+    # EEGIngestBatch); moves with every write, so it doubles as a data revision
+    ingest_seq = models.BigIntegerField(default=0)
+    # 'rows': one EEGReading per reading; 'chunks': packed into EEGReadingChunk
+    # blobs (ended sessions converted by the pack_eeg_sessions command)
+    STORAGE_CHOICES = [
+        ('rows', 'Filas'),
+        ('chunks', 'Bloques'),
+    ]
+    storage = models.CharField(max_length=10, choices=STORAGE_CHOICES, default='rows')
 
     class Meta:
         ordering = ['-started_at']
@@ -329,12 +428,49 @@ class EEGSession(models.Model):
             return f"{minutes} min {seconds} s"
         return f"{seconds} s"
 
+    def readings_between(self, start=None, end=None):
+        """EEGReading rows with start <= timestamp <= end (either bound optional), in time order.
+
+        Served by the (session, timestamp) index. Packed sessions (storage
+        'chunks') have no rows: use arrays_between for those.
+        """
+        qs = self.readings.all()
+        if start is not None:
+            qs = qs.filter(timestamp__gte=start)
+        if end is not None:
+            qs = qs.filter(timestamp__lte=end)
+        return qs.order_by('timestamp')
+
+    def arrays_between(self, start=None, end=None):
+        """Same time range as NumPy arrays (utils.eeg_store.EEGArrays), for either storage."""
+        from .utils.eeg_store import read_session
+        return read_session(self, start, end)
+
     def __str__(self):
         return f"EEG #{self.id} - {self.patient} ({self.started_at:%Y-%m-%d %H:%M})"
 
 
+class EEGIngestBatch(models.Model):
+    """A batch seq accepted by the ingest API; the unique constraint turns a resent seq into a duplicate."""
+    session = models.ForeignKey(EEGSession, on_delete=models.CASCADE, related_name='ingest_batches')
+    seq = models.BigIntegerField()
+    rows = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'seq'], name='pages_eeg_ingest_batch_unique_seq'),
+        ]
+        verbose_name = 'Lote EEG recibido'
+        verbose_name_plural = 'Lotes EEG recibidos'
+
+    def __str__(self):
+        return f"Batch {self.seq} of EEG #{self.session_id}"
+
+
 class EEGReading(models.Model):
-    session = models.ForeignKey(EEGSession, on_delete=models.CASCADE, related_name='readings')
+    # No single-column index: the (session, timestamp) index below serves session lookups too
+    session = models.ForeignKey(EEGSession, on_delete=models.CASCADE, related_name='readings', db_index=False)
     timestamp = models.DateTimeField()
     attention = models.IntegerField(null=True, blank=True)
     meditation = models.IntegerField(null=True, blank=True)
@@ -348,8 +484,86 @@ class EEGReading(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['session', 'timestamp']),
+        ]
         verbose_name = 'Lectura EEG'
         verbose_name_plural = 'Lecturas EEG'
 
     def __str__(self):
-        return f"Reading #{self.id} @ {self.timestamp:%H:%M:%S} ({self.emotion_label})"
\ No newline at end of file
+        return f"Reading #{self.id} @ {self.timestamp:%H:%M:%S} ({self.emotion_label})"
+
+
+class EEGReadingChunk(models.Model):
+    """A time slice of a session's readings packed as float32 column arrays.
+
+    Layout and reader in utils.eeg_store; about 40 bytes per reading before
+    compression versus a full EEGReading row plus its index entries.
+    """
+    session = models.ForeignKey(EEGSession, on_delete=models.CASCADE, related_name='chunks')
+    seq = models.IntegerField()
+    start_at = models.DateTimeField()
+    end_at = models.DateTimeField()
+    count = models.IntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ['session', 'seq']
+        unique_together = ('session', 'seq')
+        verbose_name = 'Bloque de lecturas EEG'
+        verbose_name_plural = 'Bloques de lecturas EEG'
+
+    def __str__(self):
+        return f"Chunk {self.seq} of EEG #{self.session_id} ({self.count} lecturas)"
+
+
+class EEGSessionSummary(models.Model):
+    """Per-session aggregates of EEGReading, computed once the session has ended.
+
+    Filled by utils.eeg_summary (session close, or the summarize_eeg_sessions
+    command) so report pages never scan the readings table.
+    """
+    METRICS = ('delta', 'theta', 'alpha', 'beta', 'gamma', 'attention', 'meditation')
+
+    session = models.OneToOneField(EEGSession, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    reading_count = models.IntegerField(default=0)
+    delta_mean = models.FloatField(null=True, blank=True)
+    delta_min = models.FloatField(null=True, blank=True)
+    delta_max = models.FloatField(null=True, blank=True)
+    delta_std = models.FloatField(null=True, blank=True)
+    theta_mean = models.FloatField(null=True, blank=True)
+    theta_min = models.FloatField(null=True, blank=True)
+    theta_max = models.FloatField(null=True, blank=True)
+    theta_std = models.FloatField(null=True, blank=True)
+    alpha_mean = models.FloatField(null=True, blank=True)
+    alpha_min = models.FloatField(null=True, blank=True)
+    alpha_max = models.FloatField(null=True, blank=True)
+    alpha_std = models.FloatField(null=True, blank=True)
+    beta_mean = models.FloatField(null=True, blank=True)
+    beta_min = models.FloatField(null=True, blank=True)
+    beta_max = models.FloatField(null=True, blank=True)
+    beta_std = models.FloatField(null=True, blank=True)
+    gamma_mean = models.FloatField(null=True, blank=True)
+    gamma_min = models.FloatField(null=True, blank=True)
+    gamma_max = models.FloatField(null=True, blank=True)
+    gamma_std = models.FloatField(null=True, blank=True)
+    attention_mean = models.FloatField(null=True, blank=True)
+    attention_min = models.FloatField(null=True, blank=True)
+    attention_max = models.FloatField(null=True, blank=True)
+    attention_std = models.FloatField(null=True, blank=True)
+    meditation_mean = models.FloatField(null=True, blank=True)
+    meditation_min = models.FloatField(null=True, blank=True)
+    meditation_max = models.FloatField(null=True, blank=True)
+    meditation_std = models.FloatField(null=True, blank=True)
+    # {'POSITIVE': n, 'NEUTRAL': n, 'NEGATIVE': n}; readings without a label are not counted
+    emotion_histogram = models.JSONField(default=dict, blank=True)
+    # utils.eeg_analytics.compute_analytics() output, stored with the summary
+    analytics = models.JSONField(default=dict, blank=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Resumen de sesión EEG'
+        verbose_name_plural = 'Resúmenes de sesiones EEG'
+
+    def __str__(self):
+        return f"Resumen EEG #{self.session_id} ({self.reading_count} lecturas)"
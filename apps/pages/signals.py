@@ -0,0 +1,39 @@
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Consultation, ConsultationNote, ConsultationAttachment, Patient, Professional, Consultorio
+from .utils.calendar_feed import bump_feed_version
+
+
+@receiver(post_save, sender=Consultation)
+@receiver(post_delete, sender=Consultation)
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+@receiver(post_save, sender=Professional)
+@receiver(post_save, sender=Consultorio)
+@receiver(post_delete, sender=Consultorio)
+def invalidate_calendar_feed(sender, **kwargs):
+    # Events embed patient colour/names and consultorio names, so any of these
+    # changing makes every cached calendar feed stale
+    bump_feed_version()
+
+
+def bump_clinical_revision(patient_id):
+    # Queryset update: no Patient post_save, so calendar feeds stay cached
+    Patient.objects.filter(id=patient_id).update(clinical_revision=F('clinical_revision') + 1)
+
+
+@receiver(post_save, sender=Consultation)
+@receiver(post_delete, sender=Consultation)
+def consultation_changed(sender, instance, **kwargs):
+    bump_clinical_revision(instance.patient_id)
+
+
+@receiver(post_save, sender=ConsultationNote)
+@receiver(post_delete, sender=ConsultationNote)
+@receiver(post_save, sender=ConsultationAttachment)
+@receiver(post_delete, sender=ConsultationAttachment)
+def consultation_record_changed(sender, instance, **kwargs):
+    patient_id = Consultation.objects.filter(id=instance.consultation_id).values_list('patient_id', flat=True).first()
+    if patient_id:
+        bump_clinical_revision(patient_id)
@@ -1,3 +1,635 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from apps.pages.models import Professional, Patient, WeeklyAvailability, AvailabilityException, Consultation, Consultorio
+from apps.pages.models import ConsultationAttachment, ConsultationNote, Job, PatientAIMessage, PatientAIThread
+from apps.pages.models import PatientVectorStoreFile
+from apps.pages.models import EEGReading, EEGSession, EEGSessionSummary
+from apps.pages import ai, async_views, jobs, views
+from apps.pages.utils.availability import AvailabilityIndex, generate_slots_range
+from apps.pages.utils.calendar_feed import feed_cache_key
+from apps.pages.utils.eeg_ingest import IngestError, rows_from_frame, rows_from_json, write_batch
+from apps.pages.utils.eeg_summary import close_session, session_summaries, summarize_missing
+from apps.pages.utils import eeg_analytics
+from apps.pages.utils.no_show import sweep_no_shows
+from apps.pages.utils import eeg_series, report_pdf
+from apps.pages.utils.streaming import streaming_content
 
-# Create your tests here.
+MONDAY = date(2026, 10, 12)
+
+
+def _index(weekly=(), exceptions=(), consultations=(), start=MONDAY, end=MONDAY):
+    index = AvailabilityIndex(None, start, end, load=False)
+    index._ingest(list(weekly), list(exceptions), list(consultations))
+    return index
+
+
+def _weekly(weekday=0, start=time(9), end=time(13), is_closed=False):
+    return WeeklyAvailability(weekday=weekday, start_time=start, end_time=end, is_closed=is_closed)
+
+
+class FreeSlotsTests(SimpleTestCase):
+
+    def test_empty_day_yields_every_step_that_fits(self):
+        slots = _index([_weekly()]).free_slots(MONDAY, 60, 30)
+        self.assertEqual(slots, ['09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '12:00'])
+
+    def test_no_weekly_row_or_closed_day_has_no_slots(self):
+        self.assertEqual(_index().free_slots(MONDAY), [])
+        self.assertEqual(_index([_weekly(is_closed=True)]).free_slots(MONDAY), [])
+        self.assertEqual(_index([_weekly(start=None)]).free_slots(MONDAY), [])
+
+    def test_consultation_blocks_overlapping_slots_but_not_adjacent_ones(self):
+        index = _index([_weekly()], consultations=[(MONDAY, time(10), 60)])
+        # 09:00-10:00 ends exactly when the consultation starts; 11:00 starts when it ends
+        self.assertEqual(index.free_slots(MONDAY, 60, 30), ['09:00', '11:00', '11:30', '12:00'])
+
+    def test_overlapping_consultations_are_merged(self):
+        index = _index([_weekly()], consultations=[
+            (MONDAY, time(11), 30), (MONDAY, time(9, 30), 60), (MONDAY, time(10), 45),
+        ])
+        self.assertEqual(index.occupied[MONDAY], [[570, 645], [660, 690]])
+        self.assertEqual(index.free_slots(MONDAY, 30, 15), ['09:00', '11:30', '11:45', '12:00', '12:15', '12:30'])
+
+    def test_consultation_without_duration_blocks_nothing(self):
+        index = _index([_weekly()], consultations=[(MONDAY, time(10), None)])
+        self.assertIn('10:00', index.free_slots(MONDAY, 60, 60))
+
+    def test_closed_exception_closes_the_day(self):
+        index = _index([_weekly()], exceptions=[AvailabilityException(date=MONDAY, is_closed=True)])
+        self.assertEqual(index.free_slots(MONDAY), [])
+
+    def test_exception_range_blocks_like_a_consultation(self):
+        exception = AvailabilityException(date=MONDAY, start_time=time(9), end_time=time(11, 30))
+        index = _index([_weekly()], exceptions=[exception])
+        self.assertEqual(index.free_slots(MONDAY, 60, 30), ['11:30', '12:00'])
+
+    def test_inverted_exception_range_is_ignored(self):
+        exception = AvailabilityException(date=MONDAY, start_time=time(12), end_time=time(10))
+        index = _index([_weekly()], exceptions=[exception])
+        self.assertEqual(len(index.free_slots(MONDAY, 60, 60)), 4)
+
+    def test_duration_longer_than_the_window(self):
+        self.assertEqual(_index([_weekly()]).free_slots(MONDAY, 300, 30), [])
+
+    def test_range_covers_each_day_with_its_own_weekday(self):
+        tuesday = MONDAY + timedelta(days=1)
+        index = _index([_weekly(0), _weekly(1, time(15), time(16))], start=MONDAY, end=MONDAY + timedelta(days=2))
+        slots = index.free_slots_range(60, 30)
+        self.assertEqual(list(slots), [MONDAY, tuesday, tuesday + timedelta(days=1)])
+        self.assertEqual(slots[tuesday], ['15:00'])
+        self.assertEqual(slots[tuesday + timedelta(days=1)], [])
+
+
+class AvailabilityIndexQueryTests(TestCase):
+
+    def test_range_loads_in_three_queries(self):
+        professional = Professional.objects.create(first_name='Ana', last_name='Paz', role='psychologist')
+        patient = Patient.objects.create(first_name='Luis', last_name='Rojas')
+        for weekday in range(7):
+            WeeklyAvailability.objects.create(professional=professional, weekday=weekday,
+                                              start_time=time(9), end_time=time(12))
+        Consultation.objects.create(patient=patient, professional=professional, consultory='1',
+                                    date=MONDAY, time=time(9), duration=60)
+        with self.assertNumQueries(3):
+            slots = generate_slots_range(professional, MONDAY, MONDAY + timedelta(days=30))
+        self.assertEqual(len(slots), 31)
+        self.assertEqual(slots[MONDAY], ['10:00', '10:30', '11:00'])
+        self.assertEqual(slots[MONDAY + timedelta(days=7)][0], '09:00')
+
+
+class StreamingContentTests(SimpleTestCase):
+
+    def test_sync_iterator_is_kept_under_wsgi(self):
+        rows = iter(['a', 'b'])
+        self.assertIs(streaming_content(RequestFactory().get('/'), rows), rows)
+
+    def test_asgi_gets_an_async_iterator_pulled_in_batches(self):
+        pulled = []
+
+        def rows():
+            for i in range(5):
+                pulled.append(i)
+                yield str(i)
+
+        async def consume(body):
+            seen = []
+            async for item in body:
+                # Only the current batch has been read from the sync iterator
+                seen.append((item, len(pulled)))
+            return seen
+
+        body = streaming_content(AsyncRequestFactory().get('/'), rows(), batch=2)
+        self.assertTrue(hasattr(body, '__aiter__'))
+        seen = async_to_sync(consume)(body)
+        self.assertEqual([item for item, _ in seen], ['0', '1', '2', '3', '4'])
+        self.assertEqual([n for _, n in seen], [2, 2, 4, 4, 5])
+
+
+class ConsultoriosCalendarPageTests(TestCase):
+
+    def test_page_queries_do_not_grow_with_the_consultations(self):
+        self.client.force_login(User.objects.create_user('admin', password='x', is_staff=True))
+        consultorio = Consultorio.objects.create(name='Sala 1')
+        url = reverse('consultorios_calendar')
+        with CaptureQueriesContext(connection) as empty:
+            self.client.get(url, {'mode': 'week', 'date': MONDAY.isoformat(), 'consultorio': consultorio.id})
+        professional, patient = _people()
+        for day in range(5):
+            for hour in range(8, 18):
+                Consultation.objects.create(patient=patient, professional=professional, consultory='Sala 1',
+                                            consultorio_fk=consultorio, date=MONDAY + timedelta(days=day),
+                                            time=time(hour))
+        for mode in ('day', 'week', 'month'):
+            with CaptureQueriesContext(connection) as busy:
+                response = self.client.get(url, {'mode': mode, 'date': MONDAY.isoformat(), 'consultorio': consultorio.id})
+            self.assertEqual(response.status_code, 200)
+            # The events are loaded by FullCalendar from calendar_events_api, not here
+            self.assertEqual(len(busy), len(empty))
+
+
+class DownsamplingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.t = np.arange(10000, dtype=float) * 100
+        self.y = np.sin(np.arange(10000) / 300)
+        self.y[4321], self.y[7654] = 50.0, -50.0
+
+    def test_both_methods_keep_the_ends_and_the_extremes(self):
+        for method, pick in eeg_series.DOWNSAMPLERS.items():
+            with self.subTest(method=method):
+                idx = pick(self.t, self.y, 100)
+                self.assertLessEqual(len(idx), 100)
+                self.assertTrue((np.diff(idx) > 0).all())
+                self.assertEqual((idx[0], idx[-1]), (0, 9999))
+                self.assertIn(4321, idx)
+                self.assertIn(7654, idx)
+
+    def test_short_series_are_returned_whole(self):
+        for pick in eeg_series.DOWNSAMPLERS.values():
+            self.assertEqual(list(pick(self.t[:50], self.y[:50], 100)), list(range(50)))
+
+    def test_missing_values_are_skipped_per_metric(self):
+        values = np.column_stack([self.y] * len(eeg_series.METRICS))
+        values[:5000, 0] = np.nan
+        series = eeg_series.downsample(self.t, values, 100, 'minmax')
+        self.assertEqual(series['attention'][0][0], 500000)
+        self.assertEqual(series['meditation'][0][0], 0)
+        self.assertLessEqual(max(len(points) for points in series.values()), 100)
+
+
+SHARED_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_cache'}}
+
+
+class CalendarFeedCacheTests(TestCase):
+
+    def test_feeds_are_not_cached_on_a_per_process_backend(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertIsNone(feed_cache_key('all', '', None, None, []))
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_no_show_sweep_invalidates_feeds_on_a_shared_backend(self):
+        call_command('createcachetable', verbosity=0)
+        professional = Professional.objects.create(first_name='Ana', last_name='Paz', role='psychologist')
+        patient = Patient.objects.create(first_name='Luis', last_name='Rojas')
+        Consultation.objects.create(patient=patient, professional=professional, consultory='1',
+                                    date=MONDAY, time=time(9), duration=60)
+        before = feed_cache_key('all', '', None, None, [])
+        self.assertIsNotNone(before)
+        self.assertEqual(sweep_no_shows(), 1)
+        self.assertNotEqual(feed_cache_key('all', '', None, None, []), before)
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_deleting_a_consultorio_invalidates_feeds(self):
+        # Its consultations are detached by SET_NULL, an UPDATE without post_save
+        call_command('createcachetable', verbosity=0)
+        consultorio = Consultorio.objects.create(name='Sala 1')
+        before = feed_cache_key('all', '', None, None, [])
+        consultorio.delete()
+        self.assertNotEqual(feed_cache_key('all', '', None, None, []), before)
+
+    def test_no_show_sweep_bumps_the_patients_clinical_revision(self):
+        professional = Professional.objects.create(first_name='Ana', last_name='Paz', role='psychologist')
+        patient = Patient.objects.create(first_name='Luis', last_name='Rojas')
+        other = Patient.objects.create(first_name='Eva', last_name='Soto')
+        for hour in (9, 10):
+            Consultation.objects.create(patient=patient, professional=professional, consultory='1',
+                                        date=MONDAY, time=time(hour), duration=60)
+        Consultation.objects.create(patient=other, professional=professional, consultory='1',
+                                    date=MONDAY + timedelta(days=30), time=time(9), duration=60)
+        revisions = dict(Patient.objects.values_list('id', 'clinical_revision'))
+        self.assertEqual(sweep_no_shows(now=datetime(2026, 10, 14, 12, tzinfo=dt_timezone.utc)), 2)
+        # Once per patient, and only for patients with an expired consultation
+        self.assertEqual(Patient.objects.get(id=patient.id).clinical_revision, revisions[patient.id] + 1)
+        self.assertEqual(Patient.objects.get(id=other.id).clinical_revision, revisions[other.id])
+
+
+def _people():
+    professional = Professional.objects.create(first_name='Ana', last_name='Paz', role='psychologist')
+    patient = Patient.objects.create(first_name='Luis', last_name='Rojas')
+    return professional, patient
+
+
+class JobSerializationTests(TestCase):
+
+    def setUp(self):
+        professional, patient = _people()
+        self.thread = PatientAIThread.objects.create(professional=professional, patient=patient)
+
+    def test_jobs_of_one_thread_never_run_concurrently(self):
+        summary = jobs.enqueue('summary', thread=self.thread)
+        store = jobs.enqueue('vector_store', thread=self.thread)
+        other = jobs.enqueue('summary')
+        self.assertTrue(jobs.claim(summary.id, 'w1'))
+        self.assertEqual(jobs.next_job_ids(10), [other.id])
+        # Even when claimed directly (e.g. listed before the first claim)
+        self.assertFalse(jobs.claim(store.id, 'w2'))
+        self.assertEqual(Job.objects.get(id=store.id).status, 'queued')
+
+        Job.objects.filter(id=summary.id).update(status='done')
+        self.assertEqual(jobs.next_job_ids(10), [store.id, other.id])
+        self.assertTrue(jobs.claim(store.id, 'w2'))
+
+    def test_enqueue_reuses_a_pending_job_of_the_same_kind(self):
+        first = jobs.enqueue('summary', thread=self.thread)
+        self.assertEqual(jobs.enqueue('summary', thread=self.thread).id, first.id)
+
+
+class AttachmentHashTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        professional, patient = _people()
+        consultation = Consultation.objects.create(patient=patient, professional=professional, consultory='1',
+                                                   date=MONDAY, time=time(9))
+        self.attachment = ConsultationAttachment(consultation=consultation, file_type='notas')
+        self.attachment.file.save('a.txt', ContentFile(b'first'), save=False)
+        self.attachment.save()
+
+    def test_hash_is_read_from_disk_once_and_stored(self):
+        with mock.patch.object(ai, '_sha256_file', wraps=ai._sha256_file) as sha:
+            digest = ai._attachment_hash(self.attachment)
+            again = ai._attachment_hash(ConsultationAttachment.objects.get(id=self.attachment.id))
+        self.assertEqual(digest, again)
+        self.assertEqual(sha.call_count, 1)
+
+    def test_new_file_clears_the_stored_hash(self):
+        first = ai._attachment_hash(self.attachment)
+        self.attachment.file.save('b.txt', ContentFile(b'second'), save=False)
+        self.attachment.save()
+        self.assertEqual(ConsultationAttachment.objects.get(id=self.attachment.id).content_hash, '')
+        self.assertNotEqual(ai._attachment_hash(self.attachment), first)
+
+
+def _openai_stub():
+    """Mock OpenAI client whose files.create hands out sequential ids."""
+    client = mock.MagicMock()
+    ids = iter(range(1, 1000))
+    client.files.create.side_effect = lambda **kwargs: mock.Mock(id=f'file-{next(ids)}')
+    client.vector_stores.create.return_value = mock.Mock(id='vs-1')
+    client.vector_stores.retrieve.return_value = mock.Mock(status='completed')
+    return client
+
+
+class VectorStoreSyncTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.professional, self.patient = _people()
+        self.consultation = Consultation.objects.create(patient=self.patient, professional=self.professional,
+                                                        consultory='1', date=MONDAY, time=time(9))
+        attachment = ConsultationAttachment(consultation=self.consultation, file_type='notas')
+        attachment.file.save('a.txt', ContentFile(b'scan'), save=False)
+        attachment.save()
+        self.thread = PatientAIThread.objects.create(professional=self.professional, patient=self.patient)
+        self.client = _openai_stub()
+
+    def _sync(self):
+        self.client.files.create.reset_mock()
+        return ai.ensure_patient_vector_store(self.client, self.thread, self.professional, self.patient)
+
+    def test_unchanged_documents_are_not_uploaded_again(self):
+        self._sync()
+        # Header, consultation text and the attachment file
+        self.assertEqual(self.client.files.create.call_count, 3)
+        indexed = dict(PatientVectorStoreFile.objects.values_list('source_key', 'openai_file_id'))
+
+        with mock.patch.object(ai, '_sha256_file', wraps=ai._sha256_file) as sha:
+            self._sync()
+        self.assertEqual(self.client.files.create.call_count, 0)
+        # Only the first sync had anything to index
+        self.assertEqual(self.client.vector_stores.file_batches.create_and_poll.call_count, 1)
+        # The attachment hash is stored, so the file is not even read again
+        self.assertEqual(sha.call_count, 0)
+        self.assertEqual(dict(PatientVectorStoreFile.objects.values_list('source_key', 'openai_file_id')), indexed)
+
+    def test_only_the_changed_consultation_is_reindexed(self):
+        self._sync()
+        ConsultationNote.objects.create(consultation=self.consultation, content='Mejoría')
+        self._sync()
+        self.assertEqual(self.client.files.create.call_count, 1)
+        self.assertEqual(self.client.files.create.call_args.kwargs['purpose'], 'assistants')
+        key = f'consultation:{self.consultation.id}'
+        self.assertEqual(PatientVectorStoreFile.objects.get(source_key=key).openai_file_id, 'file-4')
+        self.client.files.delete.assert_called_once()
+
+
+class UploadRetryTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        professional, patient = _people()
+        consultation = Consultation.objects.create(patient=patient, professional=professional, consultory='1',
+                                                   date=MONDAY, time=time(9))
+        self.attachment = ConsultationAttachment(consultation=consultation, file_type='notas')
+        self.attachment.file.save('a.txt', ContentFile(b'scan'), save=False)
+        self.attachment.save()
+        self.sleep = self.enterContext(mock.patch.object(ai.time, 'sleep'))
+        self.client = mock.MagicMock()
+
+    def test_transient_errors_are_retried_with_exponential_backoff(self):
+        self.client.files.create.side_effect = [ConnectionError('reset'), ConnectionError('reset'), mock.Mock(id='file-1')]
+        uploaded, errors = ai.upload_attachments(self.client, [self.attachment])
+        self.assertEqual((uploaded, errors), ([self.attachment], []))
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [ai.UPLOAD_BACKOFF, ai.UPLOAD_BACKOFF * 2])
+        self.assertEqual(ConsultationAttachment.objects.get(id=self.attachment.id).openai_file_id, 'file-1')
+
+    def test_gives_up_after_the_last_retry(self):
+        self.client.files.create.side_effect = ConnectionError('down')
+        uploaded, errors = ai.upload_attachments(self.client, [self.attachment])
+        self.assertEqual(uploaded, [])
+        self.assertEqual(errors, [f'{self.attachment.id}: down'])
+        self.assertEqual(self.client.files.create.call_count, ai.UPLOAD_RETRIES)
+        self.assertEqual(self.sleep.call_count, ai.UPLOAD_RETRIES - 1)
+
+    def test_missing_file_is_not_retried(self):
+        os.remove(self.attachment.file.path)
+        uploaded, errors = ai.upload_attachments(self.client, [self.attachment])
+        self.assertEqual(uploaded, [])
+        self.assertEqual(len(errors), 1)
+        self.client.files.create.assert_not_called()
+        self.sleep.assert_not_called()
+
+
+class ReportContextRevisionTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('ana', password='x')
+        self.professional = Professional.objects.create(first_name='Ana', last_name='Paz', role='psychologist', user=user)
+        self.patient = Patient.objects.create(first_name='Luis', last_name='Rojas', professional=self.professional)
+        self.consultation = Consultation.objects.create(patient=self.patient, professional=self.professional,
+                                                        consultory='1', date=MONDAY, time=time(9))
+        self.client.force_login(user)
+        # Without a key the summary job is not enqueued; the context is still built
+        self.enterContext(mock.patch.dict(os.environ, {'OPENAI_API_KEY': ''}))
+        self.build = self.enterContext(mock.patch.object(views, 'build_patient_context', wraps=views.build_patient_context))
+
+    def _generate(self, **extra):
+        return self.client.post(reverse('report_sessions'), {'patient': self.patient.id, **extra})
+
+    def test_context_is_rebuilt_only_when_the_clinical_record_changes(self):
+        self._generate()
+        self.assertEqual(self.build.call_count, 1)
+        response = self._generate()
+        self.assertEqual(self.build.call_count, 1)
+        self.assertTrue(response.context['info'])
+
+        ConsultationNote.objects.create(consultation=self.consultation, content='Mejoría')
+        self._generate()
+        self.assertEqual(self.build.call_count, 2)
+        thread = PatientAIThread.objects.get(patient=self.patient)
+        self.assertEqual(thread.context_revision, Patient.objects.get(id=self.patient.id).clinical_revision)
+        self.assertEqual(thread.context_note_count, 1)
+
+    def test_force_rebuilds_an_unchanged_context(self):
+        self._generate()
+        self._generate(force='1')
+        self.assertEqual(self.build.call_count, 2)
+
+
+class PatientContextTests(TestCase):
+
+    def test_header_with_the_consultation_total_comes_first(self):
+        professional, patient = _people()
+        for hour in (9, 10):
+            Consultation.objects.create(patient=patient, professional=professional, consultory='1',
+                                        date=MONDAY, time=time(hour))
+        context = ai.build_patient_context(professional, patient)
+        self.assertTrue(context.startswith("Paciente: Luis Rojas\nTotal de consultas: 2\n- Consulta: "))
+        self.assertEqual(context.count('Total de consultas'), 1)
+
+
+class ConversationLockTests(TestCase):
+
+    def setUp(self):
+        professional, patient = _people()
+        self.thread = PatientAIThread.objects.create(professional=professional, patient=patient)
+
+    def test_one_owner_at_a_time_and_only_the_owner_releases(self):
+        token = ai.acquire_conversation(self.thread.id)
+        self.assertTrue(token)
+        self.assertIsNone(ai.acquire_conversation(self.thread.id))
+        ai.release_conversation(self.thread.id, 'not-the-owner')
+        self.assertIsNone(ai.acquire_conversation(self.thread.id))
+        ai.release_conversation(self.thread.id, token)
+        self.assertTrue(ai.acquire_conversation(self.thread.id))
+
+    def test_expired_lock_is_taken_over_and_not_released_by_the_old_owner(self):
+        stale = ai.acquire_conversation(self.thread.id)
+        PatientAIThread.objects.filter(id=self.thread.id).update(
+            turn_started_at=timezone.now() - timedelta(seconds=ai.CONVERSATION_LOCK_TTL + 1))
+        token = ai.acquire_conversation(self.thread.id)
+        self.assertTrue(token)
+        ai.release_conversation(self.thread.id, stale)
+        self.assertEqual(PatientAIThread.objects.get(id=self.thread.id).turn_owner, token)
+
+
+class AvailableSlotsApiTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('ana', password='x')
+        professional = Professional.objects.create(user=self.user, first_name='Ana', last_name='Paz', role='psychologist')
+        WeeklyAvailability.objects.create(professional=professional, weekday=0, start_time=time(9), end_time=time(11))
+
+    def _both(self, params):
+        """(status, body) from the sync view and from its async twin."""
+        results = []
+        for view in (views.available_slots_api, async_to_sync(async_views.available_slots_api)):
+            request = RequestFactory().get('/api/available-slots/', params)
+            request.user = self.user
+            resp = view(request)
+            results.append((resp.status_code, json.loads(resp.content)))
+        return results
+
+    def test_sync_and_async_views_answer_alike(self):
+        cases = [
+            {},
+            {'date': '12/10/2026'},
+            {'start': '2026-10-20', 'end': '2026-10-12'},
+            {'date': MONDAY.isoformat()},
+            {'start': MONDAY.isoformat(), 'end': (MONDAY + timedelta(days=1)).isoformat()},
+        ]
+        for params in cases:
+            with self.subTest(params=params):
+                sync, asynchronous = self._both(params)
+                self.assertEqual(sync, asynchronous)
+        self.assertEqual(self._both({'date': MONDAY.isoformat()})[0],
+                         (200, {'slots': ['09:00', '09:30', '10:00']}))
+        self.assertEqual(self._both({})[0], (400, {'error': 'Missing date'}))
+
+
+class SummaryPdfCacheTests(TestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.enterContext(override_settings(REPORT_PDF_CACHE_DIR=cache_dir.name))
+        professional, patient = _people()
+        self.thread = PatientAIThread.objects.create(professional=professional, patient=patient)
+        self.message = PatientAIMessage.objects.create(thread=self.thread, role='assistant',
+                                                       content='# Resumen', is_summary=True)
+
+    def test_key_covers_the_names_shown_in_the_pdf(self):
+        before = report_pdf.cache_key(self.thread, self.message)
+        self.thread.patient.last_name = 'Rojas Vega'
+        self.assertNotEqual(report_pdf.cache_key(self.thread, self.message), before)
+
+    def test_generated_line_is_the_summary_time(self):
+        self.message.created_at = datetime(2025, 3, 4, 15, 30, tzinfo=dt_timezone.utc)
+        html = report_pdf.render_summary_html(self.thread, self.message)
+        self.assertIn('Generado: 04/03/2025 11:30', html)  # America/La_Paz
+
+    def test_second_open_is_served_from_disk_and_older_files_are_removed(self):
+        pdf, html = report_pdf.open_summary_pdf(self.thread, self.message)
+        self.assertIsNone(html)
+        self.assertTrue(pdf.read().startswith(b'%PDF'))
+        with mock.patch.object(report_pdf, '_render_pdf') as render:
+            cached, _ = report_pdf.open_summary_pdf(self.thread, self.message)
+            cached.close()
+        render.assert_not_called()
+
+        held, _ = report_pdf.open_summary_pdf(self.thread, self.message)
+        self.addCleanup(held.close)
+        self.thread.professional.first_name = 'Ana María'
+        self.assertTrue(report_pdf.ensure_summary_pdf(self.thread, self.message))
+        # The old file is gone, but a response that already opened it can still read it
+        self.assertEqual(len(os.listdir(settings.REPORT_PDF_CACHE_DIR)), 1)
+        self.assertTrue(held.read().startswith(b'%PDF'))
+
+
+def _readings(n, start=0):
+    return rows_from_json([[1_700_000_000 + start + i, 50, 50, 1, 1, 1, 1, 1, 'NEUTRAL', 0.5] for i in range(n)])
+
+
+class IngestBatchTests(TestCase):
+
+    def setUp(self):
+        _, patient = _people()
+        self.session = EEGSession.objects.create(patient=patient, started_at=timezone.now())
+
+    def test_seqs_are_written_once_in_any_order(self):
+        acks = [write_batch(self.session.id, seq, _readings(2, seq * 10)) for seq in (1, 3, 2)]
+        self.assertEqual([a['written'] for a in acks], [2, 2, 2])
+        # A lower seq that never arrived is written, not acknowledged as a duplicate
+        self.assertFalse(acks[2]['duplicate'])
+        self.assertEqual(EEGReading.objects.filter(session=self.session).count(), 6)
+
+    def test_resent_seq_is_a_duplicate_and_writes_nothing(self):
+        write_batch(self.session.id, 1, _readings(3))
+        ack = write_batch(self.session.id, 1, _readings(3))
+        self.assertEqual(ack, {'seq': 1, 'ok': True, 'written': 0, 'duplicate': True})
+        self.assertEqual(EEGReading.objects.filter(session=self.session).count(), 3)
+        # Only written batches move the revision
+        self.assertEqual(EEGSession.objects.get(id=self.session.id).ingest_seq, 1)
+
+    def test_closed_session_rejects_batches(self):
+        EEGSession.objects.filter(id=self.session.id).update(ended_at=timezone.now())
+        with self.assertRaises(IngestError):
+            write_batch(self.session.id, 1, _readings(1))
+
+    def test_infinite_values_are_rejected_not_a_server_error(self):
+        row = [1.7e9, 50, 60, 1.0, 2.0, 3.0, 4.0, 5.0, 0, 0.5]
+        for column in (1, 3):
+            frame = list(row)
+            frame[column] = float('inf')
+            with self.assertRaises(IngestError):
+                rows_from_frame(np.array(frame, dtype='<f8').tobytes())
+            with self.assertRaises(IngestError):
+                rows_from_json([frame[:8] + ['', 0.5]])
+        # NaN still stands for a missing value
+        frame = list(row)
+        frame[1] = float('nan')
+        self.assertIsNone(rows_from_frame(np.array(frame, dtype='<f8').tobytes())[0][1])
+
+
+class SummaryBackfillTests(TestCase):
+
+    def test_reads_never_store_summaries_the_worker_does(self):
+        _, patient = _people()
+        session = EEGSession.objects.create(patient=patient, started_at=timezone.now())
+        write_batch(session.id, 1, _readings(4))
+        EEGSession.objects.filter(id=session.id).update(ended_at=timezone.now())
+
+        sessions = list(EEGSession.objects.select_related('summary'))
+        self.assertEqual(session_summaries(sessions)[session.id].reading_count, 4)
+        self.assertFalse(EEGSessionSummary.objects.exists())
+
+        self.assertEqual(summarize_missing(), 1)
+        self.assertEqual(EEGSessionSummary.objects.get(session=session).reading_count, 4)
+        self.assertEqual(summarize_missing(), 0)
+
+
+class SessionDetailTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('ana', password='x', is_staff=True))
+        _, patient = _people()
+        self.session = EEGSession.objects.create(patient=patient, started_at=timezone.now())
+        write_batch(self.session.id, 1, _readings(30))
+        self.url = f'/report/eeg/sessions/{self.session.id}/'
+
+    def test_analytics_are_stored_on_close_and_only_read_by_the_pages(self):
+        close_session(self.session)
+        self.assertEqual(EEGSessionSummary.objects.get(session=self.session).analytics['reading_count'], 30)
+        with mock.patch.object(eeg_analytics, 'read_session', wraps=eeg_analytics.read_session) as read:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            self.assertEqual(self.client.get('/report/eeg/').status_code, 200)
+        # Only the rolling series, once: it is cached afterwards
+        self.assertEqual(read.call_count, 1)
+
+    def test_live_session_shows_pending_analytics_without_writing(self):
+        with mock.patch.object(eeg_analytics, 'analyze') as analyze:
+            detail = self.client.get(self.url)
+            stats = self.client.get('/report/eeg/')
+        analyze.assert_not_called()
+        self.assertContains(detail, 'Pendiente')
+        self.assertContains(stats, 'análisis pendiente')
+        self.assertFalse(EEGSessionSummary.objects.exists())
+
+    def test_worker_backfills_analytics_of_summaries_without_them(self):
+        close_session(self.session)
+        EEGSessionSummary.objects.update(analytics={})
+        self.assertEqual(summarize_missing(), 1)
+        self.assertIsNotNone(eeg_analytics.stored_analytics(EEGSessionSummary.objects.get(session=self.session)))
@@ -1,6 +1,14 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
+from .eeg_api import EEGReadingIngestView, EEGSessionCloseView
+
+# I/O-bound views have async twins for ASGI deployments (settings.ASYNC_VIEWS)
+if settings.ASYNC_VIEWS:
+    from . import async_views as io_views
+else:
+    io_views = views
 
 urlpatterns = [
     path('', views.index, name='index'),
@@ -35,7 +43,9 @@ urlpatterns = [
     path('start-session/<int:consultation_id>/', views.start_session, name='start_session'),
     path('end-session/<int:consultation_id>/', views.end_session, name='end_session'),
     path('profile/', views.profile, name='profile'),
-    path('api/available-slots/', views.available_slots_api, name='available_slots_api'),
+    path('api/available-slots/', io_views.available_slots_api, name='available_slots_api'),
+    path('api/eeg/sessions/<int:session_id>/readings/', EEGReadingIngestView.as_view(), name='eeg_readings_ingest'),
+    path('api/eeg/sessions/<int:session_id>/close/', EEGSessionCloseView.as_view(), name='eeg_session_close'),
     path('mis-pacientes/', views.my_patients, name='my_patients'),
     path('mis-pacientes/<int:patient_id>/', views.patient_history, name='patient_history'),
     path('config/consultorios/', views.config_consultorios, name='config_consultorios'),
@@ -49,12 +59,16 @@ urlpatterns = [
     path('consult/edit/<int:consultation_id>/', views.consultation_edit_api, name='consultation_edit_api'),
     # AI Report & Chat
     path('report/sessions/', views.report_sessions, name='report_sessions'),
-    path('report/sessions/chat/', views.report_sessions_chat, name='report_sessions_chat'),
-    path('report/sessions/reupload/', views.report_sessions_reupload, name='report_sessions_reupload'),
+    path('report/sessions/chat/', io_views.report_sessions_chat, name='report_sessions_chat'),
+    path('report/sessions/chat/stream/', io_views.report_sessions_chat_stream, name='report_sessions_chat_stream'),
+    path('report/sessions/reupload/', io_views.report_sessions_reupload, name='report_sessions_reupload'),
     path('report/sessions/pdf/', views.report_sessions_pdf, name='report_sessions_pdf'),
+    path('report/sessions/jobs/<int:job_id>/', views.report_sessions_job_status, name='report_sessions_job_status'),
     # History manager
     path('patients/<int:patient_id>/history-manager/', views.patient_history_manager, name='patient_history_manager'),
     # EEG Analytics
     path('report/eeg/', views.eeg_stats, name='eeg_stats'),
+    path('report/eeg/sessions/<int:session_id>/', views.eeg_session_detail, name='eeg_session_detail'),
+    path('report/eeg/sessions/<int:session_id>/series/', views.eeg_session_series, name='eeg_session_series'),
     path('report/eeg/download-installer/', views.eeg_download_installer, name='eeg_download_installer'),
 ]
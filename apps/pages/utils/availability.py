@@ -1,7 +1,120 @@
-from datetime import datetime, time, timedelta
-from django.utils import timezone
+from datetime import timedelta
 from apps.pages.models import WeeklyAvailability, AvailabilityException, Consultation
 
+
+def _to_minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def _merge_intervals(intervals):
+    """Sort (start, end) minute intervals and merge the overlapping ones."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start < merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class AvailabilityIndex:
+    """Per-professional availability for a date range, loaded in a fixed number of queries.
+
+    Three queries are issued regardless of the range length: weekly availability,
+    exceptions in range and consultations in range. Occupied time is kept as a
+    sorted, merged list of minute intervals per day, so answering a day is a
+    single linear sweep of candidate slots against that list.
+    """
+
+    def __init__(self, professional, start_date, end_date, load=True):
+        self.professional = professional
+        self.start_date = start_date
+        self.end_date = end_date
+        self.weekly = {}
+        self.exceptions = {}
+        self.occupied = {}
+        if load:
+            self._ingest(*(list(qs) for qs in self._querysets()))
+
+    @classmethod
+    async def aload(cls, professional, start_date, end_date):
+        """Async constructor: same three queries through the async ORM."""
+        index = cls(professional, start_date, end_date, load=False)
+        weekly, exceptions, rows = index._querysets()
+        index._ingest(
+            [w async for w in weekly],
+            [ex async for ex in exceptions],
+            [row async for row in rows],
+        )
+        return index
+
+    def _querysets(self):
+        prof = self.professional
+        return (
+            WeeklyAvailability.objects.filter(professional=prof),
+            AvailabilityException.objects.filter(
+                professional=prof, date__gte=self.start_date, date__lte=self.end_date,
+            ),
+            Consultation.objects
+            .filter(professional=prof, date__gte=self.start_date, date__lte=self.end_date)
+            .values_list('date', 'time', 'duration'),
+        )
+
+    def _ingest(self, weekly, exceptions, rows):
+        self.weekly = {w.weekday: w for w in weekly}
+        self.exceptions = {ex.date: ex for ex in exceptions}
+        raw = {}
+        for c_date, c_time, c_duration in rows:
+            start = _to_minutes(c_time)
+            raw.setdefault(c_date, []).append((start, start + (c_duration or 0)))
+        # Exception ranges block part of the day, same as a consultation would
+        for ex_date, ex in self.exceptions.items():
+            if not ex.is_closed and ex.start_time and ex.end_time and ex.start_time < ex.end_time:
+                raw.setdefault(ex_date, []).append((_to_minutes(ex.start_time), _to_minutes(ex.end_time)))
+        self.occupied = {d: _merge_intervals(intervals) for d, intervals in raw.items()}
+
+    def working_window(self, date_obj):
+        """Return (start_minute, end_minute) for the day, or None if unavailable."""
+        weekly = self.weekly.get(date_obj.weekday())
+        if weekly is None or weekly.is_closed or not weekly.start_time or not weekly.end_time:
+            return None
+        exception = self.exceptions.get(date_obj)
+        if exception is not None and exception.is_closed:
+            return None
+        return _to_minutes(weekly.start_time), _to_minutes(weekly.end_time)
+
+    def free_slots(self, date_obj, duration_minutes=60, step_minutes=30):
+        """Return list of available start times (as 'HH:MM') on a date inside the loaded range."""
+        window = self.working_window(date_obj)
+        if window is None:
+            return []
+        day_start, day_end = window
+        busy = self.occupied.get(date_obj, [])
+        slots = []
+        i = 0
+        cursor = day_start
+        while cursor + duration_minutes <= day_end:
+            slot_end = cursor + duration_minutes
+            # Slot starts only move forward, so intervals ending before this one
+            # can never conflict again
+            while i < len(busy) and busy[i][1] <= cursor:
+                i += 1
+            if i >= len(busy) or busy[i][0] >= slot_end:
+                slots.append(f"{cursor // 60:02d}:{cursor % 60:02d}")
+            cursor += step_minutes
+        return slots
+
+    def free_slots_range(self, duration_minutes=60, step_minutes=30):
+        """Return {date: [slots]} for every date in the loaded range."""
+        result = {}
+        day = self.start_date
+        while day <= self.end_date:
+            result[day] = self.free_slots(day, duration_minutes, step_minutes)
+            day += timedelta(days=1)
+        return result
+
+
 def generate_slots(professional, date_obj, duration_minutes=60, step_minutes=30):
     """Return list of available start times (as 'HH:MM') for professional on a date.
     - Uses weekly availability window as the working day
@@ -10,62 +123,23 @@ def generate_slots(professional, date_obj, duration_minutes=60, step_minutes=30)
         * start_time+end_time => block that range only (rest of day remains available)
     - Excludes overlaps with existing consultations.
     """
-    # Determine weekday availability
-    weekday = date_obj.weekday()  # Monday=0
-    try:
-        weekly = professional.weekly_availability.get(weekday=weekday)
-    except WeeklyAvailability.DoesNotExist:
-        return []
-    if weekly.is_closed:
-        return []
-
-    day_start = weekly.start_time
-    day_end = weekly.end_time
-    if not day_start or not day_end:
-        return []
-
-    # Exception acts as a blocked interval inside the day (unless closed)
-    blocked_intervals = []
-    try:
-        exception = professional.availability_exceptions.get(date=date_obj)
-        if exception.is_closed:
-            return []
-        if exception.start_time and exception.end_time:
-            ex_start_dt = datetime.combine(date_obj, exception.start_time)
-            ex_end_dt = datetime.combine(date_obj, exception.end_time)
-            if ex_start_dt < ex_end_dt:
-                blocked_intervals.append((ex_start_dt, ex_end_dt))
-    except AvailabilityException.DoesNotExist:
-        pass
-
-    # Existing consultations that day (treat as occupied intervals)
-    day_consults = Consultation.objects.filter(professional=professional, date=date_obj).order_by('time')
-    occupied = []
-    for c in day_consults:
-        c_start_dt = datetime.combine(date_obj, c.time)
-        c_end_dt = c_start_dt + timedelta(minutes=c.duration)
-        occupied.append((c_start_dt, c_end_dt))
-
-    # Add blocked intervals from exception to occupied list
-    occupied.extend(blocked_intervals)
-
-    # Generate candidate slots across the working day
-    slots = []
-    cursor = datetime.combine(date_obj, day_start)
-    end_limit = datetime.combine(date_obj, day_end)
-    block = timedelta(minutes=duration_minutes)
-    step = timedelta(minutes=step_minutes)
-
-    while cursor + block <= end_limit:
-        slot_start = cursor
-        slot_end = cursor + block
-        # Check overlap against all occupied intervals
-        conflict = False
-        for o_start, o_end in occupied:
-            if slot_start < o_end and o_start < slot_end:
-                conflict = True
-                break
-        if not conflict:
-            slots.append(slot_start.strftime('%H:%M'))
-        cursor += step
-    return slots
+    index = AvailabilityIndex(professional, date_obj, date_obj)
+    return index.free_slots(date_obj, duration_minutes, step_minutes)
+
+
+def generate_slots_range(professional, start_date, end_date, duration_minutes=60, step_minutes=30):
+    """Return {date: [slots]} for professional across start_date..end_date (inclusive)."""
+    index = AvailabilityIndex(professional, start_date, end_date)
+    return index.free_slots_range(duration_minutes, step_minutes)
+
+
+async def agenerate_slots(professional, date_obj, duration_minutes=60, step_minutes=30):
+    """Async counterpart of generate_slots."""
+    index = await AvailabilityIndex.aload(professional, date_obj, date_obj)
+    return index.free_slots(date_obj, duration_minutes, step_minutes)
+
+
+async def agenerate_slots_range(professional, start_date, end_date, duration_minutes=60, step_minutes=30):
+    """Async counterpart of generate_slots_range."""
+    index = await AvailabilityIndex.aload(professional, start_date, end_date)
+    return index.free_slots_range(duration_minutes, step_minutes)
@@ -0,0 +1,108 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from apps.pages.models import Consultation
+from .shared_cache import cache_is_shared
+
+# Cached feeds are keyed under a version number that is bumped whenever a
+# consultation (or data shown on its event) changes, so stale entries are
+# simply never read again. Feeds are only cached on a shared backend: with a
+# per-process cache, bumps from other workers (or run_worker's no_show sweep)
+# would go unseen and an edited consultation could appear to revert.
+VERSION_KEY = 'calendar_events:version'
+FEED_TTL = 120
+STREAM_CHUNK_SIZE = 500
+
+EVENT_FIELDS = (
+    'id', 'date', 'time', 'duration', 'status', 'charge', 'notes',
+    'consultory', 'consultorio_fk_id', 'consultorio_fk__name',
+    'patient_id', 'patient__first_name', 'patient__last_name', 'patient__color',
+    'professional_id', 'professional__first_name', 'professional__last_name',
+)
+
+STATUS_DISPLAY = dict(Consultation.STATUS_CHOICES)
+
+FALLBACK_PALETTE = ['#D4E157', '#4FC3F7', '#FFB74D', '#BA68C8', '#81C784', '#64B5F6', '#E57373', '#FFD54F', '#4DB6AC', '#A1887F']
+
+
+def fallback_color(pid: int):
+    return FALLBACK_PALETTE[pid % len(FALLBACK_PALETTE)]
+
+
+def feed_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_feed_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def feed_cache_key(scope, consultorio, start, end, exclude):
+    """Cache key for one feed, or None when feeds must not be cached."""
+    if not cache_is_shared():
+        return None
+    raw = '|'.join(str(p) for p in (scope, consultorio, start, end, ','.join(sorted(exclude))))
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f"calendar_events:{feed_version()}:{digest}"
+
+
+def event_from_row(row):
+    """Build one FullCalendar event dict from a values() row of EVENT_FIELDS."""
+    start_dt = datetime.combine(row['date'], row['time'])
+    end_dt = start_dt + timedelta(minutes=row['duration'] or 60)
+    color = row['patient__color'] or fallback_color(row['patient_id'])
+    patient_name = f"{row['patient__first_name']} {row['patient__last_name']}".strip()
+    professional_name = f"{row['professional__first_name']} {row['professional__last_name']}".strip()
+    charge = row['charge']
+    return {
+        'id': row['id'],
+        'title': patient_name,
+        'start': start_dt.isoformat(),
+        'end': end_dt.isoformat(),
+        'extendedProps': {
+            'status': row['status'],
+            'statusDisplay': STATUS_DISPLAY.get(row['status'], row['status']),
+            'consultorio': row['consultorio_fk__name'] if row['consultorio_fk_id'] else row['consultory'],
+            'consultorioId': row['consultorio_fk_id'] or None,
+            'patientId': row['patient_id'],
+            'patientName': patient_name,
+            'professionalId': row['professional_id'],
+            'professionalName': professional_name,
+            'duration': row['duration'],
+            'charge': str(charge) if charge is not None else None,
+            'notes': row['notes'] or '',
+        },
+        'backgroundColor': color,
+        'borderColor': color,
+    }
+
+
+def stream_events(queryset, cache_key=None):
+    """Yield the JSON array of events chunk by chunk.
+
+    When `cache_key` is given, the complete body is stored once the last row
+    has been written (a client disconnect mid-stream leaves the cache empty).
+    """
+    rows = queryset.values(*EVENT_FIELDS).iterator(chunk_size=STREAM_CHUNK_SIZE)
+    parts = [] if cache_key else None
+    first = True
+    yield '['
+    for row in rows:
+        if not row['time']:
+            continue
+        chunk = ('' if first else ',') + json.dumps(event_from_row(row))
+        first = False
+        if parts is not None:
+            parts.append(chunk)
+        yield chunk
+    yield ']'
+    if parts is not None:
+        cache.set(cache_key, '[' + ''.join(parts) + ']', FEED_TTL)
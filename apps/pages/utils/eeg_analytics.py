@@ -0,0 +1,125 @@
+import numpy as np
+from django.core.cache import cache
+from .eeg_store import read_session
+from .eeg_series import ENDED_TTL, LIVE_TTL, lttb
+
+# Whole-session analytics computed on the arrays from eeg_store.read_session
+# (one query per session), without per-reading Python loops.
+ATTENTION_THRESHOLD = 60    # eSense scale: 60+ is "elevated"
+MEDITATION_THRESHOLD = 60
+ROLLING_SECONDS = 10
+EMOTIONS = ('POSITIVE', 'NEUTRAL', 'NEGATIVE')  # transition matrix order (codes 1..3)
+
+
+def ratio(numerator, denominator):
+    """Elementwise numerator / denominator; NaN where the denominator is missing or not positive."""
+    out = np.full(len(numerator), np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def rolling_mean(t, values, seconds=ROLLING_SECONDS):
+    """Trailing mean over the previous `seconds` of recording at each reading, skipping NaN."""
+    valid = ~np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    ccount = np.concatenate(([0], np.cumsum(valid)))
+    hi = np.arange(1, len(values) + 1)
+    lo = np.searchsorted(t, t - seconds, side='left')
+    counts = ccount[hi] - ccount[lo]
+    return np.where(counts > 0, (csum[hi] - csum[lo]) / np.maximum(counts, 1), np.nan)
+
+
+def percent_above(values, threshold):
+    """Share (0-100) of the non-missing values at or above the threshold; None without data."""
+    present = values[~np.isnan(values)]
+    if not len(present):
+        return None
+    return float((present >= threshold).mean() * 100)
+
+
+def transition_counts(codes):
+    """3x3 counts of consecutive emotion labels (EMOTIONS order), unlabelled readings skipped."""
+    labelled = codes[codes > 0].astype(np.intp) - 1
+    counts = np.zeros((len(EMOTIONS), len(EMOTIONS)), dtype=np.int64)
+    np.add.at(counts, (labelled[:-1], labelled[1:]), 1)
+    return counts
+
+
+def transition_probabilities(counts):
+    """Row-normalised transition matrix (rows with no transitions stay at 0)."""
+    counts = np.asarray(counts, dtype=float)
+    totals = counts.sum(axis=1, keepdims=True)
+    return np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+
+
+def _mean(values):
+    present = values[~np.isnan(values)]
+    return float(present.mean()) if len(present) else None
+
+
+def analyze(arrays):
+    """Scalar analytics for one session's EEGArrays."""
+    theta_beta = ratio(arrays['theta'], arrays['beta'])
+    alpha_theta = ratio(arrays['alpha'], arrays['theta'])
+    return {
+        'reading_count': len(arrays),
+        'theta_beta': _mean(theta_beta),
+        'alpha_theta': _mean(alpha_theta),
+        'attention_above': percent_above(arrays['attention'], ATTENTION_THRESHOLD),
+        'meditation_above': percent_above(arrays['meditation'], MEDITATION_THRESHOLD),
+        'transitions': transition_counts(arrays.emotion).tolist(),
+    }
+
+
+def thresholds():
+    return [ATTENTION_THRESHOLD, MEDITATION_THRESHOLD]
+
+
+def compute_analytics(arrays):
+    """analyze() plus the thresholds it used, as stored on EEGSessionSummary.analytics."""
+    data = analyze(arrays)
+    data['thresholds'] = thresholds()
+    return data
+
+
+def stored_analytics(summary):
+    """The analytics stored with a session's summary, or None while pending.
+
+    Computed only when the summary is stored (eeg_summary.close_session and
+    summarize_sessions); report pages never compute or write them. Analytics
+    made with other thresholds count as pending until summarize_eeg_sessions
+    --rebuild recomputes them.
+    """
+    if summary is None or summary._state.adding:
+        return None
+    data = summary.analytics
+    return data if data and data.get('thresholds') == thresholds() else None
+
+
+def rolling_series(arrays, seconds=ROLLING_SECONDS, points=600):
+    """Rolling theta/beta, alpha/theta and attention for charting: {name: [[t_ms, value], ...]}."""
+    t = arrays.t
+    series = {
+        'theta_beta': rolling_mean(t, ratio(arrays['theta'], arrays['beta']), seconds),
+        'alpha_theta': rolling_mean(t, ratio(arrays['alpha'], arrays['theta']), seconds),
+        'attention': rolling_mean(t, arrays['attention'].astype(np.float64), seconds),
+    }
+    out = {}
+    for name, values in series.items():
+        valid = ~np.isnan(values)
+        ts, ys = t[valid] * 1000, values[valid]
+        idx = lttb(ts, ys, points)
+        out[name] = [[int(a), round(float(b), 3)] for a, b in zip(ts[idx], ys[idx])]
+    return out
+
+
+def session_rolling_series(session, arrays=None):
+    """rolling_series() for a session, cached like eeg_series.session_series."""
+    ended = session.ended_at is not None
+    revision = 'final' if ended else session.ingest_seq
+    key = f"eeg_rolling:{session.id}:{revision}:{ROLLING_SECONDS}"
+    data = cache.get(key)
+    if data is None:
+        data = rolling_series(read_session(session) if arrays is None else arrays)
+        cache.set(key, data, ENDED_TTL if ended else LIVE_TTL)
+    return data
@@ -0,0 +1,156 @@
+import csv
+import io
+import math
+from datetime import datetime, timezone as dt_timezone
+import numpy as np
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+from apps.pages.models import EEGIngestBatch, EEGSession, EEGReading
+
+# Column order shared by the JSON rows and the binary frame
+FIELDS = (
+    'timestamp', 'attention', 'meditation',
+    'delta', 'theta', 'alpha', 'beta', 'gamma',
+    'emotion_label', 'emotion_confidence',
+)
+FRAME_WIDTH = len(FIELDS)
+# Binary frames carry the emotion label as a number
+EMOTION_CODES = {0: '', 1: 'POSITIVE', 2: 'NEUTRAL', 3: 'NEGATIVE'}
+EMOTION_LABELS = set(EMOTION_CODES.values())
+
+MAX_BATCH_ROWS = 10000
+# Below this size a multi-row INSERT is as fast as COPY
+COPY_MIN_ROWS = 500
+
+
+class IngestError(ValueError):
+    pass
+
+
+def parse_timestamp(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+    if isinstance(value, str):
+        parsed = parse_datetime(value)
+        if parsed is not None:
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=dt_timezone.utc)
+    raise IngestError(f'Timestamp inválido: {value!r}')
+
+
+def _int_or_none(value):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except OverflowError:
+        raise IngestError(f'Valor no finito: {value!r}')
+
+
+def _float_or_none(value):
+    if value is None:
+        return None
+    value = float(value)
+    if math.isinf(value):
+        raise IngestError(f'Valor no finito: {value!r}')
+    return value
+
+
+def _row(timestamp, attention, meditation, delta, theta, alpha, beta, gamma, emotion, confidence):
+    if emotion not in EMOTION_LABELS:
+        raise IngestError(f'Emoción inválida: {emotion!r}')
+    return (
+        parse_timestamp(timestamp), _int_or_none(attention), _int_or_none(meditation),
+        _float_or_none(delta), _float_or_none(theta), _float_or_none(alpha),
+        _float_or_none(beta), _float_or_none(gamma), emotion, _float_or_none(confidence),
+    )
+
+
+def rows_from_json(rows):
+    """Validate JSON rows (lists in FIELDS order; timestamp as epoch seconds or ISO 8601)."""
+    if not isinstance(rows, list) or not rows:
+        raise IngestError('rows debe ser una lista no vacía')
+    if len(rows) > MAX_BATCH_ROWS:
+        raise IngestError(f'Máximo {MAX_BATCH_ROWS} lecturas por lote')
+    parsed = []
+    for i, row in enumerate(rows):
+        if not isinstance(row, list) or len(row) != FRAME_WIDTH:
+            raise IngestError(f'Fila {i}: se esperaban {FRAME_WIDTH} valores')
+        try:
+            parsed.append(_row(*row[:8], row[8] or '', row[9]))
+        except (TypeError, ValueError) as e:
+            raise IngestError(f'Fila {i}: {e}')
+    return parsed
+
+
+def rows_from_frame(payload: bytes):
+    """Decode a binary frame: little-endian float64 matrix, FRAME_WIDTH columns per reading.
+
+    Timestamps are epoch seconds, the emotion column is an EMOTION_CODES key
+    and NaN stands for a missing value.
+    """
+    if not payload or len(payload) % (8 * FRAME_WIDTH):
+        raise IngestError(f'El frame debe contener múltiplos de {FRAME_WIDTH} float64')
+    matrix = np.frombuffer(payload, dtype='<f8').reshape(-1, FRAME_WIDTH)
+    if len(matrix) > MAX_BATCH_ROWS:
+        raise IngestError(f'Máximo {MAX_BATCH_ROWS} lecturas por lote')
+    if np.isnan(matrix[:, 0]).any():
+        raise IngestError('Timestamp faltante en el frame')
+    if np.isinf(matrix).any():
+        raise IngestError('Valor no finito en el frame')
+    codes = np.nan_to_num(matrix[:, 8], nan=0).astype(int)
+    if not np.isin(codes, list(EMOTION_CODES)).all():
+        raise IngestError('Código de emoción inválido en el frame')
+    # Convert to Python objects column-wise, with NaN -> None
+    values = matrix.astype(object)
+    values[np.isnan(matrix)] = None
+    return [
+        _row(*row[:8], EMOTION_CODES[code], row[9])
+        for row, code in zip(values.tolist(), codes.tolist())
+    ]
+
+
+def _copy_rows(session_id, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([session_id] + [r'\N' if v is None else v for v in row])
+    buf.seek(0)
+    columns = ', '.join(('session_id',) + FIELDS)
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(
+            f"COPY {EEGReading._meta.db_table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buf,
+        )
+
+
+def write_batch(session_id, seq, rows):
+    """Write one batch of readings and return its acknowledgement.
+
+    Each accepted `seq` is recorded in EEGIngestBatch: a batch whose seq was
+    already written is acknowledged as a duplicate without writing, so clients
+    can safely resend batches whose ack they never received, in any order.
+    """
+    try:
+        with transaction.atomic():
+            # Row lock on the session: batches of one session are written one at a time
+            written = EEGSession.objects.filter(
+                id=session_id, ended_at__isnull=True,
+            ).update(ingest_seq=F('ingest_seq') + 1)
+            if not written:
+                # Closed in the meantime: its summary is already computed
+                raise IngestError('La sesión ya fue cerrada')
+            EEGIngestBatch.objects.create(session_id=session_id, seq=seq, rows=len(rows))
+            if connection.vendor == 'postgresql' and len(rows) >= COPY_MIN_ROWS:
+                _copy_rows(session_id, rows)
+            else:
+                EEGReading.objects.bulk_create(
+                    [EEGReading(session_id=session_id, **dict(zip(FIELDS, row))) for row in rows],
+                    batch_size=1000,
+                )
+    except IntegrityError:
+        # seq already accepted; the atomic block rolled back the counter too
+        if not EEGIngestBatch.objects.filter(session_id=session_id, seq=seq).exists():
+            raise
+        return {'seq': seq, 'ok': True, 'written': 0, 'duplicate': True}
+    return {'seq': seq, 'ok': True, 'written': len(rows), 'duplicate': False}
@@ -0,0 +1,94 @@
+import numpy as np
+from django.core.cache import cache
+from .eeg_store import read_session
+
+# Server-side downsampling of a session's readings for playback charts: the
+# browser gets at most `points` points per series whatever the recording length.
+METRICS = ('attention', 'meditation', 'delta', 'theta', 'alpha', 'beta', 'gamma')
+METHODS = ('lttb', 'minmax')
+DEFAULT_POINTS = 600
+MIN_POINTS, MAX_POINTS = 10, 5000
+# Ended sessions never change; sessions still recording are re-read shortly
+ENDED_TTL = 60 * 60 * 24
+LIVE_TTL = 15
+
+
+def load_readings(session, start=None, end=None):
+    """(timestamps in epoch ms, float matrix with one column per METRIC; NaN = missing)."""
+    arrays = read_session(session, start, end)
+    return arrays.t * 1000, np.column_stack([arrays[m] for m in METRICS]) if len(arrays) else np.empty((0, len(METRICS)))
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of the n_out points that keep the shape of y."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    # Bucket averages in one pass; bucket i's third vertex is bucket i + 1's average
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = next_x[i], next_y[i]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(x, y, n_out):
+    """First and last points plus the min and max of equal-count buckets, in time order (keeps spikes)."""
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    # Two points per bucket, two left for the ends so the chart spans the whole window
+    buckets = max(1, (n_out - 2) // 2)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    selected = {0, n - 1}
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        chunk = y[lo:hi]
+        selected.update((lo + int(chunk.argmin()), lo + int(chunk.argmax())))
+    return np.array(sorted(selected), dtype=int)
+
+
+DOWNSAMPLERS = {'lttb': lttb, 'minmax': minmax}
+
+
+def downsample(t, values, points, method='lttb'):
+    """{metric: [[t_ms, value], ...]} with at most `points` points per metric."""
+    pick = DOWNSAMPLERS[method]
+    series = {}
+    for col, metric in enumerate(METRICS):
+        y = values[:, col]
+        valid = ~np.isnan(y)
+        ts, ys = t[valid], y[valid]
+        idx = pick(ts, ys, points)
+        series[metric] = [[int(a), round(float(b), 3)] for a, b in zip(ts[idx], ys[idx])]
+    return series
+
+
+def session_series(session, points=DEFAULT_POINTS, method='lttb', start=None, end=None):
+    """Downsampled series for a session (optionally a start/end datetime window), cached."""
+    window = f"{start.timestamp() if start else ''}-{end.timestamp() if end else ''}"
+    ended = session.ended_at is not None
+    # Live sessions: ingest_seq moves with every batch written through the API
+    revision = 'final' if ended else session.ingest_seq
+    key = f"eeg_series:{session.id}:{revision}:{method}:{points}:{window}"
+    data = cache.get(key)
+    if data is None:
+        t, values = load_readings(session, start, end)
+        data = {
+            'total': len(t),
+            'series': downsample(t, values, points, method),
+        }
+        cache.set(key, data, ENDED_TTL if ended else LIVE_TTL)
+    return data
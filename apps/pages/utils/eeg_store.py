@@ -0,0 +1,150 @@
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+import numpy as np
+from django.db import transaction
+from apps.pages.models import EEGReading, EEGReadingChunk
+from .eeg_ingest import EMOTION_CODES
+
+# Packed storage for a session's readings: one EEGReadingChunk per CHUNK_SECONDS
+# of recording, covering [start_at, end_at). Each chunk's data is the
+# zlib-compressed concatenation of
+#   float32[count]               seconds since chunk.start_at
+#   float32[count] per COLUMNS   NaN = missing value
+#   uint8[count]                 emotion code (EMOTION_CODES)
+CHUNK_SECONDS = 60
+COLUMNS = ('attention', 'meditation', 'delta', 'theta', 'alpha', 'beta', 'gamma', 'emotion_confidence')
+LABELS = np.array([EMOTION_CODES[code] for code in sorted(EMOTION_CODES)], dtype=object)
+CODE_FOR_LABEL = {label: code for code, label in EMOTION_CODES.items()}
+
+
+@dataclass
+class EEGArrays:
+    """A session's readings as arrays: `t` in epoch seconds (float64), one float32
+    array per COLUMNS entry in `values` (NaN = missing), `emotion` as uint8 codes."""
+    t: np.ndarray
+    values: dict = field(default_factory=dict)
+    emotion: np.ndarray = None
+
+    def __len__(self):
+        return len(self.t)
+
+    def __getitem__(self, column):
+        return self.values[column]
+
+    def labels(self):
+        return LABELS[self.emotion]
+
+    def select(self, mask):
+        return EEGArrays(self.t[mask], {k: v[mask] for k, v in self.values.items()}, self.emotion[mask])
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0), {c: np.empty(0, dtype=np.float32) for c in COLUMNS}, np.empty(0, dtype=np.uint8))
+
+    @classmethod
+    def concat(cls, parts):
+        if not parts:
+            return cls.empty()
+        return cls(
+            np.concatenate([p.t for p in parts]),
+            {c: np.concatenate([p.values[c] for p in parts]) for c in COLUMNS},
+            np.concatenate([p.emotion for p in parts]),
+        )
+
+
+def _epoch(value):
+    return value.timestamp() if value is not None else None
+
+
+def _read_rows(session, start=None, end=None):
+    qs = session.readings_between(start, end)
+    rows = list(qs.values_list('timestamp', 'emotion_label', *COLUMNS).iterator(chunk_size=5000))
+    if not rows:
+        return EEGArrays.empty()
+    t = np.fromiter((r[0].timestamp() for r in rows), dtype=np.float64, count=len(rows))
+    try:
+        emotion = np.fromiter((CODE_FOR_LABEL[r[1]] for r in rows), dtype=np.uint8, count=len(rows))
+    except KeyError as e:
+        raise ValueError(f'Etiqueta de emoción desconocida en la sesión {session.id}: {e}')
+    matrix = np.array([r[2:] for r in rows], dtype=object)
+    matrix[matrix == None] = np.nan  # noqa: E711 (elementwise comparison)
+    matrix = matrix.astype(np.float32)
+    return EEGArrays(t, {c: matrix[:, i] for i, c in enumerate(COLUMNS)}, emotion)
+
+
+def pack_chunk(arrays, start):
+    """Blob for the readings in `arrays`, with times relative to `start` (epoch seconds)."""
+    parts = [(arrays.t - start).astype(np.float32)]
+    parts += [arrays.values[c].astype(np.float32) for c in COLUMNS]
+    payload = b''.join(p.tobytes() for p in parts) + arrays.emotion.astype(np.uint8).tobytes()
+    return zlib.compress(payload)
+
+
+def unpack_chunk(chunk):
+    raw = zlib.decompress(bytes(chunk.data))
+    n = chunk.count
+    floats = np.frombuffer(raw, dtype=np.float32, count=n * (len(COLUMNS) + 1)).reshape(len(COLUMNS) + 1, n)
+    emotion = np.frombuffer(raw, dtype=np.uint8, offset=floats.nbytes, count=n)
+    t = chunk.start_at.timestamp() + floats[0].astype(np.float64)
+    return EEGArrays(t, {c: floats[i + 1] for i, c in enumerate(COLUMNS)}, emotion)
+
+
+def _read_chunks(session_id, start=None, end=None):
+    qs = EEGReadingChunk.objects.filter(session_id=session_id)
+    if start is not None:
+        qs = qs.filter(end_at__gt=start)
+    if end is not None:
+        qs = qs.filter(start_at__lte=end)
+    arrays = EEGArrays.concat([unpack_chunk(c) for c in qs.order_by('seq').iterator(chunk_size=50)])
+    if start is None and end is None:
+        return arrays
+    lo, hi = _epoch(start), _epoch(end)
+    mask = np.ones(len(arrays), dtype=bool)
+    if lo is not None:
+        mask &= arrays.t >= lo
+    if hi is not None:
+        mask &= arrays.t <= hi
+    return arrays.select(mask)
+
+
+def read_session(session, start=None, end=None):
+    """A session's readings (optionally within [start, end]) as EEGArrays, whatever its storage."""
+    if session.storage == 'chunks':
+        return _read_chunks(session.id, start, end)
+    return _read_rows(session, start, end)
+
+
+def pack_session(session, chunk_seconds=CHUNK_SECONDS):
+    """Move an ended session's EEGReading rows into EEGReadingChunk blobs.
+
+    Returns (readings, chunks, packed_bytes). Runs in one transaction, so a
+    failure leaves the rows untouched.
+    """
+    if session.ended_at is None:
+        raise ValueError('Solo se pueden empaquetar sesiones terminadas')
+    if session.storage == 'chunks':
+        return 0, 0, 0
+    with transaction.atomic():
+        arrays = _read_rows(session)
+        chunks = []
+        if len(arrays):
+            t0 = arrays.t[0]
+            slots = ((arrays.t - t0) // chunk_seconds).astype(np.int64)
+            # Readings are time-ordered, so each slot is a contiguous run
+            bounds = np.flatnonzero(np.diff(slots)) + 1
+            for seq, (lo, hi) in enumerate(zip(np.r_[0, bounds], np.r_[bounds, len(arrays)])):
+                part = arrays.select(slice(lo, hi))
+                # Whole microseconds, so offsets match start_at exactly once stored
+                start = round(float(t0 + slots[lo] * chunk_seconds), 6)
+                chunks.append(EEGReadingChunk(
+                    session=session, seq=seq, count=hi - lo,
+                    start_at=datetime.fromtimestamp(start, tz=dt_timezone.utc),
+                    end_at=datetime.fromtimestamp(start + chunk_seconds, tz=dt_timezone.utc),
+                    data=pack_chunk(part, start),
+                ))
+        EEGReadingChunk.objects.bulk_create(chunks, batch_size=100)
+        EEGReading.objects.filter(session=session).delete()
+        session.storage = 'chunks'
+        session.save(update_fields=['storage'])
+    return len(arrays), len(chunks), sum(len(c.data) for c in chunks)
@@ -0,0 +1,152 @@
+import math
+import numpy as np
+from django.db import connection
+from django.db.models import Avg, Count, F, Max, Min, Q, StdDev
+from django.utils import timezone
+from apps.pages.models import EEGReading, EEGSession, EEGSessionSummary
+from .eeg_store import read_session
+from .eeg_analytics import compute_analytics
+
+STATS = (('mean', Avg), ('min', Min), ('max', Max), ('std', StdDev))
+SUMMARY_FIELDS = [f"{metric}_{stat}" for metric in EEGSessionSummary.METRICS for stat, _ in STATS]
+
+
+def _summary_from_arrays(summary, arrays):
+    summary.reading_count = len(arrays)
+    for metric in EEGSessionSummary.METRICS:
+        values = arrays[metric][~np.isnan(arrays[metric])].astype(np.float64)
+        if not len(values):
+            continue
+        setattr(summary, f"{metric}_mean", float(values.mean()))
+        setattr(summary, f"{metric}_min", float(values.min()))
+        setattr(summary, f"{metric}_max", float(values.max()))
+        setattr(summary, f"{metric}_std", float(values.std()))
+    labels, counts = np.unique(arrays.labels(), return_counts=True)
+    summary.emotion_histogram = {label: int(n) for label, n in zip(labels, counts) if label}
+
+
+def compute_summaries(session_ids):
+    """Unsaved EEGSessionSummary per session id.
+
+    Row-stored sessions use two grouped queries over EEGReading; packed
+    sessions (EEGReadingChunk) are aggregated in NumPy.
+    """
+    session_ids = list(session_ids)
+    summaries = {sid: EEGSessionSummary(session_id=sid) for sid in session_ids}
+    if not session_ids:
+        return summaries
+    for session in EEGSession.objects.filter(id__in=session_ids, storage='chunks').only('id', 'storage'):
+        _summary_from_arrays(summaries[session.id], read_session(session))
+        session_ids.remove(session.id)
+    if not session_ids:
+        return summaries
+
+    aggregates = {
+        f"{metric}_{stat}": func(metric)
+        for metric in EEGSessionSummary.METRICS for stat, func in STATS
+    }
+    # SQLite's STDDEV_POP (a Django Python function) chokes on NULLs; derive it
+    # from AVG(x²) - AVG(x)², which skips them like the native aggregate does
+    emulate_std = connection.vendor == 'sqlite'
+    if emulate_std:
+        for metric in EEGSessionSummary.METRICS:
+            aggregates[f"{metric}_std"] = Avg(F(metric) * F(metric) * 1.0)
+    rows = (
+        EEGReading.objects.filter(session_id__in=session_ids)
+        .order_by().values('session_id')
+        .annotate(reading_count=Count('id'), **aggregates)
+    )
+    for row in rows:
+        summary = summaries[row.pop('session_id')]
+        for field, value in row.items():
+            setattr(summary, field, value)
+        if emulate_std:
+            for metric in EEGSessionSummary.METRICS:
+                mean, mean_sq = row[f"{metric}_mean"], row[f"{metric}_std"]
+                std = None if mean is None else math.sqrt(max(mean_sq - mean * mean, 0.0))
+                setattr(summary, f"{metric}_std", std)
+
+    histogram = (
+        EEGReading.objects.filter(session_id__in=session_ids).exclude(emotion_label='')
+        .order_by().values('session_id', 'emotion_label').annotate(n=Count('id'))
+    )
+    for row in histogram:
+        summaries[row['session_id']].emotion_histogram[row['emotion_label']] = row['n']
+    return summaries
+
+
+def save_summaries(summaries):
+    EEGSessionSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['session'],
+        update_fields=['reading_count', 'emotion_histogram', 'analytics', 'computed_at'] + SUMMARY_FIELDS,
+    )
+
+
+def _add_analytics(summaries):
+    """Fill summary.analytics for each {session_id: summary} (one read_session per session)."""
+    for session in EEGSession.objects.filter(id__in=list(summaries)).only('id', 'storage'):
+        summaries[session.id].analytics = compute_analytics(read_session(session))
+
+
+def summarize_sessions(session_ids):
+    """Compute and store the summaries (and analytics) of the given (ended) sessions."""
+    summaries = compute_summaries(session_ids)
+    _add_analytics(summaries)
+    save_summaries(list(summaries.values()))
+    return list(summaries.values())
+
+
+def session_summaries(sessions):
+    """Summary per session id for the given sessions, without writing anything.
+
+    Stored summaries are used as is. Missing ones (sessions still recording, or
+    closed directly by the desktop app and not yet backfilled by
+    summarize_missing) are computed in one pass and returned unsaved.
+    """
+    result, missing = {}, []
+    for s in sessions:
+        try:
+            result[s.id] = s.summary
+        except EEGSessionSummary.DoesNotExist:
+            missing.append(s)
+    if missing:
+        result.update(compute_summaries(s.id for s in missing))
+    return result
+
+
+def summarize_missing(limit=50):
+    """Store the summaries of up to `limit` ended sessions that lack one.
+
+    Those are sessions closed directly by the desktop app, or summarized before
+    analytics were stored; run_worker calls this periodically so report pages
+    never write. Returns how many were stored.
+    """
+    ids = list(
+        EEGSession.objects.filter(ended_at__isnull=False)
+        .filter(Q(summary__isnull=True) | Q(summary__analytics={}))
+        .order_by('id').values_list('id', flat=True)[:limit]
+    )
+    if ids:
+        summarize_sessions(ids)
+    return len(ids)
+
+
+def dominant_emotion(histogram):
+    """Most frequent label, as the desktop app computes it on close ('' if none)."""
+    if not histogram:
+        return ''
+    return max(histogram.items(), key=lambda item: item[1])[0]
+
+
+def close_session(session, ended_at=None):
+    """End a session: set ended_at and dominant_emotion and store its summary and analytics."""
+    summary = compute_summaries([session.id])[session.id]
+    summary.analytics = compute_analytics(read_session(session))
+    session.ended_at = ended_at or timezone.now()
+    if not session.dominant_emotion:
+        session.dominant_emotion = dominant_emotion(summary.emotion_histogram)
+    session.save(update_fields=['ended_at', 'dominant_emotion'])
+    save_summaries([summary])
+    return summary
@@ -0,0 +1,31 @@
+from django.db.models import F, Q
+from django.utils import timezone
+from apps.pages.models import Consultation, Patient
+from .calendar_feed import bump_feed_version
+
+# How often run_worker sweeps by default; a consultation can show as
+# 'pending' for up to this long after its start time
+SWEEP_INTERVAL = 60
+
+
+def sweep_no_shows(now=None):
+    """Mark pending consultations whose start time has passed as no_show.
+
+    The due rows are found over the (status, date, time) index: only rows
+    still pending and already past are touched, so repeated sweeps cost an
+    index probe. Their patients get one clinical_revision bump each.
+    Returns the number of consultations marked.
+    """
+    now = timezone.localtime(now)
+    due = list(Consultation.objects.filter(status='pending', date__lte=now.date()).filter(
+        Q(date__lt=now.date()) | Q(time__lt=now.time())
+    ).values_list('id', 'patient_id'))
+    if not due:
+        return 0
+    expired = Consultation.objects.filter(id__in=[cid for cid, _ in due], status='pending').update(status='no_show')
+    if expired:
+        # Bulk UPDATEs skip post_save, so do what the Consultation receivers
+        # would: invalidate cached calendar feeds and the patients' AI context
+        bump_feed_version()
+        Patient.objects.filter(id__in={pid for _, pid in due}).update(clinical_revision=F('clinical_revision') + 1)
+    return expired
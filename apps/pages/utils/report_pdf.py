@@ -0,0 +1,126 @@
+import hashlib
+import io
+import os
+import tempfile
+from functools import lru_cache
+import markdown as md
+from django.conf import settings
+from django.template.loader import get_template, render_to_string
+
+# Rendered summary PDFs are cached on disk under a key built from everything the
+# PDF shows: the thread, the summary message and when it was generated, the
+# patient/professional names and a hash of the PDF template. Any change yields a
+# new key, so cached files never need invalidating.
+PDF_TEMPLATE = 'pages/report_sessions_pdf.html'
+
+
+@lru_cache(maxsize=1)
+def template_hash():
+    origin = get_template(PDF_TEMPLATE).origin.name
+    with open(origin, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def summary_message(thread):
+    """Latest assistant message marked as a formal summary; fallback to any assistant message."""
+    last_summary = thread.messages.filter(role='assistant', is_summary=True).order_by('-created_at').first()
+    if not last_summary:
+        last_summary = thread.messages.filter(role='assistant').order_by('-created_at').first()
+    return last_summary
+
+
+def _names_hash(thread):
+    p, pro = thread.patient, thread.professional
+    names = '|'.join([p.first_name, p.last_name, pro.first_name, pro.last_name])
+    return hashlib.sha256(names.encode('utf-8')).hexdigest()[:8]
+
+
+def cache_key(thread, message):
+    generated = int(message.created_at.timestamp()) if message else 0
+    return f"{thread.id}_{message.id if message else 0}_{generated}_{_names_hash(thread)}_{template_hash()}"
+
+
+def etag_for(thread, message):
+    return f'"{cache_key(thread, message)}"'
+
+
+def _cache_path(key):
+    return os.path.join(settings.REPORT_PDF_CACHE_DIR, f"{key}.pdf")
+
+
+def render_summary_html(thread, message):
+    content_md = message.content if message else 'No hay resumen disponible.'
+    return render_to_string(PDF_TEMPLATE, {
+        'patient': thread.patient,
+        'professional': thread.professional,
+        'content_html': md.markdown(content_md),
+        'thread': thread,
+        # The summary's own timestamp, not the render time, so the cached file stays accurate
+        'generated_at': message.created_at if message else None,
+    })
+
+
+def _render_pdf(html):
+    """PDF bytes for `html`, or None if xhtml2pdf failed."""
+    try:
+        from xhtml2pdf import pisa
+        result = io.BytesIO()
+        status = pisa.CreatePDF(src=html, dest=result, encoding='utf-8')
+        if status.err:
+            return None
+    except Exception:
+        return None
+    return result.getvalue()
+
+
+def open_summary_pdf(thread, message=None):
+    """Open the thread's summary PDF, rendering it into the cache if needed.
+
+    Returns (file, None) on success or (None, html) if PDF generation failed,
+    so callers can fall back to serving the HTML. The caller closes the file.
+    """
+    if message is None:
+        message = summary_message(thread)
+    path = _cache_path(cache_key(thread, message))
+    try:
+        # Once open, the file stays readable even if a newer render removes it
+        return open(path, 'rb'), None
+    except FileNotFoundError:
+        pass
+
+    html = render_summary_html(thread, message)
+    data = _render_pdf(html)
+    if data is None:
+        return None, html
+    _store(thread, path, data)
+    return io.BytesIO(data), None
+
+
+def ensure_summary_pdf(thread, message=None):
+    """Render the thread's summary PDF into the cache unless it is already there."""
+    f, _ = open_summary_pdf(thread, message)
+    if f is None:
+        return False
+    f.close()
+    return True
+
+
+def _store(thread, path, data):
+    os.makedirs(settings.REPORT_PDF_CACHE_DIR, exist_ok=True)
+    # Write then rename, so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=settings.REPORT_PDF_CACHE_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    _remove_older(thread, keep=path)
+
+
+def _remove_older(thread, keep):
+    prefix = f"{thread.id}_"
+    for name in os.listdir(settings.REPORT_PDF_CACHE_DIR):
+        full = os.path.join(settings.REPORT_PDF_CACHE_DIR, name)
+        if name.startswith(prefix) and name.endswith('.pdf') and full != keep:
+            try:
+                os.remove(full)
+            except OSError:
+                pass
@@ -0,0 +1,14 @@
+from django.conf import settings
+
+# Backends whose entries live inside one process. Caches invalidated by
+# version keys (calendar feeds, ...) must be skipped with these: a bump in
+# one web worker or in run_worker would never reach the other processes.
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    """True when every process sees the same entries in this cache alias."""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
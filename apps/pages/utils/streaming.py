@@ -0,0 +1,35 @@
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+# Items pulled from the sync iterator per thread hop under ASGI
+ASYNC_BATCH = 100
+
+
+def streaming_content(request, iterator, batch=ASYNC_BATCH):
+    """Body for a StreamingHttpResponse that also streams under ASGI.
+
+    Under ASGI Django consumes a sync iterator with sync_to_async(list), i.e.
+    buffers the whole body before sending it. There the iterator is wrapped
+    in an async generator that pulls `batch` items per hop; the hops are
+    thread-sensitive, so ORM iterators keep running on one connection.
+    """
+    if not isinstance(request, ASGIRequest):
+        return iterator
+    return _async_batches(iter(iterator), batch)
+
+
+async def _async_batches(iterator, batch):
+    next_batch = sync_to_async(lambda: list(islice(iterator, batch)))
+    try:
+        while True:
+            items = await next_batch()
+            if not items:
+                return
+            for item in items:
+                yield item
+    finally:
+        # Client gone mid-stream: release the generator's cursor now, not at GC
+        close = getattr(iterator, 'close', None)
+        if close:
+            await sync_to_async(close)()
@@ -5,27 +5,31 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import views as auth_views
 from django.contrib.auth import update_session_auth_hash
 from django.db import IntegrityError
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, Q
 from .models import Patient, Professional, Consultation, ConsultationNote, ConsultationAttachment, Consultorio
-from .models import PatientAIThread, PatientAIMessage, Specialty, EEGSession, EEGReading
+from .models import PatientAIThread, PatientAIMessage, Specialty, EEGSession, Job
 from django.contrib import messages
 from .forms import CustomLoginForm, UsernameRecoveryForm
 from .forms import ProfessionalProfileForm, ProfessionalContactForm
 from .forms import AvailabilityExceptionForm
-from django.http import JsonResponse, HttpResponse
-from django.template.loader import render_to_string
-import io
-import time
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, FileResponse
+from django.core.cache import cache
+import json
 import logging
-import markdown as md
+import numpy as np
 
 logger = logging.getLogger(__name__)
-from datetime import datetime as dt, date as ddate
-from .utils.availability import generate_slots
+from datetime import datetime as dt, date as ddate, timezone as dt_timezone
+from .utils.availability import generate_slots, generate_slots_range
+from .utils.calendar_feed import feed_cache_key, stream_events
+from .utils.streaming import streaming_content
+from .ai import openai_client, build_patient_context
+from .ai import acquire_conversation, release_conversation, chat_request, log_usage, stream_chat_answer
+from .utils.report_pdf import summary_message, open_summary_pdf, etag_for as pdf_etag
+from . import jobs
 from datetime import time as dtime
 from django.utils import timezone
 import os
-from openai import OpenAI
 from django.conf import settings
 
 # Create your views here.
@@ -84,21 +88,12 @@ def index(request):
             if professional else []
         )
 
-    # Pending payment requests (admin only) — single annotated query instead
-    # of loading every request and running one SUM query per row (N+1)
+    # Pending payment requests (admin only) — indexed filter on the stored status
     pending_payments_count = 0
     if is_admin:
         try:
             from apps.finance.models import PaymentRequest
-            from django.db.models import Sum, Q, F
-            from django.db.models.functions import Coalesce
-            from decimal import Decimal
-            pending_payments_count = (
-                PaymentRequest.objects
-                .annotate(paid=Coalesce(Sum('payments__amount'), Decimal('0.00')))
-                .filter(Q(expected_amount__isnull=True) | Q(expected_amount=0) | Q(paid__lt=F('expected_amount')))
-                .count()
-            )
+            pending_payments_count = PaymentRequest.objects.exclude(status='paid').count()
         except Exception:
             pending_payments_count = 0
 
@@ -721,10 +716,8 @@ def consult(request):
     # Get all professionals for admin selection (exclude secretaries from clinical dropdowns)
     all_professionals = Professional.objects.exclude(role='secretary') if is_admin else None
 
-    # Auto update: mark past pending as no_show (bulk UPDATEs, not row-by-row)
-    now_dt = datetime.now()
-    Consultation.objects.filter(date__lt=now_dt.date(), status='pending').update(status='no_show')
-    Consultation.objects.filter(date=now_dt.date(), time__lt=now_dt.time(), status='pending').update(status='no_show')
+    # Past pending consultations are marked no_show by the sweeper
+    # (utils.no_show, run by run_worker / sweep_no_shows), not on page load
 
     # Get consultations with filters (select_related avoids one query per row
     # when the template renders patient/professional/consultorio names)
@@ -1037,34 +1030,78 @@ def profile(request):
     })
 
 
-@login_required
-def available_slots_api(request):
+# Upper bound for the range mode of available_slots_api (a calendar month view
+# plus its leading/trailing weeks fits comfortably)
+MAX_SLOTS_RANGE_DAYS = 62
+
+
+def _slots_params(request, is_admin):
+    """Parse and validate an available_slots_api request (shared with async_views).
+
+    Returns (params, None) or (None, error JsonResponse). params['lookup'] holds
+    the Professional filter to run, or None when an admin has not picked one yet.
+    """
     # Params: date (YYYY-MM-DD), duration (int minutes), professional_id(optional for admin)
+    # Range mode: start + end (YYYY-MM-DD, inclusive) instead of date, answered in one pass
     date_str = request.GET.get('date')
+    start_str = request.GET.get('start')
+    end_str = request.GET.get('end')
     duration = int(request.GET.get('duration', '60'))
     prof_id = request.GET.get('professional_id')
-    if not date_str:
-        return JsonResponse({'error': 'Missing date'}, status=400)
+    range_mode = bool(start_str and end_str)
+    if not date_str and not range_mode:
+        return None, JsonResponse({'error': 'Missing date'}, status=400)
     try:
-        date_obj = dt.strptime(date_str, '%Y-%m-%d').date()
+        if range_mode:
+            start_date = dt.strptime(start_str[:10], '%Y-%m-%d').date()
+            end_date = dt.strptime(end_str[:10], '%Y-%m-%d').date()
+        else:
+            start_date = end_date = dt.strptime(date_str, '%Y-%m-%d').date()
     except ValueError:
-        return JsonResponse({'error': 'Invalid date format'}, status=400)
+        return None, JsonResponse({'error': 'Invalid date format'}, status=400)
+    if range_mode and (end_date < start_date or (end_date - start_date).days > MAX_SLOTS_RANGE_DAYS):
+        return None, JsonResponse({'error': 'Invalid date range'}, status=400)
 
     # Determine professional
-    if request.user.is_staff or _is_secretary(request.user):
-        if not prof_id:
-            # For admin, require explicit professional selection; return empty list (no error)
-            return JsonResponse({'slots': []})
-        professional = get_object_or_404(Professional, id=prof_id)
+    if is_admin:
+        # For admin, require explicit professional selection; return empty list (no error)
+        lookup = {'id': prof_id} if prof_id else None
     else:
-        try:
-            professional = Professional.objects.get(user=request.user)
-        except Professional.DoesNotExist:
-            return JsonResponse({'error': 'Professional not found'}, status=404)
+        lookup = {'user': request.user}
+    return {
+        'range_mode': range_mode, 'start': start_date, 'end': end_date,
+        'duration': duration, 'lookup': lookup,
+    }, None
+
+
+SLOTS_PROFESSIONAL_NOT_FOUND = {'error': 'Professional not found'}
+
+
+def _slots_response(params, result):
+    """JSON body for available_slots_api; `result` is None when there is nothing to list."""
+    if params['range_mode']:
+        return JsonResponse({'days': {d.isoformat(): slots for d, slots in (result or {}).items()}})
+    return JsonResponse({'slots': result or []})
+
+
+@login_required
+def available_slots_api(request):
+    params, error = _slots_params(request, request.user.is_staff or _is_secretary(request.user))
+    if error:
+        return error
+    if params['lookup'] is None:
+        return _slots_response(params, None)
+    professional = Professional.objects.filter(**params['lookup']).first()
+    if not professional:
+        return JsonResponse(SLOTS_PROFESSIONAL_NOT_FOUND, status=404)
 
     # Always step in 30 minute increments regardless of duration
-    slots = generate_slots(professional, date_obj, duration_minutes=duration, step_minutes=30)
-    return JsonResponse({'slots': slots})
+    if params['range_mode']:
+        result = generate_slots_range(professional, params['start'], params['end'],
+                                      duration_minutes=params['duration'], step_minutes=30)
+    else:
+        result = generate_slots(professional, params['start'], duration_minutes=params['duration'], step_minutes=30)
+    return _slots_response(params, result)
 
 
 def staff_required(view_func):
@@ -1164,126 +1201,16 @@ def consult_table(request):
 
 @login_required
 def consultorios_calendar(request):
-    # Params
-    date_str = request.GET.get('date')
-    mode = request.GET.get('mode', 'day')
-    try:
-        target_date = dt.strptime(date_str, '%Y-%m-%d').date() if date_str else ddate.today()
-    except Exception:
-        target_date = ddate.today()
-
+    # The grid itself is drawn by FullCalendar from calendar_events_api; this
+    # view only renders the page shell and the drawer/shading data below
     consultorio_id = request.GET.get('consultorio')
-    if consultorio_id and str(consultorio_id).isdigit():
-        consultorios = list(Consultorio.objects.filter(id=int(consultorio_id)))
-    else:
-        consultorios = list(Consultorio.objects.filter(is_active=True))
-
-    from datetime import time as dtime
-    start_time = dtime(7, 0); end_time = dtime(21, 0); step_minutes = 30
-    total_slots = int(((end_time.hour*60 + end_time.minute) - (start_time.hour*60 + start_time.minute)) / step_minutes)
-    times = []
-    base_minutes = start_time.hour*60 + start_time.minute
-    for i in range(total_slots):
-        minutes = base_minutes + i*step_minutes
-        h = minutes // 60; m = minutes % 60
-        times.append(f"{h:02d}:{m:02d}")
-
-    day_rows = []
-    week_days = []
-    week_grid = []
-    month_weeks = []
-    month_map = {}
-
-    if mode == 'day':
-        columns_rows = {}
-        for c in consultorios:
-            rows = [None] * total_slots
-            qs = Consultation.objects.filter(date=target_date).filter(consultorio_fk=c)
-            if not qs.exists():
-                qs = Consultation.objects.filter(date=target_date, consultory=c.name)
-            for cons in qs.order_by('time'):
-                idx = int(((cons.time.hour*60 + cons.time.minute) - base_minutes) / step_minutes)
-                if idx < 0 or idx >= total_slots:
-                    continue
-                span = cons.duration or 60
-                span = int((span + step_minutes - 1) / step_minutes)
-                span = min(span, max(1, total_slots - idx))
-                if rows[idx] is None:
-                    rows[idx] = {'type': 'start', 'consult': cons, 'rowspan': span}
-                    for k in range(1, span):
-                        if idx + k < total_slots:
-                            rows[idx + k] = {'type': 'skip'}
-            columns_rows[c.id] = rows
-        for i, t in enumerate(times):
-            row_cells = []
-            for c in consultorios:
-                cell = columns_rows[c.id][i]
-                row_cells.append(cell if cell is not None else {'type': 'empty'})
-            day_rows.append({'time': t, 'cells': row_cells})
-
-    elif mode == 'week':
-        start_week = target_date - timedelta(days=target_date.weekday())
-        week_days = [start_week + timedelta(days=d) for d in range(7)]
-        selected = None
-        if consultorio_id and str(consultorio_id).isdigit():
-            selected = Consultorio.objects.filter(id=int(consultorio_id)).first()
-        if not selected and consultorios:
-            selected = consultorios[0]
-        for t in times:
-            row_cells = []
-            hour, minute = [int(x) for x in t.split(':')]
-            for day in week_days:
-                qs = Consultation.objects.filter(date=day)
-                if selected:
-                    qs = qs.filter(consultorio_fk=selected) | qs.filter(consultory=selected.name)
-                match = qs.filter(time__hour=hour, time__minute=minute).order_by('time').first()
-                if match:
-                    row_cells.append({'type': 'start', 'consult': match, 'rowspan': 1})
-                else:
-                    row_cells.append({'type': 'empty'})
-            week_grid.append({'time': t, 'cells': row_cells})
-
-    elif mode == 'month':
-        first_day = target_date.replace(day=1)
-        start_cal = first_day - timedelta(days=first_day.weekday())
-        for w in range(6):
-            week_days_row = [start_cal + timedelta(days=w*7 + d) for d in range(7)]
-            month_weeks.append(week_days_row)
-        end_cal = month_weeks[-1][-1]
-        qs_month = Consultation.objects.filter(date__gte=month_weeks[0][0], date__lte=end_cal)
-        if consultorio_id and str(consultorio_id).isdigit():
-            qs_month = qs_month.filter(consultorio_fk_id=int(consultorio_id))
-        for cons in qs_month.select_related('patient'):
-            month_map.setdefault(cons.date, []).append(cons)
-
-    # Restrict for professionals (non-staff, non-secretary)
-    if not (request.user.is_staff or _is_secretary(request.user)):
-        prof = Professional.objects.filter(user=request.user).first()
-        pid = prof.id if prof else None
-        if mode == 'day':
-            for r in day_rows:
-                for cell in r['cells']:
-                    if cell.get('type') == 'start' and cell['consult'].professional_id != pid:
-                        cell.clear(); cell['type'] = 'empty'
-        elif mode == 'week':
-            for r in week_grid:
-                for cell in r['cells']:
-                    if cell.get('type') == 'start' and cell['consult'].professional_id != pid:
-                        cell.clear(); cell['type'] = 'empty'
-        elif mode == 'month':
-            for d, items in list(month_map.items()):
-                month_map[d] = [c for c in items if c.professional_id == pid]
-                if not month_map[d]:
-                    month_map.pop(d, None)
+
+    restrict = not (request.user.is_staff or _is_secretary(request.user))
+    prof = _get_professional(request.user) if restrict else None
 
     # Data for the "Nueva Cita" offcanvas drawer
-    cal_is_admin = request.user.is_staff or _is_secretary(request.user)
-    cal_professional = None
-    if not cal_is_admin:
-        try:
-            cal_professional = Professional.objects.get(user=request.user)
-        except Professional.DoesNotExist:
-            pass
+    cal_is_admin = not restrict
+    cal_professional = prof
     cal_patients = Patient.objects.all() if cal_is_admin else Patient.objects.filter(professional=cal_professional)
     cal_all_professionals = Professional.objects.exclude(role='secretary') if cal_is_admin else None
     all_active_consultorios = Consultorio.objects.filter(is_active=True)
@@ -1330,16 +1257,7 @@ def consultorios_calendar(request):
 
     context = {
         'segment': 'consultorios_calendar',
-        'consultorios': consultorios,
-        'times': times,
-        'day_rows': day_rows,
-        'week_days': week_days,
-        'week_grid': week_grid,
-        'month_weeks': month_weeks,
-        'month_map': month_map,
-        'target_date': target_date,
         'selected_consultorio_id': int(consultorio_id) if consultorio_id and str(consultorio_id).isdigit() else '',
-        'mode': mode,
         # Offcanvas form data
         'is_admin': cal_is_admin,
         'professional': cal_professional,
@@ -1383,77 +1301,57 @@ def patient_color_update_api(request, patient_id):
     pat.save(update_fields=['color'])
     return JsonResponse({'ok': True, 'message': 'Color actualizado', 'color': color})
 
-def _fallback_color(pid: int):
-    palette = ['#D4E157','#4FC3F7','#FFB74D','#BA68C8','#81C784','#64B5F6','#E57373','#FFD54F','#4DB6AC','#A1887F']
-    return palette[pid % len(palette)]
-
 @login_required
 def calendar_events_api(request):
     """Return consultations as FullCalendar events.
     Optional query params: consultorio (id), start, end (ISO dates)
+
+    The JSON array is streamed from a values() projection and cached per
+    (user scope, consultorio, range, exclude); see utils.calendar_feed.
     """
     consultorio_id = request.GET.get('consultorio')
     start_str = request.GET.get('start')
     end_str = request.GET.get('end')
     exclude_str = request.GET.get('exclude')  # comma separated statuses to hide
-    qs = Consultation.objects.all().select_related('patient','professional','consultorio_fk')
+    qs = Consultation.objects.all()
     if consultorio_id and consultorio_id.isdigit():
-        qs = qs.filter(consultorio_fk_id=int(consultorio_id)) | qs.filter(consultory=Consultorio.objects.filter(id=int(consultorio_id)).values_list('name', flat=True).first())
+        consultorio_names = Consultorio.objects.filter(id=int(consultorio_id)).values('name')
+        qs = qs.filter(Q(consultorio_fk_id=int(consultorio_id)) | Q(consultory__in=consultorio_names))
+    else:
+        consultorio_id = ''
     # Date range filtering
+    start_date = end_date = None
     if start_str and end_str:
         try:
             start_date = dt.strptime(start_str[:10], '%Y-%m-%d').date()
             end_date = dt.strptime(end_str[:10], '%Y-%m-%d').date()
             qs = qs.filter(date__gte=start_date, date__lte=end_date)
         except Exception:
-            pass
+            start_date = end_date = None
     # Status exclusion
+    to_exclude = []
     if exclude_str:
         to_exclude = [s.strip() for s in exclude_str.split(',') if s.strip()]
         if to_exclude:
             qs = qs.exclude(status__in=to_exclude)
     # Restrict for non-staff, non-secretary professionals
+    scope = 'all'
     if not (request.user.is_staff or _is_secretary(request.user)):
-        prof = Professional.objects.filter(user=request.user).first()
+        prof = _get_professional(request.user)
         if prof:
             qs = qs.filter(professional=prof)
+            scope = f'prof:{prof.id}'
         else:
-            qs = qs.none()
-
-    events = []
-    for c in qs:
-        if not c.time:
-            continue
-        start_dt = dt.combine(c.date, c.time)
-        end_dt = start_dt + timedelta(minutes=c.duration or 60)
-        patient = c.patient
-        color = patient.color if patient and patient.color else _fallback_color(patient.id if patient else c.id)
-        professional = c.professional
-        consultorio_name = c.consultorio_fk.name if c.consultorio_fk else c.consultory
-        patient_name = ((patient.first_name + ' ' + patient.last_name).strip()) if patient else 'Consulta'
-        professional_name = ((professional.first_name + ' ' + professional.last_name).strip()) if professional else ''
-        events.append({
-            'id': c.id,
-            'title': patient_name,
-            'start': start_dt.isoformat(),
-            'end': end_dt.isoformat(),
-            'extendedProps': {
-                'status': c.status,
-                'statusDisplay': c.get_status_display() if hasattr(c, 'get_status_display') else c.status,
-                'consultorio': consultorio_name,
-                'consultorioId': c.consultorio_fk_id if c.consultorio_fk_id else None,
-                'patientId': patient.id if patient else None,
-                'patientName': patient_name,
-                'professionalId': professional.id if professional else None,
-                'professionalName': professional_name,
-                'duration': c.duration,
-                'charge': c.charge,
-                'notes': c.notes or '',
-            },
-            'backgroundColor': color,
-            'borderColor': color,
-        })
-    return JsonResponse(events, safe=False)
+            return JsonResponse([], safe=False)
+
+    cache_key = feed_cache_key(scope, consultorio_id, start_date, end_date, to_exclude)
+    cached = cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return HttpResponse(cached, content_type='application/json')
+    return StreamingHttpResponse(
+        streaming_content(request, stream_events(qs.order_by('date', 'time'), cache_key=cache_key)),
+        content_type='application/json',
+    )
 
 @login_required
 def consultation_time_update_api(request, consultation_id):
@@ -1654,122 +1552,6 @@ def _is_psychologist(user):
     return prof is not None and prof.role in PSYCHOLOGIST_ROLES
 
 
-def _build_patient_context(professional: Professional, patient: Patient) -> str:
-    cons_qs = Consultation.objects.filter(professional=professional, patient=patient).order_by('date', 'time')
-    note_qs = ConsultationNote.objects.filter(consultation__in=cons_qs).select_related('consultation')
-    att_qs = ConsultationAttachment.objects.filter(consultation__in=cons_qs).select_related('consultation')
-    parts = []
-    parts.append(f"Paciente: {patient.first_name} {patient.last_name}\n")
-    parts.append(f"Total de consultas: {cons_qs.count()}\n")
-    for c in cons_qs:
-        parts.append(f"- Consulta: {c.date} {c.time}, estado={c.get_status_display()}, duración={c.duration} min\n")
-        notes = [n for n in note_qs if n.consultation_id == c.id]
-        if notes:
-            parts.append("  Notas:\n")
-            for n in notes:
-                title = (n.title or '').strip()
-                tshow = f"{title}: " if title else ''
-                parts.append(f"   • {tshow}{(n.content or '').strip()[:500]}\n")
-        atts = [a for a in att_qs if a.consultation_id == c.id]
-        if atts:
-            parts.append("  Adjuntos:\n")
-            for a in atts:
-                parts.append(f"   • {a.get_file_type_display()} - {a.display_name or a.file.name}\n")
-    return ''.join(parts)
-
-
-def _openai_client():
-    api_key = os.environ.get('OPENAI_API_KEY')
-    if not api_key:
-        return None
-    try:
-        return OpenAI(api_key=api_key)
-    except Exception:
-        return None
-
-
-def _ensure_openai_file(client: OpenAI, attachment: ConsultationAttachment) -> str:
-    """Upload file to OpenAI Files API if missing, return file_id."""
-    if attachment.openai_file_id:
-        return attachment.openai_file_id
-    try:
-        # Use absolute path from FileField
-        local_path = attachment.file.path
-        with open(local_path, 'rb') as f:
-            fobj = client.files.create(file=f, purpose='user_data')
-        file_id = getattr(fobj, 'id', None) or (fobj.get('id') if isinstance(fobj, dict) else None)
-        if file_id:
-            attachment.openai_file_id = file_id
-            attachment.save(update_fields=['openai_file_id'])
-        return file_id
-    except Exception:
-        return None
-
-
-def _collect_attachment_file_ids(client: OpenAI, professional: Professional, patient: Patient):
-    """Return list of OpenAI file_ids for this patient's attachments, uploading if needed."""
-    file_ids = []
-    cons_qs = Consultation.objects.filter(professional=professional, patient=patient)
-    atts = ConsultationAttachment.objects.filter(consultation__in=cons_qs)
-    for att in atts:
-        fid = _ensure_openai_file(client, att)
-        if fid:
-            file_ids.append(fid)
-    return file_ids
-
-
-def _ensure_patient_vector_store(client: OpenAI, thread, prof: Professional, patient: Patient, context_text: str = None) -> str:
-    """
-    Create (or recreate) a per-patient Vector Store containing:
-      - A plain-text file with all clinical notes/consultations (full context)
-      - All uploaded attachment files (PDFs, images, docs)
-
-    The Vector Store powers the file_search tool so the model retrieves only
-    relevant chunks per query instead of receiving the entire context every turn.
-    This is the standard RAG (Retrieval-Augmented Generation) pattern used in
-    professional clinical AI systems.
-
-    Returns the new vector_store_id and saves it to thread.openai_vector_store_id.
-    """
-    # Delete the old vector store to avoid orphaned OpenAI storage costs
-    if thread.openai_vector_store_id:
-        try:
-            client.vector_stores.delete(thread.openai_vector_store_id)
-        except Exception:
-            pass  # Already deleted or not found — safe to ignore
-
-    # Build clinical notes text (re-use already-built context if provided)
-    if context_text is None:
-        context_text = _build_patient_context(prof, patient)
-
-    # Upload clinical notes as a searchable .txt file
-    notes_filename = f"notas_clinicas_{patient.id}_{patient.last_name}.txt"
-    notes_file = client.files.create(
-        file=(notes_filename, io.BytesIO(context_text.encode('utf-8')), 'text/plain'),
-        purpose='assistants',
-    )
-
-    # Collect all attachment file IDs (uploads to OpenAI Files API if not already there)
-    attachment_file_ids = _collect_attachment_file_ids(client, prof, patient)
-    all_file_ids = [notes_file.id] + attachment_file_ids
-
-    # Create the vector store with a 90-day rolling expiration
-    vs = client.vector_stores.create(
-        name=f"paciente_{patient.id}_{patient.last_name}",
-        expires_after={"anchor": "last_active_at", "days": 90},
-    )
-
-    # Batch-index all files (blocks until indexing completes)
-    client.vector_stores.file_batches.create_and_poll(
-        vector_store_id=vs.id,
-        file_ids=all_file_ids,
-    )
-
-    thread.openai_vector_store_id = vs.id
-    thread.save(update_fields=['openai_vector_store_id'])
-    return vs.id
-
-
 @login_required
 def report_sessions_reupload(request):
     if _is_secretary(request.user):
@@ -1790,41 +1572,20 @@ def report_sessions_reupload(request):
         if not patient.professional_id or patient.professional_id != prof.id:
             return JsonResponse({'ok': False, 'error': 'No autorizado'}, status=403)
 
-    client = _openai_client()
-    if not client:
+    if not os.environ.get('OPENAI_API_KEY'):
         return JsonResponse({'ok': False, 'error': 'Falta OPENAI_API_KEY'}, status=400)
 
     cons_qs = Consultation.objects.filter(patient=patient)
     if not request.user.is_staff and prof:
         cons_qs = cons_qs.filter(professional=prof)
-    atts = list(ConsultationAttachment.objects.filter(consultation__in=cons_qs))
-    uploaded = 0
-    errors = []
-    for att in atts:
-        try:
-            # Force re-upload: ignore existing id, upload anew and overwrite
-            local_path = att.file.path
-            with open(local_path, 'rb') as f:
-                fobj = client.files.create(file=f, purpose='user_data')
-            file_id = getattr(fobj, 'id', None) or (fobj.get('id') if isinstance(fobj, dict) else None)
-            if file_id:
-                att.openai_file_id = file_id
-                att.save(update_fields=['openai_file_id'])
-                uploaded += 1
-        except Exception as e:
-            errors.append(f"{att.id}: {e}")
+    att_ids = list(ConsultationAttachment.objects.filter(consultation__in=cons_qs).values_list('id', flat=True))
 
-    # Rebuild the patient's vector store so the new files are indexed for RAG
+    # Uploads (and the vector-store refresh that follows) run in the worker;
+    # the page polls the job for progress.
     view_prof = prof or patient.professional
-    if view_prof:
-        thread = PatientAIThread.objects.filter(professional=view_prof, patient=patient).first()
-        if thread:
-            try:
-                _ensure_patient_vector_store(client, thread, view_prof, patient)
-            except Exception as e:
-                errors.append(f"vector_store: {e}")
-
-    return JsonResponse({'ok': True, 'uploaded': uploaded, 'total': len(atts), 'errors': errors})
+    thread = PatientAIThread.objects.filter(professional=view_prof, patient=patient).first() if view_prof else None
+    job = jobs.enqueue('reupload', {'attachment_ids': att_ids}, thread=thread, user=request.user)
+    return JsonResponse({'ok': True, 'total': len(att_ids), 'job_id': job.id})
 
 
 def _ai_summary_prompt(context: str) -> list:
@@ -1864,6 +1625,7 @@ def report_sessions(request):
     generated = None
     error = None
     info = None
+    pending_job = None
 
     if request.method == 'POST' and selected_patient:
         # Resolve professional for thread: current professional or patient's assigned professional (for staff)
@@ -1880,79 +1642,32 @@ def report_sessions(request):
             if created or not thread.model or thread.model in ('gpt-4o-mini', 'gpt-5'):
                 thread.model = 'gpt-5-mini'
                 thread.save(update_fields=['model'])
-            # Compute current stats and decide whether to rebuild context
-            cons_qs = Consultation.objects.filter(professional=thread_prof, patient=selected_patient)
-            cur_consult_count = cons_qs.count()
-            cur_last_consult = cons_qs.order_by('-date', '-time', '-id').first()
-            cur_note_count = ConsultationNote.objects.filter(consultation__in=cons_qs).count()
-            cur_att_count = ConsultationAttachment.objects.filter(consultation__in=cons_qs).count()
-
+            # Rebuild context only if the clinical record changed since it was built
             force = (request.POST.get('force') == '1')
-            unchanged = (
-                hasattr(thread, 'context_consult_count') and
-                thread.context_consult_count == cur_consult_count and
-                thread.context_note_count == cur_note_count and
-                thread.context_attachment_count == cur_att_count and
-                ((getattr(thread, 'context_last_consultation_id', None) or None) == (cur_last_consult.id if cur_last_consult else None))
-            )
-            if not force and unchanged:
+            revision = selected_patient.clinical_revision
+            if not force and thread.context_revision == revision:
                 info = 'No hay cambios desde el último resumen. Se mantiene el anterior.'
             else:
-                # Build context and persist tracking fields
-                context_text = _build_patient_context(thread_prof, selected_patient)
-                thread.context = context_text
-                if hasattr(thread, 'context_consult_count'):
-                    thread.context_consult_count = cur_consult_count
-                    thread.context_note_count = cur_note_count
-                    thread.context_attachment_count = cur_att_count
-                    thread.context_last_consultation = cur_last_consult
-                    thread.save(update_fields=['context', 'context_consult_count', 'context_note_count', 'context_attachment_count', 'context_last_consultation', 'updated_at'])
-                else:
-                    thread.save(update_fields=['context', 'updated_at'])
-
-            client = _openai_client()
-            if not client:
+                # Build context and persist what it covers
+                cons_qs = Consultation.objects.filter(professional=thread_prof, patient=selected_patient)
+                stats = cons_qs.aggregate(
+                    consults=Count('id', distinct=True),
+                    notes=Count('session_notes', distinct=True),
+                    attachments=Count('attachments', distinct=True),
+                )
+                thread.context = build_patient_context(thread_prof, selected_patient)
+                thread.context_revision = revision
+                thread.context_consult_count = stats['consults']
+                thread.context_note_count = stats['notes']
+                thread.context_attachment_count = stats['attachments']
+                thread.context_last_consultation = cons_qs.order_by('-date', '-time', '-id').first()
+                thread.save(update_fields=['context', 'context_revision', 'context_consult_count', 'context_note_count', 'context_attachment_count', 'context_last_consultation', 'updated_at'])
+
+            if not os.environ.get('OPENAI_API_KEY'):
                 error = 'Configura OPENAI_API_KEY para generar el resumen.'
-            else:
-                try:
-                    if not info:
-                        # Build per-patient vector store (RAG index: notes + attachments)
-                        # Pass the already-built context_text to avoid re-querying the DB
-                        vs_id = _ensure_patient_vector_store(
-                            client, thread, thread_prof, selected_patient,
-                            context_text=thread.context or None,
-                        )
-                        # Fresh conversation with a minimal system prompt (no huge context blob)
-                        conv = client.conversations.create(
-                            items=[{"role": "user", "content": [{"type": "input_text", "text": (
-                                "Eres un asistente clínico para profesionales de salud mental. "
-                                "Tienes acceso al expediente clínico completo del paciente "
-                                "mediante búsqueda semántica en los archivos. "
-                                "Usa esa información para responder con precisión clínica. "
-                                "Responde siempre en español."
-                            )}]}]
-                        )
-                        thread.openai_conversation_id = conv.id
-                        thread.save(update_fields=['openai_conversation_id'])
-                        # Generate initial structured summary via file_search tool
-                        resp = client.responses.create(
-                            model=thread.model or 'gpt-5-mini',
-                            input=[{"role": "user", "content": (
-                                "Genera el resumen clínico completo del paciente con: "
-                                "1) Historia clínica detallada basada en todas las consultas registradas. "
-                                "2) Breve resumen de la última sesión y dónde quedó. "
-                                "3) Recomendaciones prácticas y cautelas para la próxima sesión."
-                            )}],
-                            conversation=conv.id,
-                            tools=[{"type": "file_search", "vector_store_ids": [vs_id]}],
-                            reasoning={"effort": "low"},
-                        )
-                        content = getattr(resp, 'output_text', None) or ''
-                        if content:
-                            PatientAIMessage.objects.create(thread=thread, role='assistant', content=content, is_summary=True)
-                            generated = content
-                except Exception as e:
-                    error = f'Error al invocar OpenAI: {e}'
+            elif not info:
+                # Vector-store build + summary run in the worker; the page polls the job
+                pending_job = jobs.enqueue('summary', {'rebuild': force}, thread=thread, user=request.user)
 
     patients = Patient.objects.filter(professional=prof) if prof else Patient.objects.all()
     # Load thread and last messages if exists (respect staff fallback to patient's professional)
@@ -1961,6 +1676,8 @@ def report_sessions(request):
         if view_prof:
             thread = PatientAIThread.objects.filter(professional=view_prof, patient=selected_patient).first()
     messages_qs = thread.messages.all() if thread else []
+    if thread and not pending_job:
+        pending_job = thread.jobs.filter(status__in=('queued', 'running')).order_by('-created_at').first()
 
     return render(request, 'pages/report_sessions.html', {
         'segment': 'report_sessions',
@@ -1971,6 +1688,28 @@ def report_sessions(request):
         'generated': generated,
         'error': error,
         'info': info,
+        'pending_job': pending_job,
+    })
+
+
+@login_required
+def report_sessions_job_status(request, job_id):
+    if _is_secretary(request.user):
+        return JsonResponse({'ok': False, 'error': 'No autorizado'}, status=403)
+    job = Job.objects.select_related('thread').filter(id=job_id).first()
+    if not job:
+        return JsonResponse({'ok': False, 'error': 'Tarea no encontrada'}, status=404)
+    prof = _get_professional(request.user)
+    owns_thread = bool(prof and job.thread and job.thread.professional_id == prof.id)
+    if not (request.user.is_staff or owns_thread or job.created_by_id == request.user.id):
+        return JsonResponse({'ok': False, 'error': 'No autorizado'}, status=403)
+    return JsonResponse({
+        'ok': True,
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'error': job.error,
+        'result': job.result,
     })
 
 
@@ -2013,98 +1752,165 @@ def report_sessions_pdf(request):
         messages.error(request, 'Parámetros inválidos')
         return redirect('report_sessions')
 
-    # Pick latest assistant message marked as a formal summary; fallback to any assistant
-    last_summary = thread.messages.filter(role='assistant', is_summary=True).order_by('-created_at').first()
-    if not last_summary:
-        last_summary = thread.messages.filter(role='assistant').order_by('-created_at').first()
-    content_md = last_summary.content if last_summary else 'No hay resumen disponible.'
-    content_html = md.markdown(content_md)
-
-    html = render_to_string('pages/report_sessions_pdf.html', {
-        'patient': thread.patient,
-        'professional': thread.professional,
-        'content_html': content_html,
-        'thread': thread,
-    })
-    try:
-        from xhtml2pdf import pisa
-        result = io.BytesIO()
-        pisa.CreatePDF(src=html, dest=result, encoding='utf-8')
-        pdf_data = result.getvalue()
-        filename = f"Resumen_{thread.patient.first_name}_{thread.patient.last_name}.pdf"
-        resp = HttpResponse(pdf_data, content_type='application/pdf')
-        resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Cached PDFs are keyed by everything they show (summary, names, template);
+    # the same key is the ETag, so a browser holding the current file gets a 304
+    last_summary = summary_message(thread)
+    etag = pdf_etag(thread, last_summary)
+    if etag in [t.strip() for t in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+        resp = HttpResponse(status=304)
+        resp['ETag'] = etag
         return resp
-    except Exception:
+    pdf, html = open_summary_pdf(thread, last_summary)
+    if pdf is None:
         # Fallback: return HTML if PDF generation fails
         return HttpResponse(html)
+    filename = f"Resumen_{thread.patient.first_name}_{thread.patient.last_name}.pdf"
+    resp = FileResponse(pdf, as_attachment=True, filename=filename, content_type='application/pdf')
+    resp['ETag'] = etag
+    resp['Cache-Control'] = 'private, no-cache'
+    return resp
 
 
-@login_required
-def report_sessions_chat(request):
-    if _is_secretary(request.user):
-        return JsonResponse({'ok': False, 'error': 'No autorizado'}, status=403)
+def _chat_params(request, is_secretary):
+    """(thread_id, question, None) for a valid chat POST, else (None, None, JsonResponse).
+
+    Shared by the sync and async chat views, like the other _chat_* helpers.
+    """
+    if is_secretary:
+        return None, None, JsonResponse({'ok': False, 'error': 'No autorizado'}, status=403)
     if request.method != 'POST':
-        return JsonResponse({'ok': False, 'error': 'Método no permitido'}, status=405)
-    prof = _get_professional(request.user)
+        return None, None, JsonResponse({'ok': False, 'error': 'Método no permitido'}, status=405)
     thread_id = request.POST.get('thread_id')
     question = (request.POST.get('message') or '').strip()
     if not thread_id or not question:
-        return JsonResponse({'ok': False, 'error': 'Faltan parámetros'}, status=400)
-    thread = PatientAIThread.objects.select_related('professional', 'patient').filter(id=thread_id).first()
+        return None, None, JsonResponse({'ok': False, 'error': 'Faltan parámetros'}, status=400)
+    return thread_id, question, None
+
+
+def _chat_thread_error(request, prof, thread, client):
+    """JsonResponse if the user cannot chat on `thread` with `client`, else None."""
     if not thread:
         return JsonResponse({'ok': False, 'error': 'Hilo no encontrado'}, status=404)
     if not (request.user.is_staff or (prof and prof.id == thread.professional_id)):
         return JsonResponse({'ok': False, 'error': 'No autorizado'}, status=403)
-
-    client = _openai_client()
     if not client:
         return JsonResponse({'ok': False, 'error': 'Falta OPENAI_API_KEY'}, status=400)
-
     if not thread.openai_conversation_id:
         return JsonResponse({'ok': False, 'error': 'Genera un resumen primero para iniciar la conversación.'}, status=400)
+    return None
+
 
+def _upgrade_chat_model(thread):
+    """Move a thread off legacy/slow models; True if `thread.model` changed and needs saving."""
     # Migrate legacy/slow models to gpt-5-mini for faster responses
     if not thread.model or thread.model in ('gpt-4o-mini', 'gpt-5'):
         thread.model = 'gpt-5-mini'
+        return True
+    return False
+
+
+def _chat_turn(request):
+    """Validate a chat POST; return (thread, question, client) or (JsonResponse, None, None)."""
+    thread_id, question, error = _chat_params(request, _is_secretary(request.user))
+    if error:
+        return error, None, None
+    prof = _get_professional(request.user)
+    thread = PatientAIThread.objects.select_related('professional', 'patient').filter(id=thread_id).first()
+    client = openai_client() if thread else None
+    error = _chat_thread_error(request, prof, thread, client)
+    if error:
+        return error, None, None
+    if _upgrade_chat_model(thread):
         thread.save(update_fields=['model'])
+    return thread, question, client
+
+
+CONVERSATION_BUSY = 'La conversación está ocupada, intenta de nuevo en unos segundos.'
 
-    PatientAIMessage.objects.create(thread=thread, role='user', content=question)
 
-    # Retry on conversation_locked (OpenAI processes one turn at a time).
-    # A previous turn (e.g. summary generation) may still be running; wait up to ~45s.
-    vs_id = thread.openai_vector_store_id or None
-    tools = [{"type": "file_search", "vector_store_ids": [vs_id]}] if vs_id else []
-    max_attempts = 8
-    for attempt in range(max_attempts):
+def _chat_busy_response():
+    return JsonResponse({'ok': False, 'error': CONVERSATION_BUSY}, status=503)
+
+
+def _chat_error_response(exc):
+    """JsonResponse for an exception raised by the OpenAI chat call."""
+    if 'conversation_locked' in str(exc):
+        return _chat_busy_response()
+    return JsonResponse({'ok': False, 'error': f'Error IA: {exc}'}, status=500)
+
+
+def _chat_answer(resp, thread):
+    """Answer text of a non-streamed chat response (token usage is logged)."""
+    log_usage(getattr(resp, 'usage', None), thread.id)
+    return getattr(resp, 'output_text', None) or ''
+
+
+@login_required
+def report_sessions_chat(request):
+    thread, question, client = _chat_turn(request)
+    if isinstance(thread, JsonResponse):
+        return thread
+
+    # One turn at a time per conversation: answer "busy" right away instead of
+    # sleeping in the worker until OpenAI releases the conversation
+    token = acquire_conversation(thread.id)
+    if not token:
+        return _chat_busy_response()
+    try:
+        PatientAIMessage.objects.create(thread=thread, role='user', content=question)
         try:
-            resp = client.responses.create(
-                model=thread.model or 'gpt-5-mini',
-                input=[{"role": "user", "content": question}],
-                conversation=thread.openai_conversation_id,
-                tools=tools,
-                reasoning={"effort": "low"},
-            )
-            answer = getattr(resp, 'output_text', None) or ''
-            # Log token usage via Django logger (visible in dev console + log files)
-            usage = getattr(resp, 'usage', None)
-            if usage:
-                in_tok  = getattr(usage, 'input_tokens', '?')
-                out_tok = getattr(usage, 'output_tokens', '?')
-                cached  = getattr(getattr(usage, 'input_tokens_details', None), 'cached_tokens', 0)
-                logger.info('[AI chat] in=%s (cached=%s) out=%s | thread=%s', in_tok, cached, out_tok, thread.id)
-            PatientAIMessage.objects.create(thread=thread, role='assistant', content=answer)
-            return JsonResponse({'ok': True, 'answer': answer})
+            resp = client.responses.create(**chat_request(thread, question))
+        except Exception as e:
+            return _chat_error_response(e)
+        answer = _chat_answer(resp, thread)
+        PatientAIMessage.objects.create(thread=thread, role='assistant', content=answer)
+        return JsonResponse({'ok': True, 'answer': answer})
+    finally:
+        release_conversation(thread.id, token)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _sse_chat_error(exc=None):
+    """SSE `error` event for a failed turn; no `exc` means the conversation was busy."""
+    busy = exc is None or 'conversation_locked' in str(exc)
+    return _sse('error', {'error': CONVERSATION_BUSY if busy else f'Error IA: {exc}', 'busy': busy})
+
+
+def _sse_response(events):
+    resp = StreamingHttpResponse(events, content_type='text/event-stream')
+    resp['Cache-Control'] = 'no-cache'
+    resp['X-Accel-Buffering'] = 'no'  # nginx: flush each event immediately
+    return resp
+
+
+@login_required
+def report_sessions_chat_stream(request):
+    """Chat turn streamed as server-sent events: `delta` (text), then `done` or `error`."""
+    thread, question, client = _chat_turn(request)
+    if isinstance(thread, JsonResponse):
+        return thread
+
+    def events():
+        # The lock is taken when the stream starts, not when the response is
+        # built, so a response that is never iterated never holds it
+        token = acquire_conversation(thread.id)
+        if not token:
+            yield _sse_chat_error()
+            return
+        try:
+            PatientAIMessage.objects.create(thread=thread, role='user', content=question)
+            for delta in stream_chat_answer(client, thread, question):
+                yield _sse('delta', {'text': delta})
+            yield _sse('done', {'ok': True})
         except Exception as e:
-            err_str = str(e)
-            if 'conversation_locked' in err_str:
-                if attempt < max_attempts - 1:
-                    time.sleep(min(2 ** attempt, 8))  # 1, 2, 4, 8, 8, 8, 8 (~39s total)
-                continue
-            # Any other error — fail immediately
-            return JsonResponse({'ok': False, 'error': f'Error IA: {e}'}, status=500)
+            yield _sse_chat_error(e)
+        finally:
+            release_conversation(thread.id, token)
 
-    return JsonResponse({'ok': False, 'error': 'La conversación está ocupada, intenta de nuevo en unos segundos.'}, status=503)
+    return _sse_response(events())
 
 
 @login_required
@@ -2132,7 +1938,8 @@ def patient_history_manager(request, patient_id):
 @login_required
 def eeg_stats(request):
     import json as _json
-    from django.db.models import Count, Avg
+    from .utils.eeg_summary import session_summaries
+    from .utils import eeg_analytics
 
     patients = Patient.objects.order_by('first_name', 'last_name')
     selected_patient = None
@@ -2140,11 +1947,15 @@ def eeg_stats(request):
     if patient_id:
         selected_patient = get_object_or_404(Patient, id=patient_id)
 
-    sessions_qs = EEGSession.objects.select_related('patient')
+    sessions_qs = EEGSession.objects.select_related('patient', 'summary')
     if selected_patient:
         sessions_qs = sessions_qs.filter(patient=selected_patient)
 
     sessions = list(sessions_qs.order_by('-started_at'))
+    # Precomputed per-session aggregates (EEGSessionSummary): no scan of the readings
+    summaries = session_summaries(sessions)
+    for s in sessions:
+        s.reading_count = summaries[s.id].reading_count
 
     # Emotion distribution
     emotion_counts = {'POSITIVE': 0, 'NEUTRAL': 0, 'NEGATIVE': 0}
@@ -2152,23 +1963,31 @@ def eeg_stats(request):
         if s.dominant_emotion in emotion_counts:
             emotion_counts[s.dominant_emotion] += 1
 
-    # Per-session band power averages (for chart)
+    # Per-session band power averages and analytics (for charts). Analytics are
+    # only read as stored with the summary; sessions without them are pending
     session_chart_data = []
+    transitions = np.zeros((len(eeg_analytics.EMOTIONS),) * 2, dtype=np.int64)
+    analytics_pending = 0
     for s in sessions[:20]:  # last 20 sessions
-        avg = EEGReading.objects.filter(session=s).aggregate(
-            delta=Avg('delta'), theta=Avg('theta'),
-            alpha=Avg('alpha'), beta=Avg('beta'), gamma=Avg('gamma'),
-            attention=Avg('attention'), meditation=Avg('meditation'),
-        )
+        summary = summaries[s.id]
+        analytics = eeg_analytics.stored_analytics(summary)
+        if analytics is None:
+            analytics_pending += 1
+        else:
+            transitions += np.array(analytics['transitions'], dtype=np.int64)
         session_chart_data.append({
             'label': s.started_at.strftime('%d/%m %H:%M'),
-            'delta': round(avg['delta'] or 0, 2),
-            'theta': round(avg['theta'] or 0, 2),
-            'alpha': round(avg['alpha'] or 0, 2),
-            'beta': round(avg['beta'] or 0, 2),
-            'gamma': round(avg['gamma'] or 0, 2),
-            'attention': round(avg['attention'] or 0, 1),
-            'meditation': round(avg['meditation'] or 0, 1),
+            'delta': round(summary.delta_mean or 0, 2),
+            'theta': round(summary.theta_mean or 0, 2),
+            'alpha': round(summary.alpha_mean or 0, 2),
+            'beta': round(summary.beta_mean or 0, 2),
+            'gamma': round(summary.gamma_mean or 0, 2),
+            'attention': round(summary.attention_mean or 0, 1),
+            'meditation': round(summary.meditation_mean or 0, 1),
+            'theta_beta': round(analytics['theta_beta'] or 0, 3) if analytics else None,
+            'alpha_theta': round(analytics['alpha_theta'] or 0, 3) if analytics else None,
+            'attention_above': round(analytics['attention_above'] or 0, 1) if analytics else None,
+            'meditation_above': round(analytics['meditation_above'] or 0, 1) if analytics else None,
         })
     session_chart_data.reverse()
 
@@ -2185,9 +2004,67 @@ def eeg_stats(request):
         'total_sessions': total_sessions,
         'total_patients_with_eeg': total_patients_with_eeg,
         'emotion_counts': emotion_counts,
+        'transition_rows': _transition_rows(transitions),
+        'analytics_pending': analytics_pending,
+        'attention_threshold': eeg_analytics.ATTENTION_THRESHOLD,
     })
 
 
+def _transition_rows(counts):
+    # [(label, [(percent, count, shade), ...]), ...] for the emotion transition table
+    from .utils.eeg_analytics import EMOTIONS, transition_probabilities
+    labels = dict(EEGSession.EMOTION_CHOICES)
+    probs = transition_probabilities(counts)
+    return [
+        (labels[emotion], [(round(float(p) * 100, 1), int(n), round(float(p) * 0.6, 2)) for p, n in zip(probs[i], counts[i])])
+        for i, emotion in enumerate(EMOTIONS)
+    ]
+
+
+@login_required
+def eeg_session_detail(request, session_id):
+    session = get_object_or_404(EEGSession.objects.select_related('patient', 'summary'), id=session_id)
+    from .utils.eeg_summary import session_summaries
+    from .utils import eeg_analytics
+    summary = session_summaries([session])[session.id]
+    # Stored analytics only (None: pending until the session is summarized)
+    analytics = eeg_analytics.stored_analytics(summary)
+    return render(request, 'pages/eeg_session.html', {
+        'segment': 'eegstats',
+        'session': session,
+        'summary': summary,
+        'analytics': analytics,
+        'transition_rows': _transition_rows(np.array(analytics['transitions'])) if analytics else None,
+        'rolling_json': json.dumps(eeg_analytics.session_rolling_series(session)),
+        'attention_threshold': eeg_analytics.ATTENTION_THRESHOLD,
+        'meditation_threshold': eeg_analytics.MEDITATION_THRESHOLD,
+        'rolling_seconds': eeg_analytics.ROLLING_SECONDS,
+    })
+
+
+@login_required
+def eeg_session_series(request, session_id):
+    # Params: points (int), method (lttb|minmax), start/end (epoch ms, optional zoom window)
+    from .utils import eeg_series
+    session = EEGSession.objects.filter(id=session_id).first()
+    if not session:
+        return JsonResponse({'error': 'Session not found'}, status=404)
+    method = request.GET.get('method', 'lttb')
+    if method not in eeg_series.METHODS:
+        return JsonResponse({'error': 'Invalid method'}, status=400)
+    try:
+        points = int(request.GET.get('points', eeg_series.DEFAULT_POINTS))
+        start, end = (
+            dt.fromtimestamp(float(request.GET[k]) / 1000, tz=dt_timezone.utc) if request.GET.get(k) else None
+            for k in ('start', 'end')
+        )
+    except (TypeError, ValueError, OverflowError):
+        return JsonResponse({'error': 'Invalid parameters'}, status=400)
+    points = min(max(points, eeg_series.MIN_POINTS), eeg_series.MAX_POINTS)
+    data = eeg_series.session_series(session, points=points, method=method, start=start, end=end)
+    return JsonResponse({'session': session.id, 'points': points, 'method': method, **data})
+
+
 @login_required
 def eeg_download_installer(request):
     from django.http import FileResponse, Http404
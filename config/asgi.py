@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402  (needs the settings module configured above)
+
+if settings.ASYNC_VIEWS:
+    # WhiteNoise middleware is disabled in this mode (see settings.MIDDLEWARE)
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+    application = ASGIStaticFilesHandler(application)
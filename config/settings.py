@@ -70,6 +70,11 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',  # Include DRF Auth      # <-- NEW    
 ]
 
+# Serve the I/O-bound views (AI chat, reupload, available slots) with their
+# async versions. Enable only when running under ASGI (see gunicorn-asgi-cfg.py);
+# under WSGI each async view would get its own event loop per request.
+ASYNC_VIEWS = str2bool(os.environ.get('ASYNC_VIEWS', 'False'))
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -81,6 +86,11 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if ASYNC_VIEWS:
+    # WhiteNoise's middleware is sync-only and would force every async view back
+    # onto a single thread; config/asgi.py serves static files instead
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
 ROOT_URLCONF = "config.urls"
 
 UI_TEMPLATES = os.path.join(BASE_DIR, 'templates')
@@ -138,6 +148,17 @@ else:
         }
     }
 
+# Cache: per-process local memory by default. Point CACHE_BACKEND/CACHE_LOCATION
+# at a shared backend (e.g. Redis, or DatabaseCache after `createcachetable`)
+# when running several processes. Caches invalidated across processes
+# (calendar feeds) are disabled on a per-process backend; see utils.shared_cache
+CACHES = {
+    'default': {
+        'BACKEND' : os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 # Sessions: keep them in the DB but cache reads locally, so most requests
 # skip one remote-DB round-trip (falls back to DB on cache miss — safe)
 SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
@@ -187,9 +208,15 @@ STATICFILES_DIRS = (
 #if not DEBUG:
 #    STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
-# Media files (user uploads)
+# Media files (user uploads). The job worker opens attachments from here, so
+# the web and worker processes must see the same directory (see docs/12)
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+
+# Rendered AI summary PDFs (apps/pages/utils/report_pdf.py). Kept outside
+# MEDIA_ROOT so they are never reachable through the /media/ URL. The worker
+# precomputes them here, so it is shared with the web process too (docs/12).
+REPORT_PDF_CACHE_DIR = os.getenv('REPORT_PDF_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'report_pdfs'))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
@@ -215,6 +242,16 @@ DYNAMIC_DATATB = {
     # SLUG -> Import_PATH 
     'product'  : "apps.pages.models.Product",
 }
+
+# Slugs paginated by keyset (?cursor=...) with estimated counts instead of
+# OFFSET pages and an exact COUNT(*); use it for large tables
+DYNAMIC_DATATB_KEYSET = [
+    # 'eegreading',
+]
+
+# Search backend for ?search= (import path). Default: pg_trgm on PostgreSQL,
+# FTS5 on SQLite; build the indexes with `manage.py dyn_dt_search_index`
+DYNAMIC_DATATB_SEARCH = os.getenv('DYNAMIC_DATATB_SEARCH') or None
 ########################################
 
 # Syntax: URI -> Import_PATH
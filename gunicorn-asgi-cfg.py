@@ -0,0 +1,15 @@
+# -*- encoding: utf-8 -*-
+"""
+ASGI variant of gunicorn-cfg.py: one uvicorn worker serves many concurrent
+requests, so long OpenAI calls no longer pin the only worker.
+
+    ASYNC_VIEWS=True gunicorn --config gunicorn-asgi-cfg.py config.asgi
+"""
+
+bind = '0.0.0.0:5005'
+workers = 1
+worker_class = 'uvicorn.workers.UvicornWorker'
+accesslog = '-'
+loglevel = 'debug'
+capture_output = True
+enable_stdio_inheritance = True
@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+# Render web service start: the job worker runs in the same instance as
+# gunicorn so both see the same MEDIA_ROOT (uploaded attachments), which a
+# separate Render service could not.
+set -o errexit
+
+python manage.py run_worker --threads 2 &
+exec gunicorn config.wsgi:application